@@ -0,0 +1,92 @@
+# Content defined chunking: full chunking throughput against the streaming
+# full file hash, then one edit of each kind applied to the same file and
+# brought up to date from the previous layout the way the monitor does it:
+# a file that kept its size gets a full pass, anything else goes through
+# rechunk_fd and falls back to a full pass when it gives up. For every edit
+# the bytes read are compared with a full pass, and the layout with the one
+# a full pass finds.
+#
+#   python -m benchmarks.bench_chunking [--mb N] [--probes N] [--seed N]
+
+import os
+import sys
+import random
+import argparse
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyile.lib.runtime.hashing.chunking import chunk_fd, rechunk_fd
+from pyile.lib.runtime.hashing.streaming import hash_fd
+from pyile.lib.runtime.internal.constants import CDC_PROBES
+
+def _with_file(data: bytes, fn):
+    fd, path = tempfile.mkstemp(prefix="pyile_bench_")
+    try:
+        os.write(fd, data)
+        os.lseek(fd, 0, os.SEEK_SET)
+        return fn(fd)
+    finally:
+        os.close(fd)
+        os.unlink(path)
+
+def _edits(base: bytes, rng: random.Random) -> list:
+    n = len(base)
+    mid = n // 2
+    return [
+        ("append", base + os.urandom(300_000)),
+        ("truncate", base[:n - n // 20]),
+        ("insert", base[:mid] + os.urandom(1234) + base[mid:]),
+        ("delete", base[:mid] + base[mid + 5000:]),
+        ("prepend", os.urandom(100) + base),
+        ("multi", base[:n // 10] + b"x" * 50 + base[n // 10:n * 3 // 4] + base[n * 3 // 4 + 100_000:]),
+        ("overwrite", base[:mid] + os.urandom(4096) + base[mid + 4096:]),
+        ("unchanged", base),
+    ]
+
+def _update(fd: int, lens, fps, old_size: int, size: int, probes: int, rng: random.Random) -> tuple:
+    if size == old_size:
+        return chunk_fd(fd), "full pass"
+    result = rechunk_fd(fd, lens, fps, size, probes=probes, rng=rng)
+    if len(result[0]):
+        return result, "rechunk"
+    full = chunk_fd(fd)
+    return (full[0], full[1], result[2] + full[2]), "gave up"
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=int, default=32)
+    parser.add_argument("--probes", type=int, default=CDC_PROBES)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base = os.urandom(args.mb << 20)
+    size_mb = len(base) / 2**20
+
+    start = time.perf_counter()
+    lens, fps, _ = _with_file(base, chunk_fd)
+    chunk_s = time.perf_counter() - start
+    start = time.perf_counter()
+    _with_file(base, lambda fd: hash_fd(fd, [(0, len(base))]))
+    hash_s = time.perf_counter() - start
+
+    print(f"{size_mb:.0f} MB, {len(lens)} chunks, average {len(base) // len(lens) // 1024} KB")
+    print(f"{'full hash':<10} {size_mb / hash_s:8.1f} MB/s")
+    print(f"{'chunk_fd':<10} {size_mb / chunk_s:8.1f} MB/s")
+    print()
+    print(f"{'edit':<10} {'full MB':>8} {'update MB':>10} {'read':>7} {'time':>8}  {'path':<10} layout")
+    for name, data in _edits(base, rng):
+        full = _with_file(data, chunk_fd)
+        start = time.perf_counter()
+        result, path = _with_file(data, lambda fd: _update(fd, lens, fps, len(base), len(data), args.probes, rng))
+        took = time.perf_counter() - start
+        same = result[0] == full[0] and result[1] == full[1]
+        print(
+            f"{name:<10} {full[2] / 2**20:8.1f} {result[2] / 2**20:10.2f} "
+            f"{result[2] / max(1, full[2]):7.1%} {took * 1000:6.0f}ms  {path:<10} {'same' if same else 'differs'}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Tiered duplicate detection against hashing every file in full.
+# Builds a scratch tree where most files have a unique size, some share a
+# size but differ in content and a few are true copies.
+#
+#   python -m benchmarks.bench_dedupe [--files N] [--max-kb N] [--copies PCT]
+
+import os
+import sys
+import random
+import shutil
+import argparse
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyile.lib.runtime.hashing.streaming import hash_fd
+from pyile.lib.runtime.dedupe.tiered import TieredDedupe
+
+def _build_tree(root: str, files: int, max_kb: int, copies: float, seed: int) -> list:
+    rng = random.Random(seed)
+    paths = []
+    for i in range(files):
+        path = os.path.join(root, f"d{i % 32:02d}", f"f{i:06d}.bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if paths and rng.random() < copies:
+            shutil.copyfile(rng.choice(paths), path)
+        else:
+            size = rng.randint(1, max_kb * 1024)
+            with open(path, "wb") as fh:
+                fh.write(rng.randbytes(size))
+        paths.append(path)
+    return paths
+
+def _full_key(path: str, counter: list) -> int:
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        key, hashed = hash_fd(fd, [(0, -1)])
+    finally:
+        os.close(fd)
+    counter[0] += 1
+    counter[1] += hashed
+    return key
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--max-kb", type=int, default=256)
+    parser.add_argument("--copies", type=float, default=0.05, help="share of files that copy an earlier one")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="pyile_dedupe_")
+    try:
+        paths = _build_tree(scratch, args.files, args.max_kb, args.copies, args.seed)
+
+        full = [0, 0]
+        start = time.perf_counter()
+        seen = {}
+        full_dupes = 0
+        for path in paths:
+            key = _full_key(path, full)
+            if seen.setdefault(key, path) != path:
+                full_dupes += 1
+        full_s = time.perf_counter() - start
+
+        tiered = [0, 0]
+        dedupe = TieredDedupe()
+        start = time.perf_counter()
+        seen = {}
+        tiered_dupes = 0
+        for path in paths:
+            st = os.stat(path)
+            for p, key in dedupe.observe(path, st.st_size, st.st_mtime, lambda p: _full_key(p, tiered)):
+                if seen.setdefault(key, p) != p:
+                    tiered_dupes += 1
+        tiered_s = time.perf_counter() - start
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    assert full_dupes == tiered_dupes, f"{full_dupes} != {tiered_dupes} duplicates"
+    stats = dedupe.stats()
+    print(f"files: {args.files}  duplicates: {full_dupes}")
+    print(f"full     {full_s:7.3f}s  {full[0]:>7} full reads  {full[1] / 2**20:9.1f}MB")
+    print(f"tiered   {tiered_s:7.3f}s  {tiered[0]:>7} full reads  {tiered[1] / 2**20:9.1f}MB")
+    print(
+        f"unique size: {stats['unique_size']}  unique head: {stats['unique_head']}  "
+        f"head reads: {stats['head_reads']}"
+    )
+
+if __name__ == "__main__":
+    main()
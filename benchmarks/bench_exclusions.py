@@ -0,0 +1,87 @@
+# Exclusion checks: the old per-path loop (Path.parts, every rule slid over
+# every offset) against the compiled RuleEngine. Rules mix single
+# folder names, relative runs and absolute prefixes like a real exclude
+# list. The old loop is far too slow for the full path set, it is timed on
+# the first --legacy-paths paths, both are checked to agree there.
+#
+#   python -m benchmarks.bench_exclusions [--rules N] [--paths N] [--legacy-paths N]
+
+import os
+import sys
+import random
+import argparse
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyile.lib.runtime.rules.engine import RuleEngine, Rule, RULE_EXCLUDE, KIND_DIR
+
+def _legacy_is_excluded(path: str, excluded: list) -> bool:
+    # Monitor.is_excluded before the matcher
+    norm_parts = Path(path).parts
+    for excluded_parts in excluded:
+        if len(excluded_parts) > len(norm_parts):
+            continue
+        for i in range(len(norm_parts) - len(excluded_parts) + 1):
+            if norm_parts[i:i + len(excluded_parts)] == excluded_parts:
+                return True
+    return False
+
+def _make_rules(rng: random.Random, count: int, vocab: list, anchor: str) -> list:
+    rules = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            rules.append((rng.choice(vocab),))
+        elif kind == 1:
+            rules.append(tuple(rng.choice(vocab) for _ in range(rng.randint(2, 3))))
+        else:
+            rules.append((anchor,) + tuple(rng.choice(vocab) for _ in range(rng.randint(1, 3))))
+    return rules
+
+def _make_paths(rng: random.Random, count: int, vocab: list, anchor: str) -> list:
+    return [
+        os.path.join(anchor, *(rng.choice(vocab) for _ in range(rng.randint(3, 12))), f"f{i}.txt")
+        for i in range(count)
+    ]
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=1000)
+    parser.add_argument("--paths", type=int, default=1_000_000)
+    parser.add_argument("--legacy-paths", type=int, default=5000)
+    parser.add_argument("--vocab", type=int, default=4000, help="distinct folder names")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    anchor = Path(os.path.abspath(os.sep)).parts[0].lower()
+    vocab = [f"dir{i}" for i in range(args.vocab)]
+    rules = _make_rules(rng, args.rules, vocab, anchor)
+    paths = _make_paths(rng, args.paths, vocab, anchor)
+
+    start = time.perf_counter()
+    matcher = RuleEngine(Rule(RULE_EXCLUDE, KIND_DIR, (parts,), "") for parts in rules)
+    compile_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = sum(not matcher.accepts_path(p) for p in paths)
+    matcher_s = time.perf_counter() - start
+
+    sample = paths[:args.legacy_paths]
+    start = time.perf_counter()
+    legacy_hits = [_legacy_is_excluded(p, rules) for p in sample]
+    legacy_s = time.perf_counter() - start
+
+    assert legacy_hits == [not matcher.accepts_path(p) for p in sample], "matcher disagrees with the old loop"
+
+    legacy_per = legacy_s / len(sample)
+    matcher_per = matcher_s / len(paths)
+    print(f"rules: {args.rules}  paths: {len(paths)}  excluded: {hits}  compile: {compile_s * 1000:.1f}ms")
+    print(f"legacy   {legacy_per * 1e6:9.2f}us/path  {legacy_per * len(paths):9.1f}s for all paths (from {len(sample)})")
+    print(f"matcher  {matcher_per * 1e6:9.2f}us/path  {matcher_s:9.1f}s for all paths")
+    print(f"speedup  {legacy_per / matcher_per:9.0f}x")
+
+if __name__ == "__main__":
+    main()
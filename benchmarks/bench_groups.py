@@ -0,0 +1,100 @@
+# Duplicate bookkeeping: the old ThreadSafeDict of str(file_key) -> first
+# path against DuplicateIndex keyed by the int hash with interned path ids.
+# Both index the same files, a share of them in duplicate groups. Heap per
+# entry is measured with tracemalloc and covers the index only, the path
+# strings themselves are shared by both (PathIds keeps one copy).
+#
+#   python -m benchmarks.bench_groups [--files N] [--dup-share F] [--group-size N]
+
+import os
+import sys
+import random
+import argparse
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyile.lib.runtime.internal.thread_safe import ThreadSafeDict
+from pyile.lib.runtime.dedupe.groups import DuplicateIndex
+
+def _make_keys(rng: random.Random, files: int, dup_share: float, group_size: int) -> list:
+    keys = []
+    while len(keys) < files:
+        key = rng.getrandbits(64) or 1
+        count = group_size if rng.random() < dup_share else 1
+        keys.extend([key] * count)
+    del keys[files:]
+    rng.shuffle(keys)
+    return keys
+
+def _legacy(paths: list, keys: list) -> tuple:
+    index = ThreadSafeDict()
+    matches = 0
+    for path, key in zip(paths, keys):
+        if index.get_or_set(str(key), path) != path:
+            matches += 1
+    return index, matches
+
+def _groups(keys: list) -> tuple:
+    index = DuplicateIndex()
+    matches = 0
+    for path_id, key in enumerate(keys):
+        if index.add(path_id, key) is not None:
+            matches += 1
+    return index, matches
+
+def _build(fn, *args) -> tuple:
+    # timed untraced, the heap is measured on a second, traced build
+    start = time.perf_counter()
+    index, matches = fn(*args)
+    elapsed = time.perf_counter() - start
+    del index
+
+    tracemalloc.start()
+    index, _ = fn(*args)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return index, matches, elapsed, size
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--dup-share", type=float, default=0.1, help="share of keys that form a group")
+    parser.add_argument("--group-size", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    keys = _make_keys(rng, args.files, args.dup_share, args.group_size)
+    paths = [os.path.join(os.sep, "data", f"d{i % 997}", f"f{i}.bin") for i in range(args.files)]
+
+    legacy, legacy_matches, legacy_s, legacy_bytes = _build(_legacy, paths, keys)
+    del legacy
+    groups, group_matches, group_s, group_bytes = _build(_groups, keys)
+    assert legacy_matches == group_matches, "both should report the same duplicates"
+
+    start = time.perf_counter()
+    for i in range(0, args.files, 7):
+        groups.remove(i)
+    for i in range(0, args.files, 7):
+        groups.add(i, keys[i])
+    for i in range(1, args.files, 11):
+        groups.move(i, args.files + i)
+    churn_s = time.perf_counter() - start
+    churn_ops = len(range(0, args.files, 7)) * 2 + len(range(1, args.files, 11))
+
+    start = time.perf_counter()
+    found = sum(len(groups.members(k)) > 1 for k in keys)
+    lookup_s = time.perf_counter() - start
+
+    stats = groups.stats()
+    print(f"files: {args.files}  duplicates reported: {group_matches}  groups: {stats['groups']} ({stats['duplicate_groups']} with duplicates)")
+    print(f"{'index':>10} {'build s':>9} {'heap MB':>9} {'B/entry':>9}")
+    print(f"{'legacy':>10} {legacy_s:>9.2f} {legacy_bytes / 2**20:>9.1f} {legacy_bytes / args.files:>9.1f}  (keeps 1 path per group)")
+    print(f"{'groups':>10} {group_s:>9.2f} {group_bytes / 2**20:>9.1f} {group_bytes / args.files:>9.1f}  (every member, stats() says {stats['bytes_per_entry']:.1f})")
+    print(f"churn: {churn_ops} remove/add/move in {churn_s:.2f}s ({churn_ops / churn_s:,.0f}/s)")
+    print(f"members(): {len(keys)} lookups in {lookup_s:.2f}s, {found} in a duplicate group")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Hash engines: the BGHasher style thread pool against HashProcessPool at
+# 4, 8 and 16 workers over the same set of files. Both are driven the way
+# Monitor drives them, one calling thread per worker. A ticker thread that
+# wants the GIL every --tick-ms stands in for the reader and Tk threads,
+# its worst and p99 lateness show how much hashing starves them. Process
+# pools are started (and their workers spawned) before timing.
+#
+#   python -m benchmarks.bench_hash_engine [--files N] [--file-kb N] [--workers 4 8 16]
+
+import os
+import sys
+import argparse
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyile.lib.runtime.hashing.streaming import hash_fd
+from pyile.lib.runtime.hashing.process_pool import HashProcessPool
+
+def _make_files(root: str, files: int, size: int) -> list:
+    paths = []
+    for i in range(files):
+        path = os.path.join(root, f"f{i:05d}.bin")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        paths.append(path)
+    return paths
+
+def _hash_thread(path: str) -> int:
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        return hash_fd(fd, [(0, -1)])[0] # type: ignore
+    finally:
+        os.close(fd)
+
+class _Ticker:
+    def __init__(self, tick: float) -> None:
+        self.tick = tick
+        self.late: list = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            time.sleep(self.tick)
+            self.late.append(time.perf_counter() - start - self.tick)
+
+    def __enter__(self) -> "_Ticker":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def report(self) -> str:
+        late = sorted(self.late) or [0.0]
+        p99 = late[min(len(late) - 1, int(len(late) * 0.99))]
+        return f"tick late p99 {p99 * 1000:6.1f}ms max {late[-1] * 1000:6.1f}ms"
+
+def _run(paths: list, workers: int, hash_one, tick: float) -> tuple:
+    with _Ticker(tick) as ticker:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as callers:
+            keys = list(callers.map(hash_one, paths))
+        took = time.perf_counter() - start
+    return took, keys, ticker.report()
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=400)
+    parser.add_argument("--file-kb", type=int, default=1024)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--tick-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="pyile_bench_")
+    try:
+        paths = _make_files(root, args.files, args.file_kb * 1024)
+        total_mb = args.files * args.file_kb / 1024
+        tick = args.tick_ms / 1000.0
+        print(f"{args.files} files, {total_mb:.0f} MB, {os.cpu_count()} cpus")
+
+        # warm the page cache so both engines read from memory
+        expected = _run(paths, 4, _hash_thread, tick)[1]
+        for workers in args.workers:
+            took, keys, late = _run(paths, workers, _hash_thread, tick)
+            assert keys == expected
+            print(f"threads   {workers:3d}  {total_mb / took:8.1f} MB/s  {args.files / took:8.0f} files/s  {late}")
+
+            pool = HashProcessPool()
+            if not pool.start(workers):
+                print(f"processes {workers:3d}  unavailable")
+                continue
+            try:
+                # spawn every worker before timing
+                _run(paths[:workers * 2], workers, lambda p: pool.hash_path(0, p, [(0, -1)]), tick)
+                took, results, late = _run(paths, workers, lambda p: pool.hash_path(0, p, [(0, -1)]), tick)
+                assert [r[3] for r in results] == expected
+                print(f"processes {workers:3d}  {total_mb / took:8.1f} MB/s  {args.files / took:8.0f} files/s  {late}")
+            finally:
+                pool.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Read-loop against mmap hashing across file sizes. Files above --max-mb
+# are sampled (head, middle, tail windows) exactly like Monitor does.
+# --cold drops the file from the page cache before every run where the OS
+# supports posix_fadvise, otherwise every run is warm.
+#
+#   python -m benchmarks.bench_mmap_hash [--sizes-mb 1 8 64 256] [--rounds N] [--cold]
+
+import os
+import sys
+import argparse
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyile.lib.runtime.hashing.streaming import hash_fd, sample_windows
+from pyile.lib.runtime.hashing.mapped import hash_fd_mmap
+
+def _drop_cache(fd: int) -> None:
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+def _run(path: str, windows: list, hasher, rounds: int, cold: bool) -> tuple:
+    best = None
+    key = hashed = 0
+    for _ in range(rounds):
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            if cold:
+                _drop_cache(fd)
+            start = time.perf_counter()
+            key, hashed = hasher(fd, windows)
+            elapsed = time.perf_counter() - start
+        finally:
+            os.close(fd)
+        best = elapsed if best is None else min(best, elapsed)
+    return key, hashed, best
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 8, 64, 256])
+    parser.add_argument("--max-mb", type=int, default=50, help="max_hash_file_bytes, larger files are sampled")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--cold", action="store_true")
+    args = parser.parse_args()
+
+    max_bytes = window = args.max_mb * 1024 * 1024
+    if args.cold and not hasattr(os, "posix_fadvise"):
+        print("posix_fadvise is not available, runs are warm")
+
+    print(f"{'size':>8} {'hashed':>8} {'read MB/s':>11} {'mmap MB/s':>11} {'speedup':>8}")
+    for size_mb in args.sizes_mb:
+        size = size_mb * 1024 * 1024
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            block = os.urandom(1024 * 1024)
+            for _ in range(size_mb):
+                tmp.write(block)
+            path = tmp.name
+
+        try:
+            windows = sample_windows(size, max_bytes, window)
+            read_key, hashed, read_s = _run(path, windows, hash_fd, args.rounds, args.cold)
+            mmap_key, _, mmap_s = _run(path, windows, hash_fd_mmap, args.rounds, args.cold)
+        finally:
+            os.unlink(path)
+
+        assert read_key == mmap_key, f"key mismatch at {size_mb} MB"
+        mb = hashed / 2**20
+        print(
+            f"{size_mb:>6}MB {mb:>6.0f}MB {mb / read_s:>11,.0f} {mb / mmap_s:>11,.0f} "
+            f"{read_s / mmap_s:>7.2f}x"
+        )
+
+if __name__ == "__main__":
+    main()
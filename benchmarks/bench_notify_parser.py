@@ -0,0 +1,85 @@
+# Microbenchmark for the FILE_NOTIFY_INFORMATION parser.
+# Runs on any OS, the buffer is built from synthetic records.
+#
+#   python -m benchmarks.bench_notify_parser [--records N] [--rounds N]
+
+import os
+import sys
+import argparse
+import ctypes
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyile.lib.runtime.monitors.notify_parser import parse_notify_buffer, build_notify_buffer
+
+def _legacy_parse(raw_buf: ctypes.Array, bytes_returned: int) -> list:
+    # the parser as it was before the memoryview rewrite
+    results = []
+    offset = 0
+    buf = raw_buf.raw
+    while offset < bytes_returned:
+        if offset + 12 > bytes_returned:
+            break
+        next_offset = int.from_bytes(buf[offset:offset+4], "little")
+        action = int.from_bytes(buf[offset+4:offset+8], "little")
+        name_len = int.from_bytes(buf[offset+8:offset+12], "little")
+        if name_len % 2 != 0 or offset + 12 + name_len > bytes_returned:
+            break
+        name = buf[offset+12:offset+12+name_len].decode("utf-16le", errors="ignore")
+        results.append((action, name))
+        if next_offset <= 0:
+            break
+        offset += next_offset
+    return results
+
+def _make_records(count: int) -> list:
+    records = []
+    for i in range(count):
+        action = (i % 5) + 1
+        records.append((action, f"Users\\dev\\Documents\\project_{i % 37}\\file_{i:06d}.txt"))
+    return records
+
+def _fill_buffer(records: list, buffer_size: int):
+    payload = build_notify_buffer(records)
+    if len(payload) > buffer_size:
+        raise SystemExit(f"{len(records)} records need {len(payload)} bytes, buffer is {buffer_size}")
+    buf = ctypes.create_string_buffer(buffer_size)
+    ctypes.memmove(buf, payload, len(payload))
+    return buf, len(payload)
+
+def _time(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=0, help="records per buffer, 0 fills the buffer")
+    parser.add_argument("--buffer", type=int, default=65536)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    count = args.records
+    if not count:
+        # roughly what fits into one buffer with the synthetic names above
+        count = args.buffer // (12 + 2 * 48)
+
+    records = _make_records(count)
+    buf, nbytes = _fill_buffer(records, args.buffer)
+    view = memoryview(buf).cast("B")
+
+    assert _legacy_parse(buf, nbytes) == parse_notify_buffer(view, nbytes) == records
+
+    legacy = _time(lambda: _legacy_parse(buf, nbytes), args.rounds)
+    current = _time(lambda: parse_notify_buffer(view, nbytes), args.rounds)
+
+    total = count * args.rounds
+    print(f"records/buffer: {count}  buffer bytes: {nbytes}  rounds: {args.rounds}")
+    print(f"legacy   {legacy:8.3f}s  {total / legacy:12,.0f} records/s")
+    print(f"current  {current:8.3f}s  {total / current:12,.0f} records/s")
+    print(f"speedup  {legacy / current:8.2f}x")
+
+if __name__ == "__main__":
+    main()
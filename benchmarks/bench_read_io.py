@@ -0,0 +1,97 @@
+# Hash reads before and after the buffer pool: the common.read_text loop
+# (one os.read and one new bytes object per CHUNK_SIZE_READ), the fixed
+# 1 MB readinto loop hash_fd used before, and hash_fd with pooled buffers
+# sized to the file. Read calls per MB and buffer allocations come from
+# counting the loop iterations and from io_stats(), the keys of all three
+# are checked against each other. Files are read warm.
+#
+#   python -m benchmarks.bench_read_io [--sizes-kb 16 256 4096 51200] [--rounds N]
+
+import os
+import sys
+import argparse
+import io
+import tempfile
+import time
+import xxhash # type: ignore
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyile.lib.utils.common import read_text
+from pyile.lib.runtime.hashing.streaming import hash_fd
+from pyile.lib.runtime.hashing.buffers import io_stats, prime_buffers
+
+def _read_text(fd: int) -> tuple:
+    # before: the generic reader, every chunk is a fresh bytes object
+    h = xxhash.xxh3_64()
+    reads = allocations = 0
+    for chunk in read_text(fd):
+        h.update(chunk)
+        reads += 1
+        allocations += 1
+    # the read that hit EOF
+    return h.intdigest(), reads + 1, allocations
+
+def _fixed_readinto(fd: int) -> tuple:
+    # the previous hash_fd: one 1 MB buffer per thread, readinto in a loop
+    h = xxhash.xxh3_64()
+    view = memoryview(bytearray(1 << 20))
+    reads = 0
+    with io.FileIO(fd, "rb", closefd=False) as f:
+        while True:
+            n = f.readinto(view)
+            reads += 1
+            if not n:
+                break
+            h.update(view[:n])
+    return h.intdigest(), reads, 1
+
+def _pooled(fd: int) -> tuple:
+    before = io_stats()
+    key, _ = hash_fd(fd, [(0, -1)]) # type: ignore
+    after = io_stats()
+    return key, after["reads"] - before["reads"], after["allocations"] - before["allocations"]
+
+def _run(path: str, fn, rounds: int) -> tuple:
+    best = None
+    for _ in range(rounds):
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            start = time.perf_counter()
+            key, reads, allocations = fn(fd)
+            took = time.perf_counter() - start
+        finally:
+            os.close(fd)
+        best = took if best is None else min(best, took)
+    # reads and allocations of the last round, the pool's first round allocates
+    return key, reads, allocations, best
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[16, 256, 4096, 51200])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    prime_buffers()
+    engines = (("read_text 4 KB", _read_text), ("readinto 1 MB", _fixed_readinto), ("pooled", _pooled))
+    print(f"{'size':>9}  {'reader':<15} {'reads':>7} {'reads/MB':>9} {'allocs':>7} {'MB/s':>9}")
+    for size_kb in args.sizes_kb:
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(os.urandom(size_kb * 1024))
+            path = tmp.name
+
+        try:
+            keys = set()
+            mb = size_kb / 1024
+            for name, fn in engines:
+                key, reads, allocations, took = _run(path, fn, args.rounds)
+                keys.add(key)
+                print(f"{size_kb:>7}KB  {name:<15} {reads:>7} {reads / mb:>9.1f} {allocations:>7} {mb / took:>9.0f}")
+            assert len(keys) == 1, f"key mismatch at {size_kb} KB"
+        finally:
+            os.unlink(path)
+
+    print(f"\npool totals: {io_stats()}")
+
+if __name__ == "__main__":
+    main()
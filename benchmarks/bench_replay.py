@@ -0,0 +1,119 @@
+# Replays an event trace through Monitor and reports throughput per stage.
+# Without --trace a burst workload is synthesised: a scratch tree of small
+# files plus a trace that creates, rewrites and renames them in bursts.
+# Keep the trace with --save-trace to compare builds on the same workload.
+#
+#   python -m benchmarks.bench_replay [--files N] [--speed X] [--save-trace FILE]
+#   python -m benchmarks.bench_replay --trace FILE --root DIR [--speed X]
+#
+# speed 0 replays as fast as the pipeline goes, 1 keeps the recorded timing.
+# traces are recorded from a live session with event_trace_dir in common.cfg.
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyile.lib.runtime.internal.constants import (
+    FILE_ACTION_ADDED, FILE_ACTION_MODIFIED, FILE_RENAMED_FROM, FILE_RENAMED_TO
+)
+from pyile.lib.runtime.monitors.trace import TraceRecorder
+from pyile.lib.runtime.monitors.replay import ReplayEventSource, replay_trace
+from pyile.lib.runtime.monitors.file_monitor import Monitor
+from pyile.lib.runtime.internal.executor_pool import ExecutorPool
+
+def _synthesise(root: str, trace_path: str, files: int, burst: int, gap: float) -> None:
+    names = []
+    for i in range(files):
+        rel = os.path.join(f"dir_{i % 16:02d}", f"file_{i:06d}.txt")
+        full = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as fh:
+            # every 10th file shares content with another one
+            fh.write(f"payload {i % (files - files // 10 or 1)}\n" * 64)
+        names.append(rel)
+
+    recorder = TraceRecorder(trace_path, root)
+    t = 0.0
+    for start in range(0, files, burst):
+        batch = []
+        for rel in names[start:start + burst]:
+            # save by rename then a couple of writes, what most editors do
+            batch.append((FILE_ACTION_ADDED, rel + ".tmp"))
+            batch.append((FILE_ACTION_MODIFIED, rel + ".tmp"))
+            batch.append((FILE_RENAMED_FROM, rel + ".tmp"))
+            batch.append((FILE_RENAMED_TO, rel))
+            batch.append((FILE_ACTION_MODIFIED, rel))
+            batch.append((FILE_ACTION_MODIFIED, rel))
+        recorder.record(batch, recorder.started + t)
+        t += gap
+    recorder.close()
+
+def _print_report(report: dict) -> None:
+    print(f"trace: {report['trace']}")
+    print(
+        f"batches: {report['batches']}  raw events: {report['raw_events']}  "
+        f"net events: {report['net_events']}  dropped: {report['dropped']}"
+    )
+    print(
+        f"speed: {report['speed'] or 'max'}  recorded span: {report['trace_secs']:.3f}s  "
+        f"wall: {report['wall_secs']:.3f}s  (queue drained {report['pipeline_secs']:.3f}s, "
+        f"hashing +{report['hash_drain_secs']:.3f}s)"
+    )
+    print(
+        f"latency p99: {report['latency_p99_ms']:.2f}ms  queue wait p99: {report['queue_wait_p99_ms']:.2f}ms  "
+        f"replay lag max: {report['max_lag_ms']:.2f}ms"
+    )
+    print(f"{'stage':<12}{'secs':>10}{'events/s':>16}")
+    for name, stage in report["stages"].items():
+        print(f"{name:<12}{stage['secs']:>10.3f}{stage['per_sec']:>16,.0f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trace", help="trace to replay, synthesised when omitted")
+    parser.add_argument("--root", help="tree the trace is replayed against")
+    parser.add_argument("--speed", type=float, default=0.0)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--burst", type=int, default=64, help="files per synthetic batch")
+    parser.add_argument("--gap", type=float, default=0.005, help="seconds between synthetic batches")
+    parser.add_argument("--save-trace", help="keep the synthesised trace at this path")
+    args = parser.parse_args()
+
+    scratch = None
+    if args.trace:
+        if not args.root:
+            parser.error("--trace needs --root")
+        trace_path, root = args.trace, args.root
+    else:
+        scratch = tempfile.mkdtemp(prefix="pyile_replay_")
+        root = os.path.join(scratch, "root")
+        trace_path = args.save_trace or os.path.join(scratch, "synthetic.pytrace")
+        _synthesise(root, trace_path, args.files, args.burst, args.gap)
+
+    ExecutorPool.get().restart()
+    console = []
+    source = ReplayEventSource(root, trace_path, speed=args.speed)
+    monitor = Monitor(
+        root,
+        excluded_cache=[],
+        check_current_files=False,
+        notification_enabled=False,
+        exclude_system_extensions=False,
+        exclude_temp_extensions=False,
+        log_console=console.append,
+        source=source,
+    )
+
+    try:
+        _print_report(replay_trace(monitor, source))
+    finally:
+        monitor.stop()
+        ExecutorPool.get().shutdown()
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Initial scan walk: a single threaded os.walk with a stat and a pathlib
+# exclusion check per file (what a recursive version of the old spider
+# would do) against TreeScanner with a few walker counts. Only discovery
+# is timed, nothing is hashed. --cold drops the dentry and inode caches
+# between runs where /proc/sys/vm/drop_caches is writable.
+#
+#   python -m benchmarks.bench_scan [--files N] [--per-dir N] [--walkers 1 4 8] [--cold]
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyile.lib.runtime.monitors.scanner import TreeScanner
+from pyile.lib.runtime.rules.engine import RuleEngine, Rule, RULE_EXCLUDE, KIND_DIR
+
+def _build_tree(root: str, files: int, per_dir: int) -> None:
+    for i in range(files):
+        d = i // per_dir
+        path = os.path.join(root, f"l{d % 10}", f"m{d // 10 % 10}", f"d{d:05d}", f"f{i:07d}.dat")
+        if i % per_dir == 0:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(b"x")
+    os.makedirs(os.path.join(root, "excluded", "deep"), exist_ok=True)
+
+def _drop_caches() -> None:
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as fh:
+            fh.write("2")
+    except OSError:
+        pass
+
+def _is_excluded(path: str, excluded: list) -> bool:
+    parts = Path(path.lower()).parts
+    for ex in excluded:
+        for i in range(len(parts) - len(ex) + 1):
+            if parts[i:i + len(ex)] == ex:
+                return True
+    return False
+
+def _walk(root: str, excluded: list) -> int:
+    count = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not _is_excluded(os.path.join(dirpath, d), excluded)]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if _is_excluded(path, excluded) or not os.path.isfile(path):
+                continue
+            os.stat(path)
+            count += 1
+    return count
+
+def _scan(root: str, excluded: list, walkers: int) -> int:
+    rules = RuleEngine(Rule(RULE_EXCLUDE, KIND_DIR, (parts,), "") for parts in excluded)
+
+    def on_file(entry: os.DirEntry, ctx) -> bool:
+        if not rules.accepts_entry(ctx, entry.name, entry.path):
+            return False
+        entry.stat(follow_symlinks=False)
+        return True
+
+    scanner = TreeScanner(
+        root, descend=rules.descend, root_context=rules.root_context(root), walkers=walkers
+    )
+    return scanner.scan(on_file).files
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--per-dir", type=int, default=100)
+    parser.add_argument("--walkers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--cold", action="store_true")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="pyile_scan_")
+    try:
+        _build_tree(scratch, args.files, args.per_dir)
+        excluded = [Path(os.path.join(scratch, "excluded").lower()).parts]
+
+        runs = [("os.walk", lambda: _walk(scratch, excluded))]
+        for w in args.walkers:
+            runs.append((f"scanner x{w}", lambda w=w: _scan(scratch, excluded, w)))
+
+        print(f"{'walk':>12} {'files':>9} {'seconds':>9} {'files/s':>11}")
+        for name, fn in runs:
+            if args.cold:
+                _drop_caches()
+            start = time.perf_counter()
+            count = fn()
+            elapsed = time.perf_counter() - start
+            assert count == args.files, f"{name} found {count} files"
+            print(f"{name:>12} {count:>9} {elapsed:>9.3f} {count / elapsed:>11,.0f}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Compares the old buffer-everything file hash with the streaming one.
+# Both produce the same xxh3_64 key, peak heap is measured with tracemalloc.
+#
+#   python -m benchmarks.bench_stream_hash [--sizes-mb 4 64] [--max-mb 50]
+
+import os
+import sys
+import argparse
+import tempfile
+import tracemalloc
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import xxhash # type: ignore
+from pyile.lib.runtime.hashing.streaming import hash_fd, sample_windows
+from pyile.lib.runtime.hashing.buffers import prime_buffers
+
+def _legacy_hash(fd: int, size: int, max_bytes: int, window: int, chunk: int) -> int:
+    # the hashing body of Monitor._process_file_hash before streaming
+    contents = bytearray()
+    if size <= max_bytes:
+        while True:
+            data = os.read(fd, chunk)
+            if not data:
+                break
+            contents.extend(data)
+    else:
+        positions = [0]
+        if size > 2 * window:
+            positions.append(size // 2)
+        if size > window:
+            positions.append(size - window)
+        for pos in positions:
+            os.lseek(fd, pos, os.SEEK_SET)
+            remaining = min(window, size - pos)
+            while remaining > 0:
+                data = os.read(fd, min(chunk, remaining))
+                if not data:
+                    break
+                contents.extend(data)
+                remaining -= len(data)
+    h = xxhash.xxh3_64()
+    h.update(contents)
+    return h.intdigest()
+
+def _measure(fn) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[4, 64])
+    parser.add_argument("--max-mb", type=int, default=50, help="max_hash_file_bytes, larger files are sampled")
+    parser.add_argument("--legacy-chunk", type=int, default=100, help="read size of the old loop (CHUNK_SIZE)")
+    args = parser.parse_args()
+
+    max_bytes = window = args.max_mb * 1024 * 1024
+    # allocate the thread's buffer up front, it is reused for every file after that
+    prime_buffers()
+
+    print(f"{'size':>8} {'legacy s':>10} {'legacy peak':>12} {'stream s':>10} {'stream peak':>12}")
+    for size_mb in args.sizes_mb:
+        size = size_mb * 1024 * 1024
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            block = os.urandom(1024 * 1024)
+            for _ in range(size_mb):
+                tmp.write(block)
+            path = tmp.name
+
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                old_key, old_s, old_peak = _measure(lambda: _legacy_hash(fd, size, max_bytes, window, args.legacy_chunk))
+                windows = sample_windows(size, max_bytes, window)
+                (new_key, _), new_s, new_peak = _measure(lambda: hash_fd(fd, windows))
+            finally:
+                os.close(fd)
+        finally:
+            os.unlink(path)
+
+        assert old_key == new_key, f"key mismatch at {size_mb} MB"
+        print(
+            f"{size_mb:>6}MB {old_s:>10.3f} {old_peak / 2**20:>10.1f}MB "
+            f"{new_s:>10.3f} {new_peak / 2**20:>10.2f}MB"
+        )
+
+if __name__ == "__main__":
+    main()
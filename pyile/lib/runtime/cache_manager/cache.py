@@ -2,11 +2,13 @@ from pyile.lib.utils.common import get_cache_path, ensure_file_dir_exists
 from pyile.lib.utils.logging import log_error, log_info
 from pyile.lib.utils.lazy import LazyInit
 from pyile.lib.runtime.cache_manager.slab_cache import AppCache
+from pyile.lib.runtime.cache_manager.catalog import FileCatalog
 
 import threading
 from typing import Any, Optional, Dict
 
 _SLAB_PATH = get_cache_path("pyile.cache.slab")
+_CATALOG_PATH = get_cache_path("pyile.cache.catalog")
 
 _main_lock = threading.RLock()  
 
@@ -22,6 +24,7 @@ class SlabCache(LazyInit):
             return
         
         self._slab = load_file_cache()
+        load_file_catalog()
         self._is_init = True
 
         try:
@@ -38,6 +41,7 @@ class SlabCache(LazyInit):
         if self._is_init and self._slab:
             try:
                 self._slab.flush()
+                FileCatalog.get(_CATALOG_PATH).flush()
                 return True
             except Exception as e:
                 log_error(f"Failed to save cache {e}")
@@ -53,6 +57,7 @@ class SlabCache(LazyInit):
                 self._slab.close()
             except Exception as e:
                 log_error(f"Error closing slab: {e}")
+            FileCatalog.get(_CATALOG_PATH).close()
             self._slab = None
             self._is_init = False
 
@@ -62,6 +67,16 @@ def load_file_cache() -> Optional[AppCache]:
     slab.open()
     return slab
 
+def load_file_catalog() -> FileCatalog:
+    # monitors open it themselves as well, they can start before the slab has loaded.
+    # a catalog that failed to open answers every lookup with a miss
+    catalog = FileCatalog.get(_CATALOG_PATH)
+    try:
+        catalog.open()
+    except Exception as e:
+        log_error(f"Failed to open file catalog: {e}")
+    return catalog
+
 def is_file_cached(file_key: int) -> bool:
     cache = SlabCache.get()
     if not cache._slab:
@@ -112,7 +127,10 @@ def get_cache_stats() -> Dict[str, Any]:
         except Exception:
             pass
     
-    return {"slab_entries": entries, "slab_path": _SLAB_PATH}
+    return {
+        "slab_entries": entries, "slab_path": _SLAB_PATH,
+        "catalog_entries": len(FileCatalog.get(_CATALOG_PATH)), "catalog_path": _CATALOG_PATH
+    }
 
 def validate_cache() -> Dict[str, Any]:
     cache = SlabCache.get()
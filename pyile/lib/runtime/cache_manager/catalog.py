@@ -0,0 +1,448 @@
+from pyile.lib.runtime.internal.constants import CATALOG_INITIAL_SLOTS, CATALOG_MAX_LOAD
+from pyile.lib.utils.common import open_file_rw, create_memory_mapped_file, truncate_file, close_fd, ensure_file_dir_exists
+from pyile.lib.utils.logging import log_error, log_info
+from pyile.lib.utils.lazy import LazyInit
+
+import os
+import mmap
+import struct
+import threading
+import xxhash # type: ignore
+from typing import Optional, Tuple, List, Dict, Any
+
+# (size, mtime_ns, file_id, content_key)
+CatalogRecord = Tuple[int, int, int, int]
+
+CATALOG_MAGIC = b"PYCT"
+NAMES_MAGIC = b"PYCN"
+CATALOG_VERSION = 1
+
+# magic, version, capacity, live records, tombstones, generation, end of the names file
+_HEADER = struct.Struct("<4sHxxIIIQQ")
+_HEADER_SIZE = 64
+# path hash, size, mtime_ns, file_id, content key, offset of the path in the names file
+_SLOT = struct.Struct("<QQqQQQ")
+_NAMES_HEADER = struct.Struct("<4sxxxxQ")
+_NAME_LEN = struct.Struct("<I")
+
+_EMPTY = 0
+_TOMBSTONE = 1
+
+_BINARY = getattr(os, "O_BINARY", 0)
+
+def _path_hash(path: str) -> int:
+    h = xxhash.xxh3_64_intdigest(path.encode("utf-8", "surrogateescape"))
+    # 0 and 1 mark free slots
+    return h if h > _TOMBSTONE else h + 2
+
+def stat_matches(rec: CatalogRecord, st: os.stat_result) -> bool:
+    size, mtime_ns, file_id, _ = rec
+    if size != st.st_size or mtime_ns != st.st_mtime_ns:
+        return False
+    # DirEntry.stat() on Windows reports no file id, only compare when both sides have one
+    return not file_id or not st.st_ino or file_id == st.st_ino
+
+
+class FileCatalog(LazyInit):
+    # what pyile last knew about every file it hashed, kept across sessions so
+    # a restart only has to stat unchanged files. records live in an open
+    # addressing table inside a memory mapped file, keyed by the xxh3_64 of the
+    # normalized path, the paths themselves are appended to a side file and
+    # only read back when a rescan needs to enumerate a subtree. the table is
+    # rebuilt into fresh files when it gets too full, both files carry the
+    # same generation so a crash in between is detected and the catalog starts
+    # empty, it only ever saves work.
+    __slots__ = (
+        "_path", "_names_path", "_lock", "_fd", "_m", "_names_fd", "_capacity",
+        "_count", "_tombstones", "_generation", "_names_end", "_closed",
+        "hits", "misses"
+    )
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._names_path = path + ".names"
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._m: Optional[mmap.mmap] = None
+        self._names_fd: Optional[int] = None
+        self._capacity = 0
+        self._count = 0
+        self._tombstones = 0
+        self._generation = 0
+        self._names_end = _NAMES_HEADER.size
+        self._closed = True
+        self.hits = 0
+        self.misses = 0
+
+    def open(self) -> None:
+        with self._lock:
+            if not self._closed:
+                return
+
+            ensure_file_dir_exists(self._path)
+            if not self._open_existing():
+                self._adopt(*self._create(self._path, self._names_path, CATALOG_INITIAL_SLOTS))
+
+            self._closed = False
+            log_info(f"File catalog opened with {self._count} records: {self._path}")
+
+    def _open_existing(self) -> bool:
+        fd = open_file_rw(self._path, extra_flags=_BINARY)
+        if fd is None:
+            return False
+
+        names_fd = m = None
+        try:
+            size = os.fstat(fd).st_size
+            if size < _HEADER_SIZE:
+                return False
+
+            m = create_memory_mapped_file(fd, size)
+            if m is None:
+                return False
+
+            magic, version, capacity, count, tombstones, generation, names_end = _HEADER.unpack_from(m, 0)
+            if (
+                magic != CATALOG_MAGIC or version != CATALOG_VERSION or not capacity
+                or capacity & (capacity - 1) or size != _HEADER_SIZE + capacity * _SLOT.size
+            ):
+                log_error(f"File catalog is not valid, starting a new one: {self._path}")
+                return False
+
+            names_fd = open_file_rw(self._names_path, extra_flags=_BINARY)
+            if names_fd is None:
+                return False
+            head = os.read(names_fd, _NAMES_HEADER.size)
+            names_size = os.fstat(names_fd).st_size
+            if (
+                len(head) != _NAMES_HEADER.size
+                or _NAMES_HEADER.unpack(head) != (NAMES_MAGIC, generation)
+                or names_size < names_end
+            ):
+                log_error(f"File catalog names do not match, starting a new one: {self._path}")
+                return False
+            if names_size > names_end:
+                # paths appended after the last header update belong to nothing
+                truncate_file(names_fd, names_end)
+
+            self._adopt(fd, m, names_fd)
+            fd = names_fd = m = None
+            return True
+
+        except (OSError, struct.error, ValueError) as e:
+            log_error(f"Failed to read file catalog {self._path}: {e}")
+            return False
+        finally:
+            if m is not None:
+                m.close()
+            if names_fd is not None:
+                close_fd(names_fd)
+            if fd is not None:
+                close_fd(fd)
+
+    def _create(self, path: str, names_path: str, capacity: int) -> Tuple[int, mmap.mmap, int]:
+        gen = int.from_bytes(os.urandom(8), "little")
+        fd = open_file_rw(path, extra_flags=_BINARY)
+        names_fd = open_file_rw(names_path, extra_flags=_BINARY)
+        if fd is None or names_fd is None:
+            for f in (fd, names_fd):
+                if f is not None:
+                    close_fd(f)
+            raise RuntimeError(f"Failed to create file catalog: {path}")
+
+        size = _HEADER_SIZE + capacity * _SLOT.size
+        if not truncate_file(fd, 0) or not truncate_file(fd, size) or not truncate_file(names_fd, 0):
+            close_fd(fd)
+            close_fd(names_fd)
+            raise RuntimeError(f"Failed to size file catalog: {path}")
+
+        os.write(names_fd, _NAMES_HEADER.pack(NAMES_MAGIC, gen))
+        m = create_memory_mapped_file(fd, size)
+        if m is None:
+            close_fd(fd)
+            close_fd(names_fd)
+            raise RuntimeError(f"Failed to map file catalog: {path}")
+
+        _HEADER.pack_into(m, 0, CATALOG_MAGIC, CATALOG_VERSION, capacity, 0, 0, gen, _NAMES_HEADER.size)
+        return fd, m, names_fd
+
+    def _adopt(self, fd: int, m: mmap.mmap, names_fd: int) -> None:
+        _, _, capacity, count, tombstones, generation, names_end = _HEADER.unpack_from(m, 0)
+        self._fd, self._m, self._names_fd = fd, m, names_fd
+        self._capacity = capacity
+        self._count = count
+        self._tombstones = tombstones
+        self._generation = generation
+        self._names_end = names_end
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(
+            self._m, 0, CATALOG_MAGIC, CATALOG_VERSION, self._capacity, self._count,
+            self._tombstones, self._generation, self._names_end
+        )
+
+    def _find(self, h: int) -> Tuple[int, int]:
+        # (slot of h or -1, first free slot on its probe chain)
+        mask = self._capacity - 1
+        i = h & mask
+        free = -1
+        while True:
+            off = _HEADER_SIZE + i * _SLOT.size
+            slot_hash = struct.unpack_from("<Q", self._m, off)[0] # type: ignore
+            if slot_hash == _EMPTY:
+                return -1, (i if free < 0 else free)
+            if slot_hash == _TOMBSTONE:
+                if free < 0:
+                    free = i
+            elif slot_hash == h:
+                return i, free
+            i = (i + 1) & mask
+
+    def _append_name(self, path: str) -> int:
+        data = path.encode("utf-8", "surrogateescape")
+        offset = self._names_end
+        os.lseek(self._names_fd, offset, os.SEEK_SET) # type: ignore
+        os.write(self._names_fd, _NAME_LEN.pack(len(data)) + data) # type: ignore
+        self._names_end = offset + _NAME_LEN.size + len(data)
+        return offset
+
+    def lookup(self, path: str) -> Optional[CatalogRecord]:
+        with self._lock:
+            if self._closed:
+                return None
+            i, _ = self._find(_path_hash(path))
+            if i < 0:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return _SLOT.unpack_from(self._m, _HEADER_SIZE + i * _SLOT.size)[1:5] # type: ignore
+
+    def lookup_unchanged(self, path: str, st: os.stat_result) -> Optional[CatalogRecord]:
+        rec = self.lookup(path)
+        if rec is None or not stat_matches(rec, st):
+            return None
+        return rec
+
+    def record(self, path: str, st: os.stat_result, content_key: int = 0) -> None:
+        # a zero key keeps the known one while size and mtime still match
+        h = _path_hash(path)
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                i, free = self._find(h)
+                if i >= 0:
+                    off = _HEADER_SIZE + i * _SLOT.size
+                    _, size, mtime_ns, file_id, key, name_off = _SLOT.unpack_from(self._m, off) # type: ignore
+                    if not content_key and stat_matches((size, mtime_ns, file_id, key), st):
+                        content_key = key
+                    _SLOT.pack_into(
+                        self._m, off, h, st.st_size, st.st_mtime_ns, st.st_ino or file_id, content_key, name_off
+                    )
+                    return
+
+                if (self._count + self._tombstones + 1) > self._capacity * CATALOG_MAX_LOAD:
+                    self._rebuild()
+                    _, free = self._find(h)
+
+                off = _HEADER_SIZE + free * _SLOT.size
+                if struct.unpack_from("<Q", self._m, off)[0] == _TOMBSTONE: # type: ignore
+                    self._tombstones -= 1
+                name_off = self._append_name(path)
+                _SLOT.pack_into(self._m, off, h, st.st_size, st.st_mtime_ns, st.st_ino, content_key, name_off)
+                self._count += 1
+                self._write_header()
+            except (OSError, RuntimeError, ValueError) as e:
+                log_error(f"Failed to update file catalog for {path}: {e}")
+
+    def set_content_key(self, path: str, content_key: int) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            i, _ = self._find(_path_hash(path))
+            if i < 0:
+                return
+            # content key is the fifth field of the slot
+            struct.pack_into("<Q", self._m, _HEADER_SIZE + i * _SLOT.size + 32, content_key) # type: ignore
+
+    def discard(self, path: str) -> bool:
+        with self._lock:
+            if self._closed:
+                return False
+            i, _ = self._find(_path_hash(path))
+            if i < 0:
+                return False
+            struct.pack_into("<Q", self._m, _HEADER_SIZE + i * _SLOT.size, _TOMBSTONE) # type: ignore
+            self._count -= 1
+            self._tombstones += 1
+            self._write_header()
+            return True
+
+    def move(self, old_path: str, new_path: str) -> bool:
+        # a rename keeps size, mtime, file id and content key, only the path
+        # hash and name change. a record already at new_path is replaced
+        old_h, new_h = _path_hash(old_path), _path_hash(new_path)
+        if old_h == new_h:
+            return False
+        with self._lock:
+            if self._closed:
+                return False
+            try:
+                i, _ = self._find(old_h)
+                if i < 0:
+                    return False
+                off = _HEADER_SIZE + i * _SLOT.size
+                fields = _SLOT.unpack_from(self._m, off)[1:5] # type: ignore
+                struct.pack_into("<Q", self._m, off, _TOMBSTONE) # type: ignore
+                self._count -= 1
+                self._tombstones += 1
+
+                j, free = self._find(new_h)
+                if j >= 0:
+                    off = _HEADER_SIZE + j * _SLOT.size
+                    name_off = _SLOT.unpack_from(self._m, off)[5] # type: ignore
+                    _SLOT.pack_into(self._m, off, new_h, *fields, name_off)
+                    self._write_header()
+                    return True
+
+                if (self._count + self._tombstones + 1) > self._capacity * CATALOG_MAX_LOAD:
+                    self._rebuild()
+                    _, free = self._find(new_h)
+
+                off = _HEADER_SIZE + free * _SLOT.size
+                if struct.unpack_from("<Q", self._m, off)[0] == _TOMBSTONE: # type: ignore
+                    self._tombstones -= 1
+                _SLOT.pack_into(self._m, off, new_h, *fields, self._append_name(new_path))
+                self._count += 1
+                self._write_header()
+                return True
+            except (OSError, RuntimeError, ValueError) as e:
+                log_error(f"Failed to move file catalog record {old_path} to {new_path}: {e}")
+                return False
+
+    def _read_names(self) -> bytes:
+        # callers hold the lock
+        os.lseek(self._names_fd, 0, os.SEEK_SET) # type: ignore
+        chunks = []
+        remaining = self._names_end
+        while remaining > 0:
+            data = os.read(self._names_fd, min(remaining, 1 << 20)) # type: ignore
+            if not data:
+                break
+            chunks.append(data)
+            remaining -= len(data)
+        return b"".join(chunks)
+
+    def _live_records(self):
+        # (slot tuple, path bytes) for every record, callers hold the lock
+        names = self._read_names()
+        for i in range(self._capacity):
+            slot = _SLOT.unpack_from(self._m, _HEADER_SIZE + i * _SLOT.size) # type: ignore
+            if slot[0] <= _TOMBSTONE:
+                continue
+            name_off = slot[5]
+            (length,) = _NAME_LEN.unpack_from(names, name_off)
+            start = name_off + _NAME_LEN.size
+            yield slot, names[start:start + length]
+
+    def paths_under(self, prefix: str) -> List[str]:
+        with self._lock:
+            if self._closed:
+                return []
+            try:
+                raw = prefix.encode("utf-8", "surrogateescape")
+                return [
+                    name.decode("utf-8", "surrogateescape")
+                    for _, name in self._live_records() if name.startswith(raw)
+                ]
+            except (OSError, struct.error) as e:
+                log_error(f"Failed to list file catalog: {e}")
+                return []
+
+    def _rebuild(self) -> None:
+        # callers hold the lock. grows the table when it is really full,
+        # otherwise the same size without the tombstones
+        capacity = self._capacity
+        if (self._count + 1) > capacity * CATALOG_MAX_LOAD / 2:
+            capacity *= 2
+
+        tmp_path = self._path + ".tmp"
+        tmp_names = self._names_path + ".tmp"
+        fd, m, names_fd = self._create(tmp_path, tmp_names, capacity)
+
+        try:
+            chunks = []
+            names_end = _NAMES_HEADER.size
+            mask = capacity - 1
+            for slot, name in self._live_records():
+                i = slot[0] & mask
+                while struct.unpack_from("<Q", m, _HEADER_SIZE + i * _SLOT.size)[0] != _EMPTY:
+                    i = (i + 1) & mask
+                _SLOT.pack_into(m, _HEADER_SIZE + i * _SLOT.size, *slot[:5], names_end)
+                chunks.append(_NAME_LEN.pack(len(name)) + name)
+                names_end += _NAME_LEN.size + len(name)
+
+            os.lseek(names_fd, _NAMES_HEADER.size, os.SEEK_SET)
+            os.write(names_fd, b"".join(chunks))
+            gen = _HEADER.unpack_from(m, 0)[5]
+            _HEADER.pack_into(m, 0, CATALOG_MAGIC, CATALOG_VERSION, capacity, self._count, 0, gen, names_end)
+            m.flush()
+        except Exception:
+            m.close()
+            close_fd(fd)
+            close_fd(names_fd)
+            raise
+
+        # mapped files can not be replaced on Windows, let go of the old ones first
+        self._release()
+        os.replace(tmp_names, self._names_path)
+        os.replace(tmp_path, self._path)
+
+        self._adopt(fd, m, names_fd)
+        log_info(f"File catalog rebuilt with {capacity} slots for {self._count} records")
+
+    def _release(self) -> None:
+        try:
+            if self._m is not None:
+                self._m.close()
+        except Exception:
+            pass
+        for fd in (self._fd, self._names_fd):
+            if fd is not None:
+                close_fd(fd)
+        self._fd = self._m = self._names_fd = None
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self._m.flush() # type: ignore
+            except Exception as e:
+                log_error(f"Failed to flush file catalog {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self._m.flush() # type: ignore
+            except Exception:
+                pass
+            self._release()
+            self._closed = True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "records": self._count,
+                "capacity": self._capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "table_bytes": _HEADER_SIZE + self._capacity * _SLOT.size,
+                "names_bytes": self._names_end,
+            }
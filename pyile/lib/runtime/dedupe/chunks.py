@@ -0,0 +1,178 @@
+from pyile.lib.runtime.hashing.chunking import content_root
+from pyile.lib.runtime.internal.constants import CDC_INDEX_SAMPLE, CDC_REPORT_SHARE
+from pyile.lib.utils.lazy import LazyInit
+
+import os
+import sys
+import threading
+from array import array
+from collections import defaultdict
+from typing import Optional, List, Dict, Tuple, Set, Union, Any
+
+class ChunkLayout:
+    # chunk lengths and fingerprints of one file as it was when it was chunked
+    __slots__ = ("lens", "fps", "size", "mtime_ns", "file_id", "root", "changes")
+
+    def __init__(self, lens: array, fps: array, st: os.stat_result, changes: int = 0) -> None:
+        self.lens = lens
+        self.fps = fps
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        self.file_id = st.st_ino
+        self.root = content_root(fps)
+        # rechunks since the last full read
+        self.changes = changes
+
+    def same_file(self, st: os.stat_result) -> bool:
+        # fstat on Windows may report no file id, only compare when both sides have one
+        return not self.file_id or not st.st_ino or self.file_id == st.st_ino
+
+    def matches(self, st: os.stat_result) -> bool:
+        return self.size == st.st_size and self.mtime_ns == st.st_mtime_ns and self.same_file(st)
+
+
+class ChunkIndex(LazyInit):
+    # chunk layouts by path id (see PathIds), and which files hold a chunk,
+    # for 1 in CDC_INDEX_SAMPLE fingerprints. sampling on the fingerprint
+    # picks the same chunks in every file, so the share of sampled bytes two
+    # files have in common estimates how much of their content they share.
+    # like the duplicate index a chunk held by one file is just its path id.
+    __slots__ = (
+        "_lock", "_files", "_owners", "_sample_mask",
+        "full_reads", "rechunks", "bytes_read", "bytes_skipped"
+    )
+
+    def __init__(self, sample: int = CDC_INDEX_SAMPLE) -> None:
+        if sample <= 0 or sample & (sample - 1):
+            raise ValueError("sample must be a power of two")
+        self._lock = threading.Lock()
+        self._files: Dict[int, ChunkLayout] = {}
+        self._owners: Dict[int, Union[int, Set[int]]] = {}
+        self._sample_mask = sample - 1
+
+        self.full_reads = 0
+        self.rechunks = 0
+        self.bytes_read = 0
+        self.bytes_skipped = 0
+
+    def _sampled(self, layout: ChunkLayout) -> Dict[int, int]:
+        # fingerprint -> length of the sampled chunks, repeats counted once
+        mask = self._sample_mask
+        return {fp: length for fp, length in zip(layout.fps, layout.lens) if not fp & mask}
+
+    def layout(self, path_id: int) -> Optional[ChunkLayout]:
+        return self._files.get(path_id)
+
+    def put(self, path_id: int, layout: ChunkLayout, read: int, rechunked: bool = False) -> List[Tuple[int, float]]:
+        # stores the layout of path_id, returns the other files that share at
+        # least CDC_REPORT_SHARE of its content and are not exact copies, as
+        # (path id, share), largest share first
+        sampled = self._sampled(layout)
+        with self._lock:
+            if rechunked:
+                self.rechunks += 1
+                self.bytes_skipped += max(0, layout.size - read)
+            else:
+                self.full_reads += 1
+            self.bytes_read += read
+
+            old = self._files.get(path_id)
+            if old is not None:
+                self._release_locked(path_id, old)
+            self._files[path_id] = layout
+
+            shared: Dict[int, int] = defaultdict(int)
+            total = 0
+            for fp, length in sampled.items():
+                total += length
+                owner = self._owners.get(fp)
+                if owner is None:
+                    self._owners[fp] = path_id
+                    continue
+                if isinstance(owner, int):
+                    shared[owner] += length
+                    self._owners[fp] = {owner, path_id}
+                else:
+                    for other in owner:
+                        shared[other] += length
+                    owner.add(path_id)
+
+            if not total:
+                return []
+            overlap = []
+            for other, size in shared.items():
+                share = size / total
+                peer = self._files.get(other)
+                if share >= CDC_REPORT_SHARE and peer is not None and peer.root != layout.root:
+                    overlap.append((other, share))
+        overlap.sort(key=lambda o: -o[1])
+        return overlap
+
+    def _release_locked(self, path_id: int, layout: ChunkLayout) -> None:
+        for fp in self._sampled(layout):
+            owner = self._owners.get(fp)
+            if owner is None:
+                continue
+            if isinstance(owner, int):
+                if owner == path_id:
+                    del self._owners[fp]
+                continue
+            owner.discard(path_id)
+            if len(owner) == 1:
+                self._owners[fp] = next(iter(owner))
+
+    def remove(self, path_id: int) -> bool:
+        with self._lock:
+            layout = self._files.pop(path_id, None)
+            if layout is None:
+                return False
+            self._release_locked(path_id, layout)
+            return True
+
+    def move(self, old_id: int, new_id: int) -> bool:
+        # a renamed file keeps its layout, its chunks change owner
+        if old_id == new_id:
+            return False
+        with self._lock:
+            layout = self._files.pop(old_id, None)
+            if layout is None:
+                return False
+            replaced = self._files.pop(new_id, None)
+            if replaced is not None:
+                self._release_locked(new_id, replaced)
+            self._release_locked(old_id, layout)
+
+            self._files[new_id] = layout
+            for fp in self._sampled(layout):
+                owner = self._owners.get(fp)
+                if owner is None:
+                    self._owners[fp] = new_id
+                elif isinstance(owner, int):
+                    if owner != new_id:
+                        self._owners[fp] = {owner, new_id}
+                else:
+                    owner.add(new_id)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            chunks = sum(len(layout.fps) for layout in self._files.values())
+            size = sum(
+                sys.getsizeof(layout.lens) + sys.getsizeof(layout.fps)
+                for layout in self._files.values()
+            )
+            shared = sum(1 for owner in self._owners.values() if not isinstance(owner, int))
+            return {
+                "files": len(self._files),
+                "chunks": chunks,
+                "indexed_chunks": len(self._owners),
+                "shared_chunks": shared,
+                "layout_bytes": size,
+                "full_reads": self.full_reads,
+                "rechunks": self.rechunks,
+                "bytes_read": self.bytes_read,
+                "bytes_skipped": self.bytes_skipped,
+            }
@@ -0,0 +1,310 @@
+from pyile.lib.runtime.internal.constants import GROUP_STRIPES, GROUP_INITIAL_SLOTS, GROUP_MAX_LOAD
+from pyile.lib.utils.lazy import LazyInit
+
+import sys
+import threading
+from array import array
+from typing import Optional, List, Dict, Any
+
+_NO_KEY = 0
+# a slot value with this bit set points into the stripe's list of groups,
+# otherwise it is the path id of the only member
+_MULTI = 1 << 31
+
+class _Stripe:
+    # linear probing table of content keys over two flat arrays, 12 bytes a
+    # slot. deletes shift the rest of the cluster back so there are no
+    # tombstones. version is odd while a writer is inside.
+    __slots__ = ("lock", "keys", "vals", "mask", "count", "entries", "groups", "free", "version")
+
+    def __init__(self, slots: int) -> None:
+        self.lock = threading.Lock()
+        self.keys = array("Q", bytes(8 * slots))
+        self.vals = array("I", bytes(4 * slots))
+        self.mask = slots - 1
+        self.count = 0
+        self.entries = 0
+        self.groups: List[Optional[array]] = []
+        self.free: List[int] = []
+        self.version = 0
+
+
+class DuplicateIndex(LazyInit):
+    # content key -> every path (as a PathIds id) holding that content. the
+    # key picks one of GROUP_STRIPES tables, each with its own lock. a group
+    # of one is just the path id in the table slot, it only becomes an
+    # array('I') of ids once a second member shows up. two arrays indexed by
+    # path id hold the key of every member and its position inside its
+    # group, so add, remove and move are O(1) swaps. readers take no lock,
+    # they probe and check that the stripe version did not move meanwhile.
+    # key 0 means "not indexed", the same as in the file catalog. writers
+    # hold the lock of the path id (striped the same way) around reading
+    # and swapping its key, then the lock of the stripe they change, so a
+    # path added from two threads at once ends up in one group.
+    __slots__ = ("_stripes", "_mask", "_shift", "_keys", "_pos", "_grow_lock", "_path_locks")
+
+    def __init__(self, stripes: int = GROUP_STRIPES, slots: int = GROUP_INITIAL_SLOTS) -> None:
+        if stripes <= 0 or stripes & (stripes - 1) or slots <= 0 or slots & (slots - 1):
+            raise ValueError("stripes and slots must be powers of two")
+        self._stripes = [_Stripe(slots) for _ in range(stripes)]
+        self._mask = stripes - 1
+        # the low bits picked the stripe, the slot comes from the ones above
+        self._shift = stripes.bit_length() - 1
+        self._keys = array("Q")
+        self._pos = array("I")
+        self._grow_lock = threading.Lock()
+        self._path_locks = [threading.Lock() for _ in range(stripes)]
+
+    def _ensure(self, path_id: int) -> None:
+        if path_id < len(self._keys):
+            return
+        with self._grow_lock:
+            size = len(self._keys)
+            if path_id < size:
+                return
+            grow = max(path_id + 1 - size, size, 1024)
+            self._keys.frombytes(bytes(self._keys.itemsize * grow))
+            self._pos.frombytes(bytes(self._pos.itemsize * grow))
+
+    def _find(self, stripe: _Stripe, key: int) -> int:
+        keys = stripe.keys
+        mask = stripe.mask
+        i = (key >> self._shift) & mask
+        while True:
+            k = keys[i]
+            if k == key:
+                return i
+            if k == _NO_KEY:
+                return -1
+            i = (i + 1) & mask
+
+    def _insert(self, stripe: _Stripe, key: int, val: int) -> None:
+        if (stripe.count + 1) > (stripe.mask + 1) * GROUP_MAX_LOAD:
+            self._resize(stripe)
+        keys = stripe.keys
+        mask = stripe.mask
+        i = (key >> self._shift) & mask
+        while keys[i] != _NO_KEY:
+            i = (i + 1) & mask
+        keys[i] = key
+        stripe.vals[i] = val
+        stripe.count += 1
+
+    def _resize(self, stripe: _Stripe) -> None:
+        old_keys, old_vals = stripe.keys, stripe.vals
+        slots = (stripe.mask + 1) * 2
+        keys = array("Q", bytes(8 * slots))
+        vals = array("I", bytes(4 * slots))
+        mask = slots - 1
+        for j, key in enumerate(old_keys):
+            if key == _NO_KEY:
+                continue
+            i = (key >> self._shift) & mask
+            while keys[i] != _NO_KEY:
+                i = (i + 1) & mask
+            keys[i] = key
+            vals[i] = old_vals[j]
+        # readers holding the old arrays see a consistent table and retry
+        stripe.keys, stripe.vals, stripe.mask = keys, vals, mask
+
+    def _delete(self, stripe: _Stripe, i: int) -> None:
+        keys, vals, mask = stripe.keys, stripe.vals, stripe.mask
+        j = i
+        while True:
+            j = (j + 1) & mask
+            key = keys[j]
+            if key == _NO_KEY:
+                break
+            home = (key >> self._shift) & mask
+            # an entry may move back into the hole unless its home slot lies
+            # cyclically in (i, j]
+            if (i < j and (home <= i or home > j)) or (i > j and home <= i and home > j):
+                keys[i] = key
+                vals[i] = vals[j]
+                i = j
+        keys[i] = _NO_KEY
+        vals[i] = 0
+        stripe.count -= 1
+
+    def key_of(self, path_id: int) -> int:
+        return self._keys[path_id] if path_id < len(self._keys) else _NO_KEY
+
+    def add(self, path_id: int, key: int) -> Optional[int]:
+        # places path_id in the group of key, moving it out of its old group.
+        # returns the first other member when the group already had one
+        if key == _NO_KEY:
+            return None
+        self._ensure(path_id)
+        with self._path_locks[path_id & self._mask]:
+            old = self._keys[path_id]
+            if old == key:
+                return None
+            if old != _NO_KEY:
+                self._remove_locked(path_id)
+            return self._insert_locked(path_id, key)
+
+    def _insert_locked(self, path_id: int, key: int) -> Optional[int]:
+        stripe = self._stripes[key & self._mask]
+        with stripe.lock:
+            stripe.version += 1
+            first = None
+            i = self._find(stripe, key)
+            if i < 0:
+                self._insert(stripe, key, path_id)
+                pos = 0
+            else:
+                val = stripe.vals[i]
+                if val & _MULTI:
+                    group = stripe.groups[val & ~_MULTI]
+                    group.append(path_id) # type: ignore
+                    first, pos = group[0], len(group) - 1 # type: ignore
+                else:
+                    group = array("I", (val, path_id))
+                    if stripe.free:
+                        g = stripe.free.pop()
+                        stripe.groups[g] = group
+                    else:
+                        g = len(stripe.groups)
+                        stripe.groups.append(group)
+                    stripe.vals[i] = _MULTI | g
+                    first, pos = val, 1
+
+            self._keys[path_id] = key
+            self._pos[path_id] = pos
+            stripe.entries += 1
+            stripe.version += 1
+            return first
+
+    def remove(self, path_id: int) -> Optional[int]:
+        # returns the key path_id was indexed under
+        if path_id >= len(self._keys):
+            return None
+        with self._path_locks[path_id & self._mask]:
+            return self._remove_locked(path_id)
+
+    def _remove_locked(self, path_id: int) -> Optional[int]:
+        key = self._keys[path_id]
+        if key == _NO_KEY:
+            return None
+
+        stripe = self._stripes[key & self._mask]
+        with stripe.lock:
+            stripe.version += 1
+            i = self._find(stripe, key)
+            val = stripe.vals[i]
+            if not val & _MULTI:
+                self._delete(stripe, i)
+            else:
+                g = val & ~_MULTI
+                group = stripe.groups[g]
+                # swap the last member into the hole
+                pos = self._pos[path_id]
+                last = group.pop() # type: ignore
+                if last != path_id:
+                    group[pos] = last # type: ignore
+                    self._pos[last] = pos
+                if len(group) == 1: # type: ignore
+                    stripe.vals[i] = group[0] # type: ignore
+                    self._pos[group[0]] = 0 # type: ignore
+                    stripe.groups[g] = None
+                    stripe.free.append(g)
+
+            self._keys[path_id] = _NO_KEY
+            stripe.entries -= 1
+            stripe.version += 1
+            return key
+
+    def move(self, old_id: int, new_id: int) -> Optional[int]:
+        # a renamed path keeps its place and key, nothing is read again
+        if old_id == new_id or old_id >= len(self._keys):
+            return None
+        self._ensure(new_id)
+        # both path locks, always in the same order
+        locks = sorted({old_id & self._mask, new_id & self._mask})
+        for i in locks:
+            self._path_locks[i].acquire()
+        try:
+            return self._move_locked(old_id, new_id)
+        finally:
+            for i in reversed(locks):
+                self._path_locks[i].release()
+
+    def _move_locked(self, old_id: int, new_id: int) -> Optional[int]:
+        key = self._keys[old_id]
+        if key == _NO_KEY:
+            return None
+        if self._keys[new_id] != _NO_KEY:
+            # the rename replaced a file that was indexed itself
+            self._remove_locked(new_id)
+
+        stripe = self._stripes[key & self._mask]
+        with stripe.lock:
+            stripe.version += 1
+            i = self._find(stripe, key)
+            val = stripe.vals[i]
+            pos = self._pos[old_id]
+            if val & _MULTI:
+                stripe.groups[val & ~_MULTI][pos] = new_id # type: ignore
+            else:
+                stripe.vals[i] = new_id
+
+            self._keys[new_id] = key
+            self._pos[new_id] = pos
+            self._keys[old_id] = _NO_KEY
+            stripe.version += 1
+            return key
+
+    def members(self, key: int) -> List[int]:
+        if key == _NO_KEY:
+            return []
+        stripe = self._stripes[key & self._mask]
+        while True:
+            version = stripe.version
+            if version & 1:
+                # a writer is inside, its lock is the cheapest way to wait
+                with stripe.lock:
+                    pass
+                continue
+
+            try:
+                i = self._find(stripe, key)
+            except IndexError:
+                # arrays and mask of a resize read halfway through the swap
+                continue
+            if i < 0:
+                found: List[int] = []
+            else:
+                val = stripe.vals[i]
+                if val & _MULTI:
+                    group = stripe.groups[val & ~_MULTI]
+                    found = group.tolist() if group is not None else []
+                else:
+                    found = [val]
+
+            if stripe.version == version:
+                return found
+
+    def __len__(self) -> int:
+        return sum(stripe.entries for stripe in self._stripes)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = len(self)
+        groups = 0
+        duplicate_groups = 0
+        size = sys.getsizeof(self._keys) + sys.getsizeof(self._pos)
+        for stripe in self._stripes:
+            with stripe.lock:
+                groups += stripe.count
+                size += sys.getsizeof(stripe.keys) + sys.getsizeof(stripe.vals) + sys.getsizeof(stripe.groups)
+                for group in stripe.groups:
+                    if group is not None:
+                        duplicate_groups += 1
+                        size += sys.getsizeof(group)
+
+        return {
+            "entries": entries,
+            "groups": groups,
+            "duplicate_groups": duplicate_groups,
+            "bytes": size,
+            "bytes_per_entry": size / entries if entries else 0.0,
+        }
@@ -0,0 +1,207 @@
+from pyile.lib.runtime.hashing.streaming import hash_fd
+from pyile.lib.runtime.internal.thread_safe import AtomicCounter
+from pyile.lib.runtime.internal.constants import DEDUPE_HEAD_BYTES
+from pyile.lib.utils.common import open_file_ro, close_fd
+from pyile.lib.utils.logging import log_debug
+from pyile.lib.utils.lazy import LazyInit
+
+import os
+import threading
+from typing import Optional, List, Tuple, Dict, Callable, Any
+
+class _Entry:
+    __slots__ = ("path", "size", "mtime", "head", "full")
+
+    def __init__(self, path: str, size: int, mtime: float) -> None:
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.head: Optional[int] = None
+        self.full: Optional[int] = None
+
+
+class TieredDedupe(LazyInit):
+    # narrows duplicate candidates before anything expensive is read:
+    #   1. exact size, a file with a size nobody else has is never opened
+    #   2. xxh3_64 of the first DEDUPE_HEAD_BYTES, one small read per file
+    #   3. the full content key (full file or sampled windows, the same key
+    #      the slab cache has always stored) once two heads still collide
+    # head and full keys are remembered per (path, size, mtime) so every file
+    # is read at most once per tier. observe() returns the full keys it
+    # computed, candidates that were only hashed now because of a later file
+    # come back as well so they can be registered first.
+    __slots__ = (
+        "head_bytes", "_lock", "_by_path", "_by_size", "observed",
+        "unique_size", "unique_head", "head_reads", "full_hashes"
+    )
+
+    def __init__(self, head_bytes: int = DEDUPE_HEAD_BYTES) -> None:
+        self.head_bytes = head_bytes
+        self._lock = threading.Lock()
+        self._by_path: Dict[str, _Entry] = {}
+        self._by_size: Dict[int, Dict[str, _Entry]] = {}
+
+        self.observed = AtomicCounter(0)
+        self.unique_size = AtomicCounter(0)
+        self.unique_head = AtomicCounter(0)
+        self.head_reads = AtomicCounter(0)
+        self.full_hashes = AtomicCounter(0)
+
+    def observe(
+            self,
+            path: str,
+            size: int,
+            mtime: float,
+            full_key: Callable[[str], Optional[int]],
+            on_busy: Optional[Callable[[str], None]] = None,
+        ) -> List[Tuple[str, int]]:
+        # on_busy gets every path whose head could not be opened
+        self.observed += 1
+
+        with self._lock:
+            entry = self._by_path.get(path)
+            if entry is not None and entry.size == size and entry.mtime == mtime:
+                # already placed, nothing about it changed
+                return []
+            self._remove_locked(path)
+
+            entry = _Entry(path, size, mtime)
+            self._by_path[path] = entry
+            bucket = self._by_size.setdefault(size, {})
+            bucket[path] = entry
+            peers = [e for p, e in bucket.items() if p != path]
+
+        if not peers:
+            self.unique_size += 1
+            return []
+
+        if not self._ensure_head(entry, on_busy):
+            return []
+
+        matches = [e for e in peers if self._ensure_head(e, on_busy) and e.head == entry.head]
+        if not matches:
+            self.unique_head += 1
+            return []
+
+        results: List[Tuple[str, int]] = []
+        for e in matches + [entry]:
+            if e.full is not None:
+                continue
+
+            if e.size <= self.head_bytes:
+                # the head already covered the whole file
+                key = e.head
+            else:
+                key = full_key(e.path)
+                if key is None:
+                    continue
+                self.full_hashes += 1
+
+            with self._lock:
+                # another thread may have finished the same candidate first
+                if e.full is not None or self._by_path.get(e.path) is not e:
+                    continue
+                e.full = key
+            results.append((e.path, key))
+
+        return results
+
+    def placed(self, path: str, size: int, mtime: float) -> bool:
+        # True when observe() would find nothing new about the file
+        with self._lock:
+            entry = self._by_path.get(path)
+            return entry is not None and entry.size == size and entry.mtime == mtime
+
+    def seed(self, path: str, size: int, mtime: float, full_key: Optional[int] = None) -> None:
+        # places a file the catalog already knows without reading it, its
+        # head is only read if a later file of the same size shows up
+        with self._lock:
+            self._remove_locked(path)
+            entry = _Entry(path, size, mtime)
+            entry.full = full_key
+            if full_key is not None and size <= self.head_bytes:
+                entry.head = full_key
+            self._by_path[path] = entry
+            self._by_size.setdefault(size, {})[path] = entry
+
+    def _ensure_head(self, entry: _Entry, on_busy: Optional[Callable[[str], None]] = None) -> bool:
+        if entry.head is not None:
+            return True
+
+        try:
+            st = os.stat(entry.path)
+        except OSError:
+            self.discard(entry.path)
+            return False
+
+        if st.st_size != entry.size or st.st_mtime != entry.mtime:
+            # changed since it was placed, its own event will place it again
+            self.discard(entry.path)
+            return False
+
+        fd = open_file_ro(entry.path)
+        if fd is None:
+            log_debug(f"Head read failed for {entry.path}")
+            if on_busy is not None:
+                on_busy(entry.path)
+            return False
+
+        try:
+            result = hash_fd(fd, [(0, self.head_bytes)])
+        except OSError as e:
+            log_debug(f"Head read failed for {entry.path}: {e}")
+            return False
+        finally:
+            close_fd(fd)
+
+        self.head_reads += 1
+        entry.head = result[0]
+        return True
+
+    def _remove_locked(self, path: str) -> Optional[_Entry]:
+        entry = self._by_path.pop(path, None)
+        if entry is None:
+            return None
+
+        bucket = self._by_size.get(entry.size)
+        if bucket is not None:
+            bucket.pop(path, None)
+            if not bucket:
+                del self._by_size[entry.size]
+        return entry
+
+    def move(self, old_path: str, new_path: str) -> bool:
+        # a renamed file keeps the keys it already has, a copy takes its
+        # place so an observe() still holding the old entry drops its result
+        with self._lock:
+            old = self._remove_locked(old_path)
+            if old is None:
+                return False
+            self._remove_locked(new_path)
+            entry = _Entry(new_path, old.size, old.mtime)
+            entry.head = old.head
+            entry.full = old.full
+            self._by_path[new_path] = entry
+            self._by_size.setdefault(entry.size, {})[new_path] = entry
+            return True
+
+    def discard(self, path: str) -> bool:
+        with self._lock:
+            return self._remove_locked(path) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._by_path)
+
+    def stats(self) -> Dict[str, Any]:
+        observed = int(self.observed)
+        full = int(self.full_hashes)
+        return {
+            "tracked": len(self),
+            "observed": observed,
+            "unique_size": int(self.unique_size),
+            "unique_head": int(self.unique_head),
+            "head_reads": int(self.head_reads),
+            "full_hashes": full,
+            "full_reads_skipped": max(0, observed - full),
+        }
@@ -0,0 +1,145 @@
+from pyile.lib.runtime.hashing.streaming import digest_fd
+from pyile.lib.utils.common import open_file_seq, close_fd
+from pyile.lib.utils.logging import log_debug
+from pyile.lib.utils.lazy import LazyInit
+
+import os
+import threading
+from typing import Optional, Dict, Tuple, Callable, Any
+
+VERIFY_CONFIRMED = "confirmed"
+VERIFY_REJECTED = "rejected"
+VERIFY_SKIPPED = "skipped"
+
+class DuplicateVerifier(LazyInit):
+    # a duplicate is declared on a 64 bit key that, for large files, only
+    # covers sampled windows. verify() confirms a match on a full content
+    # blake2b of both files. digests are kept per path id with the size and
+    # mtime they were read at, so a file that matches many others is read
+    # once until it changes. a path whose match was rejected keeps the key
+    # it was rejected under until it changes, so it is not matched on it again.
+    __slots__ = (
+        "_lock", "_digests", "_rejected",
+        "confirmed", "rejected", "skipped", "cache_hits", "bytes_read"
+    )
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # path id -> (size, mtime_ns, digest)
+        self._digests: Dict[int, Tuple[int, int, bytes]] = {}
+        # path id -> the 64 bit key its match was rejected on
+        self._rejected: Dict[int, int] = {}
+
+        self.confirmed = 0
+        self.rejected = 0
+        self.skipped = 0
+        self.cache_hits = 0
+        self.bytes_read = 0
+
+    def _digest(self, path_id: int, path: str, should_continue: Optional[Callable[[], bool]]) -> Optional[bytes]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            cached = self._digests.get(path_id)
+            if cached is not None and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+                self.cache_hits += 1
+                return cached[2]
+
+        fd = open_file_seq(path)
+        if fd is None:
+            log_debug(f"Verify read failed for {path}")
+            return None
+
+        try:
+            result = digest_fd(fd, should_continue)
+            after = os.fstat(fd)
+        except OSError as e:
+            log_debug(f"Verify read failed for {path}: {e}")
+            return None
+        finally:
+            close_fd(fd)
+
+        if result is None:
+            return None
+        digest, read = result
+        with self._lock:
+            self.bytes_read += read
+            if after.st_size != st.st_size or after.st_mtime_ns != st.st_mtime_ns:
+                # written while it was read, its own event hashes it again
+                return None
+            self._digests[path_id] = (st.st_size, st.st_mtime_ns, digest)
+        return digest
+
+    def verify(
+            self,
+            path_id: int,
+            path: str,
+            other_id: int,
+            other_path: str,
+            should_continue: Optional[Callable[[], bool]] = None,
+        ) -> str:
+        # VERIFY_SKIPPED when either file is gone, locked or changing
+        digest = self._digest(path_id, path, should_continue)
+        other = self._digest(other_id, other_path, should_continue) if digest is not None else None
+        with self._lock:
+            if other is None:
+                self.skipped += 1
+                return VERIFY_SKIPPED
+            if digest == other:
+                self.confirmed += 1
+                return VERIFY_CONFIRMED
+            self.rejected += 1
+            return VERIFY_REJECTED
+
+    def reject(self, path_id: int, file_key: int) -> Optional[int]:
+        # records the rejection and returns a key from the full digest for
+        # the path to be grouped on instead, None when the digest is gone
+        with self._lock:
+            cached = self._digests.get(path_id)
+            if cached is None:
+                return None
+            self._rejected[path_id] = file_key
+            return int.from_bytes(cached[2][:8], "little")
+
+    def was_rejected(self, path_id: int, file_key: int) -> bool:
+        with self._lock:
+            return self._rejected.get(path_id) == file_key
+
+    def remove(self, path_id: int) -> bool:
+        with self._lock:
+            self._rejected.pop(path_id, None)
+            return self._digests.pop(path_id, None) is not None
+
+    def move(self, old_id: int, new_id: int) -> bool:
+        # a rename keeps size and mtime, so the digest still holds
+        if old_id == new_id:
+            return False
+        with self._lock:
+            rejected = self._rejected.pop(old_id, None)
+            self._rejected.pop(new_id, None)
+            if rejected is not None:
+                self._rejected[new_id] = rejected
+            cached = self._digests.pop(old_id, None)
+            self._digests.pop(new_id, None)
+            if cached is None:
+                return False
+            self._digests[new_id] = cached
+            return True
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cached": len(self._digests),
+                "split": len(self._rejected),
+                "confirmed": self.confirmed,
+                "rejected": self.rejected,
+                "skipped": self.skipped,
+                "cache_hits": self.cache_hits,
+                "bytes_read": self.bytes_read,
+            }
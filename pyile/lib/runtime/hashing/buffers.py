@@ -0,0 +1,122 @@
+from pyile.lib.runtime.internal.constants import (
+    HASH_READ_BUFFER, HASH_BLOCK_MIN, HASH_BLOCK_MAX, HASH_POOL_BYTES
+)
+
+import io
+import os
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Iterator, Any
+
+_HAS_READV = hasattr(os, "readv")
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+class _IoCounters:
+    # one per thread, only its own thread writes to it
+    __slots__ = ("reads", "bytes", "allocations", "allocated_bytes")
+
+    def __init__(self) -> None:
+        self.reads = 0
+        self.bytes = 0
+        self.allocations = 0
+        self.allocated_bytes = 0
+
+
+_local = threading.local()
+_counters_lock = threading.Lock()
+# counters of every thread that ever hashed, they outlive their thread so
+# io_stats() covers the whole run
+_counters: List[_IoCounters] = []
+
+class BufferPool:
+    # the read buffers of one thread, smallest first. a read borrows the
+    # smallest one that fits and gives it back afterwards, so a thread
+    # allocates a handful of buffers in its lifetime and never a bytes
+    # object per read. pooled buffers stay under HASH_POOL_BYTES, the
+    # smallest go first.
+    __slots__ = ("_free", "_held", "counters")
+
+    def __init__(self, counters: _IoCounters) -> None:
+        self._free: List[bytearray] = []
+        self._held = 0
+        self.counters = counters
+
+    def take(self, size: int) -> bytearray:
+        for i, buf in enumerate(self._free):
+            if len(buf) >= size:
+                del self._free[i]
+                self._held -= len(buf)
+                return buf
+        self.counters.allocations += 1
+        self.counters.allocated_bytes += size
+        return bytearray(size)
+
+    def give(self, buf: bytearray) -> None:
+        self._free.append(buf)
+        self._free.sort(key=len)
+        self._held += len(buf)
+        while self._held > HASH_POOL_BYTES and len(self._free) > 1:
+            self._held -= len(self._free.pop(0))
+
+    @contextmanager
+    def buffer(self, size: int) -> Iterator[memoryview]:
+        buf = self.take(size)
+        try:
+            yield memoryview(buf)[:size]
+        finally:
+            self.give(buf)
+
+    def readinto(self, f: io.FileIO, view: memoryview) -> int:
+        # straight into the pooled buffer, readv where the OS has it
+        n = os.readv(f.fileno(), [view]) if _HAS_READV else f.readinto(view)
+        self.counters.reads += 1
+        self.counters.bytes += n or 0
+        return n or 0
+
+
+def buffer_pool() -> BufferPool:
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        counters = _IoCounters()
+        with _counters_lock:
+            _counters.append(counters)
+        pool = BufferPool(counters)
+        _local.pool = pool
+    return pool
+
+def prime_buffers(size: int = HASH_READ_BUFFER) -> None:
+    # hash executor initializer, the first file a thread hashes does not
+    # wait on an allocation
+    pool = buffer_pool()
+    pool.give(pool.take(size))
+
+def block_size(length: int) -> int:
+    # the power of two that reads a window in one go plus the read that
+    # sees EOF, between HASH_BLOCK_MIN and HASH_BLOCK_MAX
+    if length <= 0:
+        return HASH_BLOCK_MIN
+    return max(HASH_BLOCK_MIN, min(HASH_BLOCK_MAX, 1 << length.bit_length()))
+
+def advise_sequential(fd: int, offset: int = 0, length: int = 0) -> None:
+    # lets the kernel read ahead further, length 0 means to EOF. Windows
+    # gets FILE_FLAG_SEQUENTIAL_SCAN from open_file_seq instead
+    if not _HAS_FADVISE:
+        return
+    try:
+        os.posix_fadvise(fd, offset, max(length, 0), os.POSIX_FADV_SEQUENTIAL)
+    except OSError:
+        pass
+
+def io_stats() -> Dict[str, Any]:
+    with _counters_lock:
+        counters = list(_counters)
+    reads = sum(c.reads for c in counters)
+    read_bytes = sum(c.bytes for c in counters)
+    return {
+        "threads": len(counters),
+        "reads": reads,
+        "bytes": read_bytes,
+        "reads_per_mb": reads / (read_bytes / 2**20) if read_bytes else 0.0,
+        "allocations": sum(c.allocations for c in counters),
+        "allocated_bytes": sum(c.allocated_bytes for c in counters),
+    }
@@ -0,0 +1,228 @@
+from pyile.lib.runtime.internal.constants import (
+    CDC_MIN_SIZE, CDC_AVG_SIZE, CDC_MAX_SIZE, CDC_READ_BLOCK, CDC_PROBES
+)
+
+import io
+import random
+import xxhash # type: ignore
+from array import array
+from bisect import bisect_left
+from typing import Optional, Iterator, List, Tuple, Callable
+
+# (chunk lengths, chunk fingerprints, bytes read)
+ChunkResult = Tuple[array, array, int]
+
+# FastCDC style normalized chunking. the rolling hash is the file read as
+# one little endian integer times a fixed _WINDOW byte odd constant, so byte
+# i of the product mixes bytes i - _WINDOW to i of the file (and the carries
+# below them) the way a gear hash would, and CPython does the whole read
+# block in one multiplication. a cut follows two product bytes equal to
+# _STRICT (2^-16 a position) between CDC_MIN_SIZE and CDC_AVG_SIZE, or three
+# high nibbles equal to _LOOSE (2^-12) up to CDC_MAX_SIZE, so sizes bunch up
+# around the average. zero filled regions never match and are cut at
+# CDC_MAX_SIZE.
+_WINDOW = 24
+# a carry from further below than this changes a byte about 2^-64 of the
+# time, reads starting mid file take this much history along so their cuts
+# are the ones a full pass finds
+_HISTORY = _WINDOW + 8
+_MULTIPLIER = int.from_bytes(
+    xxhash.xxh3_128_digest(b"pyile cdc") + xxhash.xxh3_64_digest(b"pyile cdc"), "little"
+) | 1 | (1 << (8 * _WINDOW - 1))
+_NIBBLES = bytes(b >> 4 for b in range(256))
+_STRICT = bytes((0x93, 0xC5))
+_LOOSE = bytes((0x6, 0xA, 0x1))
+
+def _rolled(history: bytes, data: bytes) -> bytes:
+    joined = history + data
+    product = (int.from_bytes(joined, "little") * _MULTIPLIER).to_bytes(len(joined) + _WINDOW, "little")
+    return product[len(history):len(joined)]
+
+def _next_cut(rolled: bytearray, start: int, end: int) -> int:
+    # rolled holds the product bytes of [start, end), end is the last byte available
+    if end - start <= CDC_MIN_SIZE:
+        return end
+    mid = min(start + CDC_AVG_SIZE, end)
+    j = rolled.find(_STRICT, start + CDC_MIN_SIZE - len(_STRICT), mid)
+    if j >= 0:
+        return j + len(_STRICT)
+    limit = min(start + CDC_MAX_SIZE, end)
+    lo = mid - len(_LOOSE) + 1
+    j = rolled[lo:limit].translate(_NIBBLES).find(_LOOSE)
+    if j >= 0:
+        return lo + j + len(_LOOSE)
+    return limit
+
+def iter_chunks(f: io.FileIO, pos: int, block: int = CDC_READ_BLOCK) -> Iterator[Tuple[int, int, int]]:
+    # (offset, length, xxh3_64) of every chunk from pos to EOF, pos has to
+    # be a chunk boundary for the cuts to line up with a full pass. reads
+    # start small and double up to block, a rechunk that lines up again
+    # after a few chunks does not pull in a whole block
+    history = b""
+    if pos:
+        f.seek(max(0, pos - _HISTORY))
+        history = f.read(min(pos, _HISTORY))
+    f.seek(pos)
+    buf = bytearray()
+    rolled = bytearray()
+    base = pos
+    start = 0
+    want = 2 * CDC_MAX_SIZE
+    eof = False
+    while True:
+        if not eof and len(buf) - start < CDC_MAX_SIZE:
+            data = f.read(want)
+            want = min(want * 2, block)
+            if data:
+                if buf:
+                    history = bytes(buf[-_HISTORY:])
+                del buf[:start]
+                del rolled[:start]
+                base += start
+                start = 0
+                buf += data
+                rolled += _rolled(history, data)
+                continue
+            eof = True
+
+        if start >= len(buf):
+            return
+        cut = _next_cut(rolled, start, len(buf))
+        with memoryview(buf) as view:
+            fp = xxhash.xxh3_64_intdigest(view[start:cut])
+        yield base + start, cut - start, fp
+        start = cut
+
+def chunk_fd(fd: int, should_continue: Optional[Callable[[], bool]] = None) -> Optional[ChunkResult]:
+    # the whole file, None once should_continue() turns False
+    lens = array("I")
+    fps = array("Q")
+    with io.FileIO(fd, "rb", closefd=False) as f:
+        for _, length, fp in iter_chunks(f, 0):
+            if should_continue is not None and not should_continue():
+                return None
+            lens.append(length)
+            fps.append(fp)
+        read = f.tell()
+    return lens, fps, read
+
+def content_root(fps: array) -> int:
+    # the content key of a chunked file
+    return xxhash.xxh3_64_intdigest(fps.tobytes())
+
+def rechunk_fd(
+        fd: int,
+        lens: array,
+        fps: array,
+        size: int,
+        should_continue: Optional[Callable[[], bool]] = None,
+        probes: int = CDC_PROBES,
+        rng: Optional[random.Random] = None,
+    ) -> Optional[ChunkResult]:
+    # the layout of a file whose size changed, from its previous one. the
+    # first chunk and `probes` random others are read where they were and
+    # where the change would have pushed them. chunks between two probes
+    # found at the same place are taken as they were, everything else is
+    # chunked again from the last good boundary until a new cut lands on an
+    # old one, from there on the old chunks carry on. inserts, deletes,
+    # appends and truncation are always found. an overwrite elsewhere is
+    # only found when a probe hits it, so the caller keeps a file that did
+    # not change size for a full pass, and reads every CDC_FULL_EVERY'th
+    # change in full. empty lengths come back when most probes were found
+    # nowhere or the rechunked regions outgrew half the file, a full pass
+    # reads less from there. the bytes read so far are still reported.
+    n = len(lens)
+    offsets = array("Q", [0])
+    for length in lens:
+        offsets.append(offsets[-1] + length)
+    delta = size - offsets[n]
+    read = 0
+
+    with io.FileIO(fd, "rb", closefd=False) as f:
+        def found_at(i: int, shift: int) -> bool:
+            nonlocal read
+            pos = offsets[i] + shift
+            if pos < 0 or pos + lens[i] > size:
+                return False
+            f.seek(pos)
+            data = f.read(lens[i])
+            read += len(data)
+            return len(data) == lens[i] and xxhash.xxh3_64_intdigest(data) == fps[i]
+
+        # the last chunk was cut by EOF, not by its content, it is never kept
+        picks = [0] if n > 1 else []
+        if n > 2:
+            picks += sorted((rng or random).sample(range(1, n - 1), min(probes, n - 2)))
+        # shift every probe was found at, None when it was found nowhere
+        shifts: List[Optional[int]] = []
+        shift = 0
+        for i in picks:
+            if should_continue is not None and not should_continue():
+                return None
+            found = None
+            for s in ((shift,) if not delta else (shift, delta if shift == 0 else 0)):
+                if found_at(i, s):
+                    found = shift = s
+                    break
+            shifts.append(found)
+
+        if 2 * shifts.count(None) > len(shifts):
+            return array("I"), array("Q"), read
+        limit = size // 2
+
+        def kept_until(j: int, s: int) -> int:
+            # last old chunk that can be kept from chunk j on at shift s
+            b = bisect_left(picks, j)
+            last = j - 1
+            while b < len(picks) and shifts[b] == s:
+                last = picks[b]
+                b += 1
+            if b == len(picks) and s == delta:
+                last = n - 2
+            return last
+
+        out_lens = array("I")
+        out_fps = array("Q")
+        pos = 0
+        ahead = 0
+        keep: Optional[Tuple[int, int]] = (0, 0) if shifts and shifts[0] == 0 else None
+        while pos < size:
+            if keep is not None:
+                j, s = keep
+                keep = None
+                last = kept_until(j, s)
+                out_lens.extend(lens[j:last + 1])
+                out_fps.extend(fps[j:last + 1])
+                pos = offsets[last + 1] + s
+                continue
+
+            started = pos
+            for off, length, fp in iter_chunks(f, pos):
+                if should_continue is not None and not should_continue():
+                    return None
+                if read + f.tell() - started > limit:
+                    return array("I"), array("Q"), read + f.tell() - started
+                out_lens.append(length)
+                out_fps.append(fp)
+                pos = off + length
+                if pos >= size:
+                    break
+
+                # the next probe found ahead tells where the old chunks there sit now
+                while ahead < len(picks) and (
+                        shifts[ahead] is None or offsets[picks[ahead]] + shifts[ahead] < pos # type: ignore
+                ):
+                    ahead += 1
+                s = shifts[ahead] if ahead < len(picks) else delta
+                m = bisect_left(offsets, pos - s) # type: ignore
+                if (
+                    0 < m < n and offsets[m] == pos - s and lens[m - 1] == length
+                    and fps[m - 1] == fp and kept_until(m, s) >= m # type: ignore
+                ):
+                    keep = (m, s) # type: ignore
+                    break
+            read += f.tell() - started
+            if keep is None:
+                break
+
+    return out_lens, out_fps, read
@@ -0,0 +1,49 @@
+from pyile.lib.runtime.hashing.streaming import Window, hash_fd
+from pyile.lib.runtime.internal.constants import HASH_READ_BUFFER
+from pyile.lib.utils.logging import log_debug
+
+import mmap
+import xxhash # type: ignore
+from typing import Optional, List, Tuple, Callable
+
+def hash_fd_mmap(
+        fd: int,
+        windows: List[Window],
+        should_continue: Optional[Callable[[], bool]] = None,
+        step: int = HASH_READ_BUFFER,
+    ) -> Optional[Tuple[int, int]]:
+    # same contract and key as hash_fd(), the windows are hashed straight out
+    # of the page cache through memoryview slices, nothing is copied. files
+    # that can not be mapped (empty, pipes, some network shares) go through
+    # the read path instead.
+    try:
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        log_debug(f"mmap failed, hashing with reads: {e}")
+        return hash_fd(fd, windows, should_continue=should_continue)
+
+    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+        try:
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+    h = xxhash.xxh3_64()
+    total = 0
+    try:
+        with memoryview(mm) as view:
+            size = len(view)
+            for pos, length in windows:
+                end = size if length < 0 else min(size, pos + length)
+                # step only bounds how long stop() has to wait
+                while pos < end:
+                    if should_continue is not None and not should_continue():
+                        return None
+                    stop = min(end, pos + step)
+                    h.update(view[pos:stop])
+                    total += stop - pos
+                    pos = stop
+    finally:
+        mm.close()
+
+    return h.intdigest(), total
@@ -0,0 +1,180 @@
+from pyile.lib.runtime.hashing.streaming import Window, hash_fd
+from pyile.lib.runtime.hashing.mapped import hash_fd_mmap
+from pyile.lib.runtime.internal.constants import FAST_POLL_INTERVAL, HASH_PROCESS_SLOTS
+from pyile.lib.utils.common import get_thread_count
+from pyile.lib.utils.logging import log_error, log_info
+from pyile.lib.utils.lazy import LazyInit
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Optional, List, Tuple, Callable, Dict, Any
+
+# (path id, size, mtime_ns, key) as the worker saw the file, key is None
+# when nothing could be read
+HashResult = Tuple[int, int, int, Optional[int]]
+
+# the parent's cancel flags, attached once per worker process
+_shm: Optional[shared_memory.SharedMemory] = None
+
+def _init_worker(name: str) -> None:
+    # spawned workers share the parent's resource tracker, attaching here
+    # registers the same name again and the parent's unlink clears it
+    global _shm
+    _shm = shared_memory.SharedMemory(name=name)
+
+def _hash_in_worker(path_id: int, path: str, windows: List[Window], use_mmap: bool, slot: int) -> Optional[HashResult]:
+    # runs in a worker process. an OSError from the open goes back to the
+    # caller (locked or gone), None when the parent set the cancel flag
+    flags = _shm.buf # type: ignore
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_SEQUENTIAL", 0) | getattr(os, "O_BINARY", 0))
+    try:
+        st = os.fstat(fd)
+        hasher = hash_fd_mmap if use_mmap else hash_fd
+        result = hasher(fd, windows, should_continue=lambda: not flags[slot])
+    finally:
+        os.close(fd)
+
+    if result is None:
+        return None
+    key, hashed = result
+    return path_id, st.st_size, st.st_mtime_ns, key if hashed else None
+
+
+class HashProcessPool(LazyInit):
+    # hashing in worker processes. the caller (a BGHasher thread) blocks on
+    # the result without holding the GIL, workers open and read the file
+    # themselves so no file data crosses the process boundary, only the
+    # arguments and the HashResult. the one buffer both sides touch is a
+    # shared memory block of cancel flags, a caller that has to stop (its
+    # job was superseded, the monitor stopped) sets its slot and the worker
+    # gives up at its next chunk, like should_continue does in process.
+    __slots__ = ("_lock", "_slots_free", "_free", "_executor", "_shm", "workers", "submitted", "cancelled", "failed")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._slots_free = threading.Condition(self._lock)
+        self._free: List[int] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self.workers = 0
+
+        self.submitted = 0
+        self.cancelled = 0
+        self.failed = False
+
+    def start(self, workers: int = 0) -> bool:
+        # False when worker processes can not be used here, callers hash in
+        # process instead. a failed start is not retried
+        if self._executor is not None:
+            return True
+        with self._lock:
+            if self._executor is not None:
+                return True
+            if self.failed:
+                return False
+
+            workers = workers if workers > 0 else get_thread_count()
+            try:
+                self._shm = shared_memory.SharedMemory(create=True, size=HASH_PROCESS_SLOTS)
+                self._shm.buf[:HASH_PROCESS_SLOTS] = bytes(HASH_PROCESS_SLOTS)
+                # spawn on every platform, forking a process that already
+                # runs threads can leave a worker holding a dead thread's lock
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self._shm.name,)
+                )
+            except (OSError, ValueError, ImportError) as e:
+                log_error(f"Hash worker processes unavailable, hashing in threads: {e}")
+                self.failed = True
+                self._release_shm()
+                return False
+
+            self._free = list(range(HASH_PROCESS_SLOTS - 1, -1, -1))
+            self.workers = workers
+            log_info(f"Hash process pool started with {workers} workers")
+            return True
+
+    def hash_path(
+            self,
+            path_id: int,
+            path: str,
+            windows: List[Window],
+            use_mmap: bool = False,
+            should_continue: Optional[Callable[[], bool]] = None,
+        ) -> Optional[HashResult]:
+        # raises OSError when the worker could not open the file and
+        # RuntimeError once the pool is shut down
+        slot = self._take_slot()
+        try:
+            executor, shm = self._executor, self._shm
+            if executor is None or shm is None:
+                raise RuntimeError("hash process pool is shut down")
+
+            shm.buf[slot] = 0
+            fut = executor.submit(_hash_in_worker, path_id, path, windows, use_mmap, slot)
+            with self._lock:
+                self.submitted += 1
+
+            while True:
+                done, _ = wait([fut], timeout=FAST_POLL_INTERVAL)
+                if done:
+                    break
+                if should_continue is not None and not should_continue():
+                    shm.buf[slot] = 1
+                    with self._lock:
+                        self.cancelled += 1
+                    # the slot is only handed out again once the worker let go of it
+                    break
+            return fut.result()
+        finally:
+            self._give_slot(slot)
+
+    def _take_slot(self) -> int:
+        with self._slots_free:
+            while not self._free:
+                if self._executor is None:
+                    raise RuntimeError("hash process pool is shut down")
+                self._slots_free.wait(FAST_POLL_INTERVAL)
+            return self._free.pop()
+
+    def _give_slot(self, slot: int) -> None:
+        with self._slots_free:
+            self._free.append(slot)
+            self._slots_free.notify()
+
+    def _release_shm(self) -> None:
+        if self._shm is None:
+            return
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except (OSError, BufferError):
+            pass
+        self._shm = None
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if executor is None:
+                return
+            if self._shm is not None:
+                # running hashes stop at their next chunk
+                self._shm.buf[:HASH_PROCESS_SLOTS] = b"\x01" * HASH_PROCESS_SLOTS
+        executor.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            if self._executor is None:
+                self._release_shm()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers if self._executor is not None else 0,
+                "submitted": self.submitted,
+                "cancelled": self.cancelled,
+                "slots_free": len(self._free),
+            }
@@ -0,0 +1,99 @@
+from pyile.lib.runtime.hashing.buffers import buffer_pool, block_size, advise_sequential
+from pyile.lib.runtime.internal.constants import VERIFY_DIGEST_SIZE
+from pyile.lib.utils.logging import log_error
+
+import io
+import os
+import hashlib
+import xxhash # type: ignore
+from typing import Optional, List, Tuple, Callable
+
+# (offset, length) ranges of a file that make up its content key, a length
+# of -1 reads to EOF
+Window = Tuple[int, int]
+
+def sample_windows(size: int, max_bytes: int, window: int) -> List[Window]:
+    # the whole file when it fits, otherwise head, middle and tail windows
+    if size <= max_bytes:
+        return [(0, -1)]
+
+    positions = [0]
+    if size > 2 * window:
+        positions.append(size // 2)
+    if size > window:
+        positions.append(size - window)
+    return [(pos, min(window, size - pos)) for pos in positions]
+
+def _longest_window(fd: int, windows: List[Window]) -> int:
+    size = None
+    longest = 0
+    for pos, length in windows:
+        if length < 0:
+            if size is None:
+                size = os.fstat(fd).st_size
+            length = size - pos
+        longest = max(longest, length)
+    return longest
+
+def hash_fd(
+        fd: int,
+        windows: List[Window],
+        should_continue: Optional[Callable[[], bool]] = None,
+    ) -> Optional[Tuple[int, int]]:
+    # feeds every window through one xxh3_64 state, the key is the same as
+    # hashing the windows concatenated in memory. returns (key, bytes hashed)
+    # or None once should_continue() turns False
+    h = xxhash.xxh3_64()
+    pool = buffer_pool()
+    total = 0
+
+    with io.FileIO(fd, "rb", closefd=False) as f, pool.buffer(block_size(_longest_window(fd, windows))) as view:
+        capacity = len(view)
+        for pos, length in windows:
+            try:
+                f.seek(pos)
+            except OSError as e:
+                log_error(f"Seek failed at position {pos} {e}")
+                continue
+            advise_sequential(fd, pos, length)
+
+            remaining = length
+            while remaining != 0:
+                if should_continue is not None and not should_continue():
+                    return None
+
+                want = capacity if remaining < 0 else min(capacity, remaining)
+                n = pool.readinto(f, view[:want])
+                if not n:
+                    break
+
+                h.update(view[:n])
+                total += n
+                if remaining > 0:
+                    remaining -= n
+
+    return h.intdigest(), total
+
+def digest_fd(
+        fd: int,
+        should_continue: Optional[Callable[[], bool]] = None,
+    ) -> Optional[Tuple[bytes, int]]:
+    # blake2b of the whole file from the start, (digest, bytes read) or None
+    # once should_continue() turns False
+    h = hashlib.blake2b(digest_size=VERIFY_DIGEST_SIZE)
+    pool = buffer_pool()
+    total = 0
+
+    with io.FileIO(fd, "rb", closefd=False) as f, pool.buffer(block_size(os.fstat(fd).st_size)) as view:
+        f.seek(0)
+        advise_sequential(fd)
+        while True:
+            if should_continue is not None and not should_continue():
+                return None
+            n = pool.readinto(f, view)
+            if not n:
+                break
+            h.update(view[:n])
+            total += n
+
+    return h.digest(), total
@@ -0,0 +1,65 @@
+from pyile.lib.runtime.internal.thread_safe import SafeThread, AtomicCounter
+from pyile.lib.runtime.internal.constants import OWNER_QUEUE_SIZE
+from pyile.lib.utils.owner_resolver import get_owner_resolver, get_current_user
+from pyile.lib.utils.logging import log_error, log_info
+from pyile.lib.utils.lazy import LazyInit
+
+import threading
+from queue import Queue, Full
+from typing import Callable, Dict, Any
+
+class AttributionWorker(LazyInit):
+    # resolves file owners off the event path. monitors hand over a path and a
+    # callback, the event itself keeps moving and the callback receives the
+    # account name once it is known.
+    __slots__ = ("_a_q", "_lock", "_started", "resolved", "overflowed")
+
+    def __init__(self) -> None:
+        self._a_q = Queue(maxsize=OWNER_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._started = False
+        self.resolved = AtomicCounter(0)
+        self.overflowed = AtomicCounter(0)
+
+    def _ensure_started(self) -> None:
+        if self._started:
+            return
+        with self._lock:
+            if not self._started:
+                log_info("Starting attribution worker")
+                SafeThread.spawn(self._worker, thread_name="attribution_worker")
+                self._started = True
+
+    def submit(self, path_filename: str, callback: Callable[[str], None]) -> None:
+        self._ensure_started()
+        try:
+            self._a_q.put_nowait((path_filename, callback))
+        except Full:
+            # never stall the caller, the event is reported against the current user
+            self.overflowed += 1
+            self._deliver(callback, get_current_user())
+
+    def _deliver(self, callback: Callable[[str], None], username: str) -> None:
+        try:
+            callback(username)
+        except Exception as e:
+            log_error(f"Attribution callback failed: {e}")
+
+    def _worker(self) -> None:
+        while True:
+            path_filename, callback = self._a_q.get()
+            try:
+                username = get_owner_resolver().resolve(path_filename)
+            except Exception as e:
+                log_error(f"Owner lookup failed for {path_filename}: {e}")
+                username = None
+
+            self.resolved += 1
+            self._deliver(callback, username or get_current_user())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._a_q.qsize(),
+            "resolved": int(self.resolved),
+            "overflowed": int(self.overflowed),
+        }
@@ -36,19 +36,31 @@ POLL_INTERVAL = 0.5
 FAST_POLL_INTERVAL = 0.05
 ERROR_SLEEP_INTERVAL = 0.5
 BUFFER_SIZE = 8192
-DEBOUNCE_WINDOW = 0.5
-CHUNK_SIZE = 100
+MAX_BUFFER_SIZE = 65536
+# quiet period before a burst of events on one path is handled once, and
+# the resolution / size of the timer wheel counting it down
+DEBOUNCE_QUIET_MS = 500
+DEBOUNCE_TICK = 0.02
+DEBOUNCE_SLOTS = 256
+# a released path id is handed out again after this long (see PathIds)
+PATH_ID_REUSE_DELAY = 60.0
 THROTTLE_WINDOW = 5.0
 
 MAX_CACHE_SIZE = 8192
-CACHE_TTL = 5.0
 MAX_RECORDS_DEFAULT = 10_000
 RECORD_SIZE = 16
 HEADER_SIZE = 16
+# slots of a new file catalog and the share of them in use before it is rebuilt larger
+CATALOG_INITIAL_SLOTS = 1 << 16
+CATALOG_MAX_LOAD = 0.7
 
 MAX_WORKERS_DEFAULT = 4
 MAX_WORKERS_WINDOWS_11 = 8
 MAX_WORKERS_BACKUP = 2
+# duplicate verification reads whole files, one worker in background mode
+# (Windows) or at the lowest nice value (Linux) keeps it behind hashing
+MAX_WORKERS_VERIFY = 1
+VERIFY_NICE = 19
 
 DO_NOT_RUN_EXTENSIONS = (
     ".exe", ".bat", ".cmd", ".com", ".pif", ".scr", ".vbs", ".js",
@@ -58,20 +70,67 @@ DO_NOT_RUN_EXTENSIONS = (
 TEMP_EXTENSIONS = {".log", ".lock", ".tmp", ".dmp", ".pf"}
 SYSTEM_EXTENSIONS = {".sys", ".drv", ".efi", ".ocx", ".cpl", ".mui", ".fon", ".icl",}
 
+QUEUE_POLICY_BLOCK = "block"
+QUEUE_POLICY_DROP_OLDEST = "drop_oldest"
+QUEUE_POLICY_COALESCE = "coalesce"
+QUEUE_POLICIES = (QUEUE_POLICY_BLOCK, QUEUE_POLICY_DROP_OLDEST, QUEUE_POLICY_COALESCE)
+EVENT_QUEUE_SIZE = 4096
+EVENT_QUEUE_POLICY = QUEUE_POLICY_BLOCK
+QUEUE_WAIT_SAMPLES = 1024
+LATENCY_SAMPLES = 1024
+HUB_OP_TIMEOUT = 5.0
+# a RENAMED_FROM whose RENAMED_TO did not arrive by then left the watched tree
+RENAME_PAIR_TIMEOUT = 0.5
+
+OWNER_CACHE_SIZE = 1024
+OWNER_CACHE_TTL = 300.0
+OWNER_QUEUE_SIZE = 8192
+
+RESCAN_MIN_INTERVAL = 5.0
+RESCAN_MAX_ENTRIES = 1_000_000
+RESCAN_BATCH_SIZE = 512
+RESCAN_HISTORY = 32
+
+# directory listers per tree walk and hash jobs a walk keeps queued at most
+SCAN_WALKERS = 4
+SCAN_MAX_INFLIGHT = 1024
+SCAN_PROGRESS_EVERY = 10_000
+
+# hash job classes, lower runs first. inside a class smaller files go first,
+# a job queued this long is run out of order on every SCHED_AGED_SHARE'th pick
+PRIORITY_LIVE = 0
+PRIORITY_RESCAN = 1
+PRIORITY_BULK = 2
+PRIORITY_NAMES = ("live", "rescan", "bulk")
+SCHED_STARVATION_SECS = 2.0
+SCHED_AGED_SHARE = 8
+
+# files another process holds open are retried after RETRY_BASE_DELAY * 2^n
+# (n = attempts so far, capped at RETRY_MAX_DELAY) instead of blocking a worker
+RETRY_BASE_DELAY = 0.25
+RETRY_MAX_DELAY = 30.0
+RETRY_MAX_ATTEMPTS = 8
+RETRY_TICK = 0.05
+RETRY_SLOTS = 256
+
 CONFIG_VERSION = 1
 MAX_ERRORS = 10
 NOTIFICATION_DELAY = 1.5
 BACKUP_INTERVAL_MINUTES = 15
 
 
-import winerror # type: ignore
 from ctypes import wintypes
 
-TRANSIENT_ERRORS = {
-    winerror.ERROR_OPERATION_ABORTED,     
-    winerror.ERROR_INVALID_PARAMETER,     
-    winerror.ERROR_ACCESS_DENIED          
-}
+try:
+    import winerror # type: ignore
+    TRANSIENT_ERRORS = {
+        winerror.ERROR_OPERATION_ABORTED,     
+        winerror.ERROR_INVALID_PARAMETER,     
+        winerror.ERROR_ACCESS_DENIED          
+    }
+except ImportError:
+    # non Windows hosts only run the inotify event source
+    TRANSIENT_ERRORS = set()
 
 FILE_NOTIFY_CHANGE_ATTRIBUTES = 0x00000004
 FILE_NOTIFY_CHANGE_DIR_NAME = 0x00000002
@@ -96,6 +155,47 @@ FILE_ACTION_REMOVED = 0x00000002
 FILE_ACTION_MODIFIED = 0x00000003
 FILE_RENAMED_FROM = 0x00000004
 FILE_RENAMED_TO = 0x00000005
+# not a kernel action, event sources emit it when the notify buffer was lost
+FILE_ACTION_OVERFLOW = 0x00000100
+ERROR_NOTIFY_ENUM_DIR = 1022
+ERROR_OPERATION_ABORTED = 995
+ERROR_IO_INCOMPLETE = 996
+
+# WaitForMultipleObjects, one slot of every hub is taken by its wake event
+INFINITE = 0xFFFFFFFF
+WAIT_OBJECT_0 = 0x00000000
+WAIT_TIMEOUT = 0x00000102
+# lowers the thread's CPU, I/O and memory priority until THREAD_MODE_BACKGROUND_END
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+WAIT_FAILED = 0xFFFFFFFF
+MAXIMUM_WAIT_OBJECTS = 64
+
+# inotify(7) masks, used by the Linux event source
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+INOTIFY_WATCH_FLAGS = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF |
+    IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK
+)
+# folders renamed away whose IN_MOVED_TO may still come, older ones left the tree
+INOTIFY_MOVE_COOKIES = 256
 
 SECURITY_DESCRIPTOR_REVISION = 1
 FILE_NOTIFY_FLAGS = (
@@ -114,12 +214,65 @@ BYTE = wintypes.BYTE
 LPVOID = wintypes.LPVOID
 
 CHUNK_SIZE_READ = 4096
+# every hasher thread starts with a buffer this size in its pool
+HASH_READ_BUFFER = 1 << 20
+# reads are sized to the window being hashed (a small file is one read)
+# between these bounds, buffers a thread keeps pooled stay under
+# HASH_POOL_BYTES
+HASH_BLOCK_MIN = 64 * 1024
+HASH_BLOCK_MAX = 2 << 20
+HASH_POOL_BYTES = 4 << 20
+# auto maps the files that are sampled (above max_hash_file_bytes), cold
+# small files hash faster with reads
+HASH_IO_AUTO = "auto"
+HASH_IO_READ = "read"
+HASH_IO_MMAP = "mmap"
+HASH_IO_MODES = (HASH_IO_AUTO, HASH_IO_READ, HASH_IO_MMAP)
+HASH_IO_MODE = HASH_IO_AUTO
+# strong digest a 64 bit duplicate match is confirmed with
+VERIFY_DIGEST_SIZE = 32
+# hash_engine = processes opens and hashes files in worker processes, out
+# of reach of the GIL the reader and UI threads need. hash_workers of 0
+# sizes the pool like the hash executor
+HASH_ENGINE_THREADS = "threads"
+HASH_ENGINE_PROCESSES = "processes"
+HASH_ENGINES = (HASH_ENGINE_THREADS, HASH_ENGINE_PROCESSES)
+HASH_ENGINE = HASH_ENGINE_THREADS
+HASH_WORKERS = 0
+# cancel flags shared with the worker processes, one per call in flight
+HASH_PROCESS_SLOTS = 256
+# files of equal size are compared on this much of their head before a full read
+DEDUPE_HEAD_BYTES = 64 * 1024
+# tables of the duplicate group index, each with its own lock, and their
+# starting slots (powers of two) and load before they double
+GROUP_STRIPES = 64
+GROUP_INITIAL_SLOTS = 1024
+GROUP_MAX_LOAD = 0.7
+# hash_chunking = cdc cuts files from CDC_MIN_FILE_BYTES up into content
+# defined chunks between CDC_MIN_SIZE and CDC_MAX_SIZE, normalized around
+# CDC_AVG_SIZE, and keeps their fingerprints
+HASH_CHUNKING_OFF = "off"
+HASH_CHUNKING_CDC = "cdc"
+HASH_CHUNKING_MODES = (HASH_CHUNKING_OFF, HASH_CHUNKING_CDC)
+HASH_CHUNKING = HASH_CHUNKING_OFF
+CDC_MIN_FILE_BYTES = 8 * 1024 * 1024
+CDC_MIN_SIZE = 16 * 1024
+CDC_AVG_SIZE = 64 * 1024
+CDC_MAX_SIZE = 256 * 1024
+CDC_READ_BLOCK = 4 * 1024 * 1024
+# a file whose size changed is checked on this many random chunks before
+# only the regions that moved or changed are read again. one that kept its
+# size, and every CDC_FULL_EVERY'th change, is read in full
+CDC_PROBES = 32
+CDC_FULL_EVERY = 8
+# 1 in CDC_INDEX_SAMPLE chunks goes into the overlap index, files sharing
+# at least CDC_REPORT_SHARE of their content are reported
+CDC_INDEX_SAMPLE = 4
+CDC_REPORT_SHARE = 0.5
 CHUNK_SIZE_PROCESS = 8192
 FILE_MODE_DEFAULT = 0o600
 
 THREAD_TIMEOUT = 0.05
-FUTURE_TIMEOUT = 10
-CHUNK_TIMEOUT = 30
 BACKUP_TIMEOUT = 30 
 
 PARAM_DESTROY = 1028
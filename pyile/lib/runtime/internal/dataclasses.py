@@ -1,4 +1,3 @@
-import winerror # type: ignore
 import ctypes
 from ctypes import wintypes
 from typing import NamedTuple
@@ -27,6 +26,18 @@ class SECURITY_ATTRIBUTES(ctypes.Structure):
     ]
 
 
+class OVERLAPPED(ctypes.Structure):
+    # the Offset / Pointer union is only used for file reads, directory
+    # change notifications leave it zeroed
+    _fields_ = [
+        ("Internal",              ctypes.c_void_p),
+        ("InternalHigh",          ctypes.c_void_p),
+        ("Offset",                wintypes.DWORD),
+        ("OffsetHigh",            wintypes.DWORD),
+        ("hEvent",                wintypes.HANDLE)
+    ]
+
+
 class Rec(ctypes.Structure):
     _fields_ = [
         ("hash_value",         ctypes.c_uint64),
@@ -1,22 +1,51 @@
 from pyile.lib.utils.common import get_thread_count
-from pyile.lib.runtime.internal.constants import MAX_WORKERS_BACKUP
+from pyile.lib.runtime.hashing.buffers import prime_buffers
+from pyile.lib.runtime.internal.constants import (
+    MAX_WORKERS_BACKUP, MAX_WORKERS_VERIFY, VERIFY_NICE, THREAD_MODE_BACKGROUND_BEGIN
+)
+from pyile.lib.utils.logging import log_debug
 from pyile.lib.utils.lazy import LazyInit
 
 from concurrent.futures import ThreadPoolExecutor
+import os
 import threading 
-from typing import Optional
+from typing import Optional, Callable
+
+def _lower_priority() -> None:
+    # verify reads must not compete with live hashing. on Windows the
+    # background mode also drops the thread's I/O priority, on Linux the
+    # nice value is per thread. other platforms keep normal priority
+    if os.name == "nt":
+        from pyile.lib.runtime.internal.win32_api import SetThreadPriority, GetCurrentThread
+        import ctypes
+        if not SetThreadPriority(GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN):
+            log_debug(f"Failed to lower verify thread priority: {ctypes.WinError(ctypes.get_last_error())}")
+        return
+
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), VERIFY_NICE)
+    except (AttributeError, OSError):
+        pass
 
 class ExecutorPool(LazyInit):
     def __init__(self) -> None:
         self._lock = threading.Lock()
         self._hash_executor = None
         self._backup_executor = None
+        self._verify_executor = None
+        self._hash_processes = None
         self._shutdown = False
 
-    def _new_executor(self, max_workers: int, prefix: str) -> ThreadPoolExecutor:
+    def _new_executor(
+            self,
+            max_workers: int,
+            prefix: str,
+            initializer: Optional[Callable[[], None]] = None
+        ) -> ThreadPoolExecutor:
         return ThreadPoolExecutor(
             max_workers=max_workers,
-            thread_name_prefix=prefix
+            thread_name_prefix=prefix,
+            initializer=initializer
         )
 
     def restart(self) -> None:
@@ -30,7 +59,7 @@ class ExecutorPool(LazyInit):
         if self._hash_executor is not None:
             return self._hash_executor
 
-        executor = self._new_executor(get_thread_count(), "BGHasher")
+        executor = self._new_executor(get_thread_count(), "BGHasher", prime_buffers)
         with self._lock:
             if self._hash_executor is None and not self._shutdown:
                 self._hash_executor = executor
@@ -53,6 +82,35 @@ class ExecutorPool(LazyInit):
         executor.shutdown(wait=False)
         return self._backup_executor
 
+    def get_verify_executor(self) -> Optional[ThreadPoolExecutor]:
+        if self._shutdown:
+            return None
+        if self._verify_executor is not None:
+            return self._verify_executor
+
+        executor = self._new_executor(MAX_WORKERS_VERIFY, "BGVerify", _lower_priority)
+        with self._lock:
+            if self._verify_executor is None and not self._shutdown:
+                self._verify_executor = executor
+                return self._verify_executor
+        executor.shutdown(wait=False)
+        return self._verify_executor
+
+    def get_hash_processes(self, workers: int = 0):
+        # the HashProcessPool for hash_engine = processes, None when worker
+        # processes can not be started here
+        if self._shutdown:
+            return None
+        from pyile.lib.runtime.hashing.process_pool import HashProcessPool
+        pool = HashProcessPool.get()
+        if not pool.start(workers):
+            return None
+        with self._lock:
+            if self._shutdown:
+                return None
+            self._hash_processes = pool
+        return pool
+
     def shutdown(self, wait: bool = True) -> None:
         with self._lock:
             self._shutdown = True
@@ -62,4 +120,11 @@ class ExecutorPool(LazyInit):
             if self._backup_executor:
                 self._backup_executor.shutdown(wait=wait)
                 self._backup_executor = None
+            if self._verify_executor:
+                # queued verifications are dropped, their matches stay unverified
+                self._verify_executor.shutdown(wait=wait, cancel_futures=True)
+                self._verify_executor = None
+            if self._hash_processes:
+                self._hash_processes.shutdown(wait=wait)
+                self._hash_processes = None
 
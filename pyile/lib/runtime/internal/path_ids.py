@@ -0,0 +1,62 @@
+from pyile.lib.runtime.internal.constants import PATH_ID_REUSE_DELAY
+from pyile.lib.utils.lazy import LazyInit
+
+import time
+import threading
+from collections import deque
+from typing import List, Dict, Deque, Tuple, Optional
+
+class PathIds(LazyInit):
+    # interns normalized paths to small integers shared by every monitor, so
+    # per path state can be keyed by an int instead of hashing and comparing
+    # the path string again. a path nothing refers to any more is released:
+    # it takes a new id if it comes back, and its old id is handed out again
+    # only after PATH_ID_REUSE_DELAY, when no thread that looked it up before
+    # the release still uses it. ids stay dense, so the arrays indexed by
+    # them only grow with the paths alive at once.
+    __slots__ = ("_ids", "_paths", "_released", "_lock")
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._paths: List[str] = []
+        # (reusable from, id) in release order
+        self._released: Deque[Tuple[float, int]] = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def intern(self, norm_path: str) -> int:
+        # dict reads are atomic, only a new path takes the lock
+        path_id = self._ids.get(norm_path)
+        if path_id is not None:
+            return path_id
+
+        with self._lock:
+            path_id = self._ids.get(norm_path)
+            if path_id is None:
+                released = self._released
+                if released and released[0][0] <= time.monotonic():
+                    path_id = released.popleft()[1]
+                    self._paths[path_id] = norm_path
+                else:
+                    path_id = len(self._paths)
+                    self._paths.append(norm_path)
+                self._ids[norm_path] = path_id
+            return path_id
+
+    def release(self, path_id: int, norm_path: str) -> bool:
+        # False when the path was released already or holds another id
+        with self._lock:
+            if self._ids.get(norm_path) != path_id:
+                return False
+            del self._ids[norm_path]
+            self._released.append((time.monotonic() + PATH_ID_REUSE_DELAY, path_id))
+            return True
+
+    def lookup(self, norm_path: str) -> Optional[int]:
+        return self._ids.get(norm_path)
+
+    def path(self, path_id: int) -> str:
+        # a released id keeps its last path until it is reused
+        return self._paths[path_id]
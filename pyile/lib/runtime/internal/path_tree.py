@@ -0,0 +1,133 @@
+from pyile.lib.runtime.internal.path_ids import PathIds
+from pyile.lib.utils.lazy import LazyInit
+
+import os
+import threading
+from array import array
+from typing import List
+
+_NONE = 0
+_FILE = 1
+_DIR = 2
+
+class PathTree(LazyInit):
+    # the folders above every indexed file, as links between PathIds ids in
+    # flat arrays (parent, first child, next and previous sibling). links
+    # hold id + 1 so zeroed memory means "no link". a folder only exists
+    # while something below it is indexed. add and a file take are O(1) plus
+    # the folders they create or empty, a folder take walks its own subtree
+    # and nothing else, so a folder delete or rename never scans the index.
+    __slots__ = ("_path_ids", "_lock", "_kind", "_parent", "_child", "_next", "_prev", "_files")
+
+    def __init__(self) -> None:
+        self._path_ids = PathIds.get()
+        self._lock = threading.Lock()
+        self._kind = array("B")
+        self._parent = array("I")
+        self._child = array("I")
+        self._next = array("I")
+        self._prev = array("I")
+        self._files = 0
+
+    def _ensure(self, node: int) -> None:
+        size = len(self._kind)
+        if node < size:
+            return
+        grow = max(node + 1 - size, size, 1024)
+        self._kind.frombytes(bytes(grow))
+        for links in (self._parent, self._child, self._next, self._prev):
+            links.frombytes(bytes(links.itemsize * grow))
+
+    def add(self, norm_path: str) -> int:
+        # indexes a file and the folders above it, returns its path id
+        intern = self._path_ids.intern
+        node = intern(norm_path)
+        with self._lock:
+            self._ensure(node)
+            if self._kind[node] == _FILE:
+                return node
+            if self._kind[node] == _DIR:
+                # was a folder the last time something below it was seen
+                self._take_locked(node)
+            self._kind[node] = _FILE
+            self._files += 1
+
+            path, child = norm_path, node
+            while True:
+                parent_path = os.path.dirname(path)
+                if parent_path == path:
+                    break
+                parent = intern(parent_path)
+                self._ensure(parent)
+                self._link(child, parent)
+                known = self._kind[parent]
+                self._kind[parent] = _DIR
+                if known:
+                    break
+                path, child = parent_path, parent
+            return node
+
+    def _link(self, node: int, parent: int) -> None:
+        first = self._child[parent]
+        self._parent[node] = parent + 1
+        self._next[node] = first
+        self._prev[node] = 0
+        if first:
+            self._prev[first - 1] = node + 1
+        self._child[parent] = node + 1
+
+    def _unlink(self, node: int) -> int:
+        # returns the parent node, -1 for a root
+        parent = self._parent[node] - 1
+        nxt, prev = self._next[node], self._prev[node]
+        if prev:
+            self._next[prev - 1] = nxt
+        elif parent >= 0:
+            self._child[parent] = nxt
+        if nxt:
+            self._prev[nxt - 1] = prev
+        self._parent[node] = self._next[node] = self._prev[node] = 0
+        return parent
+
+    def take(self, norm_path: str) -> List[int]:
+        # removes a file, or a folder with everything below it, and returns
+        # the ids of the files that were indexed there
+        node = self._path_ids.lookup(norm_path)
+        if node is None:
+            return []
+        with self._lock:
+            if node >= len(self._kind) or self._kind[node] == _NONE:
+                return []
+            return self._take_locked(node)
+
+    def _take_locked(self, node: int) -> List[int]:
+        parent = self._unlink(node)
+        files: List[int] = []
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if self._kind[n] == _FILE:
+                files.append(n)
+            c = self._child[n]
+            while c:
+                c -= 1
+                stack.append(c)
+                nxt = self._next[c]
+                self._parent[c] = self._next[c] = self._prev[c] = 0
+                c = nxt
+            self._child[n] = 0
+            self._kind[n] = _NONE
+        self._files -= len(files)
+
+        # folders left without anything indexed below them go as well
+        while parent >= 0 and not self._child[parent]:
+            self._kind[parent] = _NONE
+            parent = self._unlink(parent)
+        return files
+
+    def __contains__(self, norm_path: str) -> bool:
+        node = self._path_ids.lookup(norm_path)
+        return node is not None and node < len(self._kind) and self._kind[node] != _NONE
+
+    def __len__(self) -> int:
+        return self._files
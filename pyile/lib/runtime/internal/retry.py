@@ -0,0 +1,106 @@
+from pyile.lib.runtime.internal.thread_safe import SafeThread
+from pyile.lib.runtime.internal.timer_wheel import TimerWheel
+from pyile.lib.runtime.internal.constants import (
+    RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_MAX_ATTEMPTS, RETRY_TICK, RETRY_SLOTS
+)
+from pyile.lib.utils.logging import log_error
+from pyile.lib.utils.lazy import LazyInit
+
+import time
+import random
+import threading
+from typing import Optional, Callable, Dict, Any
+
+class RetryQueue(LazyInit):
+    # delayed retries for files another process still holds open (a copy in
+    # progress locks the target on Windows). nothing waits on a hash worker:
+    # the job hands its path here and returns, the callback runs on the
+    # retry thread once the backoff is over. attempt n waits
+    # RETRY_BASE_DELAY * 2^n capped at RETRY_MAX_DELAY, half of it jittered
+    # so files unlocked together are not retried in lockstep. a key that is
+    # already waiting keeps its deadline and takes the newer callback.
+    __slots__ = (
+        "_wheel", "_callbacks", "_attempts", "_cond", "_thread", "_rng",
+        "scheduled", "fired", "gave_up"
+    )
+
+    def __init__(self) -> None:
+        self._wheel = TimerWheel(RETRY_TICK, RETRY_SLOTS)
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._attempts: Dict[int, int] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[SafeThread] = None
+        self._rng = random.Random()
+        self.scheduled = 0
+        self.fired = 0
+        self.gave_up = 0
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._wheel)
+
+    def __contains__(self, key: int) -> bool:
+        with self._cond:
+            return key in self._wheel
+
+    def delay_for(self, attempt: int) -> float:
+        delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (1 << attempt))
+        return delay / 2 + self._rng.uniform(0, delay / 2)
+
+    def schedule(self, key: int, callback: Callable[[], None]) -> bool:
+        # False once the key ran out of attempts
+        with self._cond:
+            if key in self._wheel:
+                self._callbacks[key] = callback
+                return True
+
+            attempt = self._attempts.get(key, 0)
+            if attempt >= RETRY_MAX_ATTEMPTS:
+                del self._attempts[key]
+                self.gave_up += 1
+                return False
+
+            self._attempts[key] = attempt + 1
+            self._callbacks[key] = callback
+            self._wheel.schedule(key, time.monotonic() + self.delay_for(attempt))
+            self.scheduled += 1
+            if self._thread is None:
+                self._thread = SafeThread.spawn(self._run, thread_name="retry_queue")
+            self._cond.notify()
+            return True
+
+    def succeeded(self, key: int) -> None:
+        # the next failure of key starts from the shortest delay again
+        if key in self._attempts:
+            with self._cond:
+                self._attempts.pop(key, None)
+
+    def cancel(self, key: int) -> bool:
+        with self._cond:
+            self._callbacks.pop(key, None)
+            self._attempts.pop(key, None)
+            return self._wheel.cancel(key)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._wheel:
+                    self._cond.wait()
+                self._cond.wait(self._wheel.tick)
+                ready = [self._callbacks.pop(key) for key in self._wheel.advance(time.monotonic())]
+                self.fired += len(ready)
+
+            for callback in ready:
+                try:
+                    callback()
+                except Exception as e:
+                    log_error(f"Retry callback failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "pending": len(self._wheel),
+                "scheduled": self.scheduled,
+                "fired": self.fired,
+                "gave_up": self.gave_up,
+            }
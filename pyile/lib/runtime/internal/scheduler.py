@@ -0,0 +1,200 @@
+from pyile.lib.runtime.internal.executor_pool import ExecutorPool
+from pyile.lib.runtime.internal.thread_safe import RingBuffer
+from pyile.lib.runtime.internal.constants import (
+    PRIORITY_LIVE, PRIORITY_BULK, PRIORITY_NAMES, SCHED_STARVATION_SECS,
+    SCHED_AGED_SHARE, LATENCY_SAMPLES
+)
+from pyile.lib.utils.lazy import LazyInit
+
+import heapq
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional, Callable, List, Dict, Tuple, Any
+
+class _Task:
+    __slots__ = ("fn", "args", "future", "priority", "size", "seq", "queued_at", "taken")
+
+    def __init__(self, fn: Callable, args: tuple, future: Future, priority: int, size: int, seq: int) -> None:
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.priority = priority
+        self.size = size
+        self.seq = seq
+        self.queued_at = time.monotonic()
+        self.taken = False
+
+
+class HashScheduler(LazyInit):
+    # priority queue in front of the hash executor. every submit queues one
+    # drain call on the executor, a drain call takes whatever task is best
+    # when a worker gets to it: the lowest priority class first (live
+    # events, then rescans, then bulk scans), smallest file first within a
+    # class. a task that waited SCHED_STARVATION_SECS is run out of order on
+    # every SCHED_AGED_SHARE'th pick, so big files and background classes
+    # still move while live events keep flowing. tasks are removed lazily,
+    # a task taken through one index is skipped when the other reaches it.
+    __slots__ = (
+        "_lock", "_heaps", "_fifos", "_tasks", "_seq", "_picks", "_depth",
+        "_submitted", "_started", "_aged", "_waits"
+    )
+
+    def __init__(self) -> None:
+        classes = len(PRIORITY_NAMES)
+        self._lock = threading.Lock()
+        self._heaps: List[List[Tuple[int, int, _Task]]] = [[] for _ in range(classes)]
+        self._fifos: List[deque] = [deque() for _ in range(classes)]
+        self._tasks: Dict[Future, _Task] = {}
+        self._seq = 0
+        self._picks = 0
+
+        self._depth = [0] * classes
+        self._submitted = [0] * classes
+        self._started = [0] * classes
+        self._aged = [0] * classes
+        self._waits = [RingBuffer(LATENCY_SAMPLES) for _ in range(classes)]
+
+    def submit(self, fn: Callable, *args: Any, priority: int = PRIORITY_BULK, size: int = 0) -> Future:
+        # raises RuntimeError once the executor is shut down, like the executor itself
+        executor = ExecutorPool.get().get_hash_executor()
+        if executor is None:
+            raise RuntimeError("hash executor is shut down")
+
+        future: Future = Future()
+        task = self._push(fn, args, future, priority, size)
+        try:
+            executor.submit(self._drain)
+        except RuntimeError:
+            with self._lock:
+                self._take_locked(task)
+            raise
+        return future
+
+    def promote(self, future: Future, priority: int) -> bool:
+        # moves a queued task to a more urgent class, False once it started
+        executor = ExecutorPool.get().get_hash_executor()
+        if executor is None:
+            return False
+
+        with self._lock:
+            task = self._tasks.get(future)
+            if task is None or task.priority <= priority:
+                return False
+            self._take_locked(task)
+        moved = self._push(task.fn, task.args, future, priority, task.size, task.queued_at)
+        try:
+            executor.submit(self._drain)
+        except RuntimeError:
+            with self._lock:
+                self._take_locked(moved)
+            return False
+        return True
+
+    def _push(
+            self,
+            fn: Callable,
+            args: tuple,
+            future: Future,
+            priority: int,
+            size: int,
+            queued_at: Optional[float] = None,
+        ) -> _Task:
+        priority = min(max(priority, PRIORITY_LIVE), len(self._heaps) - 1)
+        with self._lock:
+            self._seq += 1
+            task = _Task(fn, args, future, priority, size, self._seq)
+            if queued_at is not None:
+                # a promoted task keeps its age
+                task.queued_at = queued_at
+            heapq.heappush(self._heaps[priority], (size, task.seq, task))
+            self._fifos[priority].append(task)
+            self._tasks[future] = task
+            self._depth[priority] += 1
+            self._submitted[priority] += 1
+        return task
+
+    def _take_locked(self, task: _Task) -> None:
+        task.taken = True
+        self._depth[task.priority] -= 1
+        if self._tasks.get(task.future) is task:
+            del self._tasks[task.future]
+
+    def _oldest_locked(self) -> Optional[_Task]:
+        oldest = None
+        for fifo in self._fifos:
+            while fifo and fifo[0].taken:
+                fifo.popleft()
+            if fifo and (oldest is None or fifo[0].queued_at < oldest.queued_at):
+                oldest = fifo[0]
+        return oldest
+
+    def _pop(self) -> Optional[_Task]:
+        with self._lock:
+            self._picks += 1
+            task = None
+            if self._picks % SCHED_AGED_SHARE == 0:
+                oldest = self._oldest_locked()
+                if oldest is not None and time.monotonic() - oldest.queued_at >= SCHED_STARVATION_SECS:
+                    task = oldest
+                    self._aged[task.priority] += 1
+
+            if task is None:
+                for heap in self._heaps:
+                    while heap and heap[0][2].taken:
+                        heapq.heappop(heap)
+                    if heap:
+                        task = heapq.heappop(heap)[2]
+                        break
+
+            if task is None:
+                return None
+            self._take_locked(task)
+            return task
+
+    def _drain(self) -> None:
+        while True:
+            task = self._pop()
+            if task is None:
+                # a promoted or failed task already ran on another drain call
+                return
+            if not task.future.set_running_or_notify_cancel():
+                # cancelled while queued, run the next one in its place
+                continue
+
+            with self._lock:
+                self._started[task.priority] += 1
+            self._waits[task.priority].append(time.monotonic() - task.queued_at)
+            try:
+                result = task.fn(*task.args)
+            except BaseException as e:
+                task.future.set_exception(e)
+            else:
+                task.future.set_result(result)
+            return
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(self._depth)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            depth = list(self._depth)
+            submitted = list(self._submitted)
+            started = list(self._started)
+            aged = list(self._aged)
+
+        stats = {}
+        for priority, name in enumerate(PRIORITY_NAMES):
+            p50, p99, worst = self._waits[priority].percentiles(0.5, 0.99, 1.0)
+            stats[name] = {
+                "depth": depth[priority],
+                "submitted": submitted[priority],
+                "started": started[priority],
+                "aged_picks": aged[priority],
+                "wait_p50_ms": p50 * 1000.0,
+                "wait_p99_ms": p99 * 1000.0,
+                "wait_max_ms": worst * 1000.0,
+            }
+        return stats
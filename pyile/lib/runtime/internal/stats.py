@@ -1,4 +1,5 @@
-from pyile.lib.runtime.internal.thread_safe import AtomicCounter, ThreadSafeDict
+from pyile.lib.runtime.internal.thread_safe import AtomicCounter, ThreadSafeDict, RingBuffer
+from pyile.lib.runtime.internal.constants import RESCAN_HISTORY
 from pyile.lib.utils.lazy import LazyInit
 
 import threading
@@ -8,8 +9,11 @@ class GlobalStats(LazyInit):
     def __init__(self) -> None:
         self.file_count = AtomicCounter(0)
         self.match_count = AtomicCounter(0)
-        self.file_hashes = ThreadSafeDict()
+        self.partial_count = AtomicCounter(0)
         self.user_stats = ThreadSafeDict()
+        self.overflow_count = AtomicCounter(0)
+        self.rescan_count = AtomicCounter(0)
+        self.rescan_durations = RingBuffer(RESCAN_HISTORY)
 
         self._lock = threading.RLock()
         # self._lock = threading.Lock()
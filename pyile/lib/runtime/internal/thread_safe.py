@@ -1,8 +1,11 @@
-from pyile.lib.runtime.internal.constants import MAX_CACHE_SIZE, CACHE_TTL
+from pyile.lib.runtime.internal.constants import (
+    MAX_CACHE_SIZE, QUEUE_POLICY_BLOCK, QUEUE_POLICY_COALESCE, QUEUE_POLICIES,
+    QUEUE_WAIT_SAMPLES
+)
 
 import threading
 import time
-from typing import Any, Optional, Iterator, List, Callable
+from typing import Any, Optional, Iterator, List, Callable, Dict, Hashable
 from collections import deque, OrderedDict
 
 class SafeThread(threading.Thread):
@@ -163,69 +166,51 @@ class ThreadSafeDict:
             return list(self._dict.values())
 
 
-class TTLCache:
-    __slots__ = (
-        "_cache", "_timestamps", "_maxsize", "_ttl", 
-        "_lock", "_ttls", "_last_cleanup", "_cleanup_interval"
-    )
-    
+class LRUCache:
+    # least recently used eviction with an optional per cache ttl, expired
+    # entries are dropped lazily when they are looked up
+    __slots__ = ("_data", "_maxsize", "_ttl", "_lock", "hits", "misses")
+
     def __init__(self, maxsize: int = MAX_CACHE_SIZE, ttl: Optional[float] = None):
-        self._cache = {}
-        self._timestamps = OrderedDict()
+        self._data = OrderedDict()
         self._maxsize = maxsize
         self._ttl = ttl
         self._lock = threading.Lock()
-        self._ttls = {}
-        self._last_cleanup = time.monotonic()
-        self._cleanup_interval = 1.0  
+        self.hits = 0
+        self.misses = 0
 
-    def __setitem__(self, key: Any, value: Any) -> None:
-        self.put(key, value)
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
 
     def get(self, key: Any, default: Any = None) -> Any:
         with self._lock:
-            self._maybe_cleanup()
-            try:
-                return self._cache[key]
-            except KeyError:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
                 return default
 
-    def put(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
-        with self._lock:
-            self._maybe_cleanup()
-            if len(self._cache) >= self._maxsize:
-                oldest_key = next(iter(self._timestamps))
-                del self._cache[oldest_key]
-                del self._timestamps[oldest_key]
-                del self._ttls[oldest_key]
-            self._cache[key] = value
-            now = time.monotonic()
-            self._timestamps[key] = now
-            self._timestamps.move_to_end(key)
-            if ttl is not None:
-                self._ttls[key] = ttl
-            else:
-                self._ttls[key] = None 
-
-    def _maybe_cleanup(self) -> None:
-        now = time.monotonic()
-        if (now - self._last_cleanup) > self._cleanup_interval:
-            self._cleanup()
-            self._last_cleanup = now
-
-    def _cleanup(self) -> None:
-        now = time.monotonic()
-        expired_keys = []
-        for key, timestamp in self._timestamps.items():
-            ttl = self._ttls.get(key)
-            if ttl is None:
-                continue
-            if (now - timestamp) > ttl:
-                expired_keys.append(key)
-        for key in expired_keys:
-            del self._cache[key]
-            del self._timestamps[key]
-            del self._ttls[key]
+            value, stored_at = entry
+            if self._ttl is not None and (time.monotonic() - stored_at) > self._ttl:
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            elif len(self._data) >= self._maxsize:
+                self._data.popitem(last=False)
+            self._data[key] = (value, time.monotonic())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
 
 
 class RingBuffer:
@@ -262,6 +247,13 @@ class RingBuffer:
     def snapshot(self) -> List[Any]:
         with self._lock:
             return list(self._buffer)
+
+    def percentiles(self, *quantiles: float) -> List[float]:
+        samples = sorted(self.snapshot())
+        if not samples:
+            return [0.0 for _ in quantiles]
+        last = len(samples) - 1
+        return [samples[min(last, int(len(samples) * q))] for q in quantiles]
     
 
 class ThreadSafeList:
@@ -332,4 +324,146 @@ class ThreadSafeSet:
         with self._lock:
             self._set.clear()
 
-        
\ No newline at end of file
+        
+
+class BoundedEventQueue:
+    # fixed capacity hand off between a producer that must not stall (the notify
+    # reader) and a slower consumer. what happens when it is full depends on policy:
+    #   block        producer waits for space, nothing is lost
+    #   drop_oldest  the oldest queued item is discarded to make room
+    #   coalesce     an item is folded into the most recently queued item
+    #                with the same key when both carry the same tag, when
+    #                full with no match the oldest item is discarded
+    __slots__ = (
+        "_items", "_maxsize", "_policy", "_lock", "_not_empty", "_not_full",
+        "_queued_keys", "_closed", "_waits", "_enqueued", "_dropped",
+        "_coalesced", "_max_depth", "_blocked_secs"
+    )
+
+    def __init__(self, maxsize: int, policy: str = QUEUE_POLICY_BLOCK):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy {policy!r}, expected one of {QUEUE_POLICIES}")
+
+        self._items = deque()
+        self._maxsize = maxsize
+        self._policy = policy
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        # key -> [items queued under it, tag of the most recent one]
+        self._queued_keys: Dict[Hashable, List[Any]] = {}
+        self._closed = False
+
+        self._waits = RingBuffer(QUEUE_WAIT_SAMPLES)
+        self._enqueued = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._max_depth = 0
+        self._blocked_secs = 0.0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    @property
+    def policy(self) -> str:
+        return self._policy
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _pop_oldest(self) -> Any:
+        _, key, item = self._items.popleft()
+        if self._policy == QUEUE_POLICY_COALESCE:
+            queued = self._queued_keys.get(key)
+            if queued is not None:
+                # the oldest goes first, the tag of the most recent stays
+                queued[0] -= 1
+                if queued[0] <= 0:
+                    del self._queued_keys[key]
+        return item
+
+    def put(self, item: Any, key: Optional[Hashable] = None, tag: Optional[Hashable] = None) -> bool:
+        # with coalesce an item only folds into the last one queued under its
+        # key, ADDED, REMOVED, ADDED of one path must stay three items
+        with self._lock:
+            if self._closed:
+                return False
+
+            if self._policy == QUEUE_POLICY_COALESCE and key is not None:
+                queued = self._queued_keys.get(key)
+                if queued is not None and queued[1] == tag:
+                    self._coalesced += 1
+                    return True
+
+            if len(self._items) >= self._maxsize:
+                if self._policy == QUEUE_POLICY_BLOCK:
+                    start = time.monotonic()
+                    while len(self._items) >= self._maxsize and not self._closed:
+                        self._not_full.wait()
+                    self._blocked_secs += time.monotonic() - start
+                    if self._closed:
+                        return False
+                else:
+                    self._pop_oldest()
+                    self._dropped += 1
+
+            self._items.append((time.monotonic(), key, item))
+            if self._policy == QUEUE_POLICY_COALESCE and key is not None:
+                queued = self._queued_keys.get(key)
+                if queued is None:
+                    self._queued_keys[key] = [1, tag]
+                else:
+                    queued[0] += 1
+                    queued[1] = tag
+
+            self._enqueued += 1
+            depth = len(self._items)
+            if depth > self._max_depth:
+                self._max_depth = depth
+
+            self._not_empty.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        with self._lock:
+            if not self._items and not self._closed:
+                self._not_empty.wait(timeout)
+            if not self._items:
+                return None
+
+            queued_at = self._items[0][0]
+            item = self._pop_oldest()
+            self._not_full.notify()
+
+        self._waits.append(time.monotonic() - queued_at)
+        return item
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = self._waits.snapshot()
+        with self._lock:
+            result = {
+                "policy": self._policy,
+                "capacity": self._maxsize,
+                "depth": len(self._items),
+                "max_depth": self._max_depth,
+                "enqueued": self._enqueued,
+                "dropped": self._dropped,
+                "coalesced": self._coalesced,
+                "producer_blocked_secs": self._blocked_secs,
+            }
+
+        p99, worst = self._waits.percentiles(0.99, 1.0)
+        result["wait_avg_ms"] = sum(waits) / len(waits) * 1000.0 if waits else 0.0
+        result["wait_p99_ms"] = p99 * 1000.0
+        result["wait_max_ms"] = worst * 1000.0
+        return result
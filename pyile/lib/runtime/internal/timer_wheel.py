@@ -0,0 +1,94 @@
+import math
+import time
+from typing import List, Dict, Set
+
+class TimerWheel:
+    # hashed timing wheel over integer keys. a deadline is rounded up to a
+    # tick and its key dropped into slot tick % slots, advancing the wheel
+    # only visits the slots of the ticks that passed. pushing a pending key
+    # further out just rewrites its deadline, the key is moved to its new
+    # slot when its old one comes round, so insert, reschedule and expire
+    # are all O(1) per key. not thread safe, callers hold their own lock.
+    __slots__ = ("tick", "_slots", "_mask", "_pending", "_current")
+
+    def __init__(self, tick: float, slots: int) -> None:
+        if slots <= 0 or slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.tick = tick
+        self._slots: List[Set[int]] = [set() for _ in range(slots)]
+        self._mask = slots - 1
+        # key -> [deadline tick, slot it currently sits in]
+        self._pending: Dict[int, List[int]] = {}
+        self._current = self.tick_of(time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._pending
+
+    def tick_of(self, now: float) -> int:
+        return int(now / self.tick)
+
+    def schedule(self, key: int, deadline: float) -> bool:
+        # True when the key was not pending yet
+        due = max(math.ceil(deadline / self.tick), self._current + 1)
+        entry = self._pending.get(key)
+        if entry is not None:
+            entry[0] = due
+            return False
+
+        if not self._pending:
+            # idle wheel, nothing to catch up on
+            self._current = max(self._current, due - 1)
+        slot = due & self._mask
+        self._pending[key] = [due, slot]
+        self._slots[slot].add(key)
+        return True
+
+    def cancel(self, key: int) -> bool:
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return False
+        self._slots[entry[1]].discard(key)
+        return True
+
+    def advance(self, now: float) -> List[int]:
+        # keys whose deadline passed, oldest tick first
+        target = self.tick_of(now)
+        expired: List[int] = []
+        if target <= self._current:
+            return expired
+
+        # after a long stall every slot is visited once, not every tick
+        first = max(self._current + 1, target - self._mask)
+        for t in range(first, target + 1):
+            bucket = self._slots[t & self._mask]
+            if not bucket:
+                continue
+            fired = []
+            for key in list(bucket):
+                entry = self._pending[key]
+                if entry[0] <= target:
+                    del self._pending[key]
+                    bucket.discard(key)
+                    fired.append(key)
+                    continue
+                slot = entry[0] & self._mask
+                if slot != entry[1]:
+                    bucket.discard(key)
+                    self._slots[slot].add(key)
+                    entry[1] = slot
+            # keys of one tick in key order, the same path comes out
+            # lowest action first
+            expired.extend(sorted(fired))
+        self._current = target
+        return expired
+
+    def drain(self) -> List[int]:
+        # every pending key in deadline order, the wheel is left empty
+        keys = sorted(self._pending, key=lambda k: self._pending[k][0])
+        self._pending.clear()
+        for bucket in self._slots:
+            bucket.clear()
+        return keys
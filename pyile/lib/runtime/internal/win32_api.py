@@ -1,4 +1,4 @@
-from pyile.lib.runtime.internal.dataclasses import SECURITY_ATTRIBUTES
+from pyile.lib.runtime.internal.dataclasses import SECURITY_ATTRIBUTES, OVERLAPPED
 
 import ctypes
 from ctypes import wintypes
@@ -35,6 +35,53 @@ ReadDirectoryChangesW.argtypes = [
 ]
 ReadDirectoryChangesW.restype = wintypes.BOOL
 
+GetOverlappedResult = _kernel32.GetOverlappedResult
+GetOverlappedResult.argtypes = [
+    wintypes.HANDLE,
+    ctypes.POINTER(OVERLAPPED),
+    ctypes.POINTER(wintypes.DWORD),
+    wintypes.BOOL
+]
+GetOverlappedResult.restype = wintypes.BOOL
+
+CreateEventW = _kernel32.CreateEventW
+CreateEventW.argtypes = [
+    ctypes.POINTER(SECURITY_ATTRIBUTES),
+    wintypes.BOOL,
+    wintypes.BOOL,
+    wintypes.LPCWSTR
+]
+CreateEventW.restype = wintypes.HANDLE
+
+SetEvent = _kernel32.SetEvent
+SetEvent.argtypes = (wintypes.HANDLE,)
+SetEvent.restype = wintypes.BOOL
+
+CloseHandle = _kernel32.CloseHandle
+CloseHandle.argtypes = (wintypes.HANDLE,)
+CloseHandle.restype = wintypes.BOOL
+
+WaitForSingleObject = _kernel32.WaitForSingleObject
+WaitForSingleObject.argtypes = (wintypes.HANDLE, wintypes.DWORD)
+WaitForSingleObject.restype = wintypes.DWORD
+
+WaitForMultipleObjects = _kernel32.WaitForMultipleObjects
+WaitForMultipleObjects.argtypes = [
+    wintypes.DWORD,
+    ctypes.POINTER(wintypes.HANDLE),
+    wintypes.BOOL,
+    wintypes.DWORD
+]
+WaitForMultipleObjects.restype = wintypes.DWORD
+
+GetCurrentThread = _kernel32.GetCurrentThread
+GetCurrentThread.argtypes = ()
+GetCurrentThread.restype = wintypes.HANDLE
+
+SetThreadPriority = _kernel32.SetThreadPriority
+SetThreadPriority.argtypes = (wintypes.HANDLE, ctypes.c_int)
+SetThreadPriority.restype = wintypes.BOOL
+
 InitializeSecurityDescriptor = _advapi32.InitializeSecurityDescriptor
 InitializeSecurityDescriptor.argtypes = [
     wintypes.LPVOID, 
@@ -1,292 +1,331 @@
-from pyile.lib.utils.common import open_file_rw, write_text, close_fd, join_path, get_username
-from pyile.lib.utils.logging import log_error, log_debug
+from pyile.lib.utils.common import join_path
+from pyile.lib.utils.logging import log_error, log_debug, log_info
 from pyile.lib.runtime.internal.constants import (
-    FILE_LIST_DIRECTORY, FILE_SHARE_READ, FILE_SHARE_DELETE, FILE_SHARE_WRITE, 
-    OPEN_EXISTING, FILE_FLAG_BACKUP_SEMANTICS, FILE_FLAG_OPEN_REPARSE_POINT, 
-    FILE_FLAG_OVERLAPPED, FILE_NOTIFY_FLAGS,  TRANSIENT_ERRORS,  FAST_POLL_INTERVAL, 
-    ERROR_SLEEP_INTERVAL, BUFFER_SIZE, MAX_ERRORS, FILE_READ_ATTRIBUTES, SECURITY_DESCRIPTOR_REVISION
-)
-from pyile.lib.runtime.internal.dataclasses import SECURITY_ATTRIBUTES
-from pyile.lib.runtime.internal.win32_api import (
-    CancelIoEx, InitializeSecurityDescriptor, SetSecurityDescriptorDacl, 
-    CreateFileW, ReadDirectoryChangesW
+    FAST_POLL_INTERVAL, ERROR_SLEEP_INTERVAL, MAX_ERRORS, FILE_ACTION_OVERFLOW,
+    THREAD_TIMEOUT, EVENT_QUEUE_SIZE, EVENT_QUEUE_POLICY,
+    LATENCY_SAMPLES
 )
+from pyile.lib.runtime.internal.thread_safe import BoundedEventQueue, SafeThread, RingBuffer
+from pyile.lib.runtime.monitors.event_source import EventSource, create_event_source
+from pyile.lib.runtime.monitors.coalescer import BatchCoalescer, NetEvent
+from pyile.lib.runtime.monitors.trace import TraceRecorder, make_trace_path
 
-import os
 import time
-import win32file # type: ignore
 import threading
-import ctypes
-from ctypes import wintypes
-from typing import Optional, List, Tuple, Any
-
-def _cancel_pending_read(handle: Any) -> bool:
-    if not handle:
-        return False
-    
-    try:
-        raw = int(getattr(handle, "handle", handle))
-    except Exception:
-        raw = handle
-
-    try:
-        res = CancelIoEx(wintypes.HANDLE(raw), None)
-        if res:
-            return True
-        else:
-            err = ctypes.get_last_error()
-            log_debug(f"kernel32.CancelIoEx returned 0. GetLastError={err}")
-    except Exception as e:
-        log_debug(f"kernel32.CancelIoEx: {e}")
-
-    try:
-        if win32file.CancelIo(handle):
-            return True
-    except Exception as e:
-        log_debug(f"CancelIo failed: {e}")
-        pass
-
-    log_debug(f"Both I/O cancellations failed")
-    return False
+from typing import Optional, List, Tuple, Dict, Any
 
 class BaseMonitor:
     __slots__ = (
-        "path", "log_console", "is_running", "_handle", "_error_count", 
-        "_max_errors", "_handle_lock", "_monitor_symlinks", "_watch_subtree",
-        "_buffer_size", "_buf", "_bytes_returned"
+        "path", "log_console", "is_running", "_source", "_error_count",
+        "_max_errors", "_watch_subtree", "_queue", "_processor", "_coalescer",
+        "_hub", "_ready_at", "_enqueue_latency", "_handler_latency",
+        "_finish_lock", "_finished", "_trace_dir", "_trace",
+        "_coalesce_secs", "_handler_secs"
     )
-    
-    def __init__(self, path: str) -> None:
+
+    def __init__(
+            self, 
+            path: str, 
+            source: Optional[EventSource] = None,
+            queue_size: int = EVENT_QUEUE_SIZE,
+            queue_policy: str = EVENT_QUEUE_POLICY,
+            hub: Optional[Any] = None,
+            trace_dir: Optional[str] = None,
+        ) -> None:
         self.path = path
-        self.is_running = True 
+        self.is_running = True
 
-        self._handle = None
         self._watch_subtree = True
-        self._buffer_size = BUFFER_SIZE
-        self._buf = ctypes.create_string_buffer(self._buffer_size)
-        self._bytes_returned = wintypes.DWORD(0)
+        self._source = source or create_event_source(path, watch_subtree=self._watch_subtree)
+
+        # the reader only parses and enqueues so the kernel buffer is re-armed
+        # straight away, monitor_handle runs on _processor
+        self._queue = BoundedEventQueue(queue_size, queue_policy)
+        self._processor = None
+        self._coalescer = BatchCoalescer()
+
+        # with a hub (see EventHub) the hub thread waits on the source instead
+        # of a thread per root
+        self._hub = hub
+
+        # latency budget, measured from the moment the kernel signalled the
+        # read: to the batch being queued, and to monitor_handle() starting
+        self._ready_at = 0.0
+        self._enqueue_latency = RingBuffer(LATENCY_SAMPLES)
+        self._handler_latency = RingBuffer(LATENCY_SAMPLES)
+
+        # time spent per stage, each written by one thread only
+        self._coalesce_secs = 0.0
+        self._handler_secs = 0.0
+
+        # raw batches are appended to a trace file when a directory is given,
+        # see TraceReader / ReplayEventSource for playing them back
+        self._trace_dir = trace_dir
+        self._trace: Optional[TraceRecorder] = None
+
+        self._finish_lock = threading.Lock()
+        self._finished = False
 
         self._error_count = 0
         self._max_errors = MAX_ERRORS
-        self._handle_lock = threading.Lock()
-        self._monitor_symlinks = False 
-        # self._monitor_symlinks = is_windows_11 # not tested
-    
-    def _get_handle_safe(self) -> Optional[Any]:
-        with self._handle_lock:
-            return self._handle
-        
-    def get_handle(self) -> Optional[Any]:
-        try:
-            desired_access = FILE_LIST_DIRECTORY | FILE_READ_ATTRIBUTES
-            share_mode = FILE_SHARE_READ | FILE_SHARE_WRITE | FILE_SHARE_DELETE
-
-            flags = FILE_FLAG_BACKUP_SEMANTICS | FILE_FLAG_OVERLAPPED
-            if self._monitor_symlinks:
-                flags |= FILE_FLAG_OPEN_REPARSE_POINT
-
-            sd = ctypes.create_string_buffer(20)  
-            if not InitializeSecurityDescriptor(sd, SECURITY_DESCRIPTOR_REVISION):
-                raise ctypes.WinError(ctypes.get_last_error())
-
-            if not SetSecurityDescriptorDacl(sd, True, None, False):
-                raise ctypes.WinError(ctypes.get_last_error())
-
-            sa = SECURITY_ATTRIBUTES()
-            sa.nLength = ctypes.sizeof(SECURITY_ATTRIBUTES)
-            sa.lpSecurityDescriptor = ctypes.cast(sd, wintypes.LPVOID)
-            sa.bInheritHandle = False  
-
-            handle = CreateFileW(
-                self.path,
-                desired_access,
-                share_mode,
-                ctypes.byref(sa),
-                OPEN_EXISTING,
-                flags,
-                None
-            )
-            return handle
-
-        except Exception as e:
-            print(f"Failed to create handle: {e}")
-            return None
 
     def get_changes(self) -> List[Tuple[int, str]]:
-        handle = self._get_handle_safe()
-        if not handle:
+        if not self._source.is_open():
             return []
-        
+
         try:
-            ok = ReadDirectoryChangesW(
-                handle,
-                ctypes.byref(self._buf),
-                self._buffer_size,
-                self._watch_subtree,
-                FILE_NOTIFY_FLAGS,
-                ctypes.byref(self._bytes_returned),
-                None, 
-                None
-            )
-
-            if not ok:
-                raise ctypes.WinError(ctypes.get_last_error())
-
-            return self._parse_results()
-
-        except OSError as e:
-            if hasattr(e, "winerror") and e.winerror in TRANSIENT_ERRORS:
-                log_debug(f"Transient FS error code: {e.winerror}")
+            if not self._source.arm():
+                return []
+            if not self._source.wait(self._pending_timeout()):
+                # a timeout only comes while a rename source is held
+                self.expire_pending(time.monotonic())
                 return []
+            self._ready_at = time.monotonic()
+            return self._source.collect()
+        except OSError:
             raise
         except Exception as e:
             log_error(f"Failed to get changes: {e}")
             self._error_count += 1
             return []
-            
-    def _parse_results(self) -> List[Tuple[int, str]]:
-        results = []
-        offset = 0
-        buf = self._buf.raw
-        bytes_returned = self._bytes_returned.value
-
-        # log_debug(f"FILE_NOTIFY_INFORMATION: {bytes_returned} bytes returned")
-
-        while offset < bytes_returned:
-            try:
-                if offset + 12 > bytes_returned:
-                    log_error(f"Buffer too small for entry at offset {offset}, stopping")
-                    break
 
-                next_offset = int.from_bytes(buf[offset:offset+4], "little")
-                action = int.from_bytes(buf[offset+4:offset+8], "little")
-                name_len = int.from_bytes(buf[offset+8:offset+12], "little")
+    def arm(self) -> bool:
+        return self._source.is_open() and self._source.arm()
 
-                if name_len % 2 != 0 or offset + 12 + name_len > bytes_returned:
-                    log_error(
-                        f"Invalid name length {name_len} at offset {offset}, stopping"
-                    )
-                    break
+    def wait_handle(self) -> Any:
+        return self._source.wait_handle()
 
-                name_bytes = buf[offset+12:offset+12+name_len]
-                name = name_bytes.decode("utf-16le", errors="ignore")
+    def handle_ready(self, ready_at: float) -> bool:
+        # called on the EventHub thread once the source was signalled, False
+        # tells the hub to drop this monitor
+        if not self._can_monitor() or not self._source.is_open():
+            return False
 
-                # log_debug(f"entry at offset {offset}: action={action}, name={name}")
+        try:
+            changes = self._source.collect()
+            if changes:
+                self._dispatch_batch(changes, ready_at)
+                self._error_count = 0
+        except Exception as e:
+            self._error_count += 1
+            log_error(f"Monitor runtime error: {e}")
 
-                results.append((action, name))
+        if not self._can_monitor():
+            return False
 
-                if next_offset == 0:
-                    break
+        try:
+            return self._source.arm()
+        except Exception as e:
+            log_error(f"Failed to re-arm event source for {self.path}: {e}")
+            return False
+
+    def _dispatch_batch(self, changes: List[Tuple[int, str]], ready_at: float) -> None:
+        trace = self._trace
+        if trace is not None:
+            self._record_batch(trace, changes, ready_at)
+
+        overflowed = False
+        batch = []
+        for change in changes:
+            if change[0] == FILE_ACTION_OVERFLOW:
+                overflowed = True
+            else:
+                batch.append(change)
+
+        if overflowed:
+            self.on_overflow()
+
+        # only the net effect per path in this batch goes downstream
+        started = time.perf_counter()
+        net = self._coalescer.coalesce(batch)
+        self._coalesce_secs += time.perf_counter() - started
+
+        self._enqueue(net, ready_at)
+        self._enqueue_latency.append(time.monotonic() - ready_at)
+
+    def _enqueue(self, net: List[NetEvent], ready_at: float) -> None:
+        for action, filename, old_filename in net:
+            if not self.is_running:
+                break
+            self._queue.put((action, filename, old_filename, ready_at), key=filename, tag=(action, old_filename))
 
-                if next_offset <= 0:
-                    log_error(
-                        f"Issue with NextEntryOffset {next_offset} at offset {offset}, stopping"
-                    )
-                    break
+    def pending_deadline(self) -> Optional[float]:
+        # set while the coalescer holds a RENAMED_FROM waiting for its pair
+        return self._coalescer.deadline()
 
-                offset += next_offset
+    def expire_pending(self, now: float) -> None:
+        # runs on the reading thread, the coalescer is never shared
+        net = self._coalescer.expire(now)
+        if net:
+            self._enqueue(net, now)
 
-            except Exception as e:
-                log_error(f"Issue parsing buffer at offset {offset} {e}")
-                break
+    def _pending_timeout(self) -> Optional[float]:
+        deadline = self._coalescer.deadline()
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
 
-        return results
+    def _record_batch(self, trace: TraceRecorder, changes: List[Tuple[int, str]], ready_at: float) -> None:
+        try:
+            trace.record(changes, ready_at)
+        except Exception as e:
+            log_error(f"Trace recording stopped for {self.path}: {e}")
+            self._close_trace()
 
-    def _safe_close_handle(self) -> None:
-        handle = self._get_handle_safe()
-        if not handle:
+    def _open_trace(self) -> None:
+        if not self._trace_dir:
             return
         try:
-            win32file.CloseHandle(handle)
-        except Exception:
-            pass
-        finally:
-            self._handle = None
-
-    def monitor_handle(self, path_filename: str, action: int, username: Optional[str] = None) -> None:
+            self._trace = TraceRecorder(make_trace_path(self._trace_dir, self.path), self.path)
+            log_info(f"Recording event trace for {self.path} to {self._trace.path}")
+        except Exception as e:
+            log_error(f"Failed to start event trace for {self.path}: {e}")
+
+    def _close_trace(self) -> None:
+        trace, self._trace = self._trace, None
+        if trace is not None:
+            trace.close()
+
+    def monitor_handle(
+            self, 
+            path_filename: str, 
+            action: int, 
+            username: Optional[str] = None, 
+            old_path: Optional[str] = None
+    ) -> None:
         raise NotImplementedError("monitor_handle must be implemented by subclass")
 
+    def on_overflow(self) -> None:
+        # events between the last read and this one are gone, subclasses
+        # should reconcile whatever state they keep for the root
+        log_error(f"Event buffer overflow on {self.path}, changes were lost")
+
+    def queue_stats(self) -> Dict[str, Any]:
+        stats = self._queue.stats()
+        stats["raw_events"] = self._coalescer.raw_events
+        stats["net_events"] = self._coalescer.net_events
+
+        enqueue_p99, = self._enqueue_latency.percentiles(0.99)
+        p50, p99, worst = self._handler_latency.percentiles(0.5, 0.99, 1.0)
+        stats["latency_samples"] = len(self._handler_latency)
+        stats["enqueue_p99_ms"] = enqueue_p99 * 1000.0
+        stats["latency_p50_ms"] = p50 * 1000.0
+        stats["latency_p99_ms"] = p99 * 1000.0
+        stats["latency_max_ms"] = worst * 1000.0
+        stats["coalesce_secs"] = self._coalesce_secs
+        stats["handler_secs"] = self._handler_secs
+        return stats
+
+    def on_stopped(self) -> None:
+        # runs once, after the processor has drained
+        pass
+
+    def _process_loop(self) -> None:
+        while self.is_running:
+            # close() wakes this up, no need for a poll timeout
+            item = self._queue.get()
+            if item is None:
+                if self._queue.closed:
+                    break
+                continue
+
+            action, filename, old_filename, ready_at = item
+            self._handler_latency.append(time.monotonic() - ready_at)
+            path_filename = join_path(self.path, filename)
+            old_path = join_path(self.path, old_filename) if old_filename else None
+
+            # owners are resolved asynchronously by the subclass, see AttributionWorker
+            started = time.perf_counter()
+            try:
+                self.monitor_handle(path_filename, action, old_path=old_path)
+            except Exception as e:
+                log_error(f"Monitor processing error for {path_filename}: {e}")
+            self._handler_secs += time.perf_counter() - started
+
     def _can_monitor(self) -> bool:
         return bool(self.is_running) and int(self._error_count) < self._max_errors
-    
-    def main(self) -> None:
+
+    def _open(self) -> bool:
         try:
-            self._handle = self.get_handle()
+            if not self._source.open():
+                log_error(f"Failed to open event source for {self.path}")
+                return False
         except Exception as e:
             log_error(f"Failed to obtain handle: {e}")
-            return
+            return False
+        return True
 
-        while self._can_monitor():
-            handle = self._get_handle_safe()
-            if not handle:
-                break
+    def _finish(self) -> None:
+        with self._finish_lock:
+            if self._finished:
+                return
+            self._finished = True
 
-            try:
-                changes = self.get_changes()
-                if not changes:
-                    time.sleep(FAST_POLL_INTERVAL)
-                    continue
+        self._close_trace()
+        self._queue.close()
+        if self._processor is not None:
+            # a source that ran dry (a replayed trace) drains the queue, stop() does not wait
+            self._processor.join(timeout=None if self.is_running else THREAD_TIMEOUT)
 
-                for action, filename in changes:
-                    if not self.is_running:
-                        break
+        try:
+            self.on_stopped()
+        except Exception as e:
+            log_error(f"Monitor stop hook failed for {self.path}: {e}")
 
-                    path_filename = join_path(self.path, filename)
-                    username = None
-                    try:
-                        username = get_username(path_filename)
-                    except Exception as e:
-                        log_debug(f"Failed to fetch username for {path_filename}: {e}")
-                        username = "Unknown"
-                    
-                    self.monitor_handle(path_filename, action, username=username)
-                
-                self._error_count = 0
-            except Exception as e:
-                self._error_count += 1
-                log_error(f"Monitor runtime error: {e}")
-                if not self.is_running:
-                    break
-                time.sleep(ERROR_SLEEP_INTERVAL)
+    def main(self) -> None:
+        if not self._open():
+            self._finish()
+            return
+
+        self._open_trace()
+        self._processor = SafeThread.spawn(self._process_loop, thread_name=f"processor_{self.path}")
 
-    def _nudge(self) -> None:
-        # CancelIoEx should be fully fixed now on all windows version.
-        # this should almost never trigger now
+        if self._hub is not None and self._hub.register(self):
+            # the hub thread reads from here on, stop() finishes the monitor
+            return
 
-        # HACK: writing a temp file and then removing it within the monitored(s) dirs
-        # this unblocks the blocking call of ReadDirectoryChangesW and allows for fast shutdowns
-        df = join_path(self.path, "~.MGSuj$_nudge.tmp")
         try:
-            fd = open_file_rw(df, extra_flags=os.O_TRUNC)
-            if fd is not None:
-                write_text(fd, "0") 
-                close_fd(fd)
-                os.unlink(df)
-        except Exception:
-            pass
+            while self._can_monitor():
+                if not self._source.is_open():
+                    break
+
+                try:
+                    # blocks until the kernel completes a read or stop() cancels it
+                    changes = self.get_changes()
+                    if not changes:
+                        continue
+
+                    self._dispatch_batch(changes, self._ready_at)
+                    self._error_count = 0
+                except Exception as e:
+                    self._error_count += 1
+                    log_error(f"Monitor runtime error: {e}")
+                    if not self.is_running:
+                        break
+                    time.sleep(ERROR_SLEEP_INTERVAL)
+        finally:
+            self._finish()
 
     def stop(self) -> None:
         self.is_running = False
-        cancel_success = False
+        self._queue.close()
 
-        # handle = self._handle # no lock grabbing here
-        handle = self._get_handle_safe()
-        if handle:
-            try:
-                cancel_success = _cancel_pending_read(handle)
-            except Exception as e:
-                log_debug(f"_cancel_pending_read threw: {e}")
+        if self._hub is not None:
+            self._hub.unregister(self)
 
-        if not cancel_success:
-            log_debug("I/O cancellation failed — ReadDirectoryChangesW may still be blocking")
-            self._nudge()
+        try:
+            self._source.cancel()
+        except Exception as e:
+            log_debug(f"Event source cancel threw: {e}")
 
+        # give a reader blocked in wait() the chance to return before the
+        # handle goes away
         time.sleep(FAST_POLL_INTERVAL)
 
         try:
-            self._safe_close_handle()
+            self._source.close()
             log_debug("Handle closed (stop completed)")
         except Exception as e:
             log_error(f"Failed to close handle during stop(): {e}")
 
-  
\ No newline at end of file
+        self._finish()
@@ -0,0 +1,230 @@
+from pyile.lib.runtime.internal.constants import (
+    FILE_ACTION_ADDED, FILE_ACTION_REMOVED, FILE_ACTION_MODIFIED,
+    FILE_RENAMED_FROM, FILE_RENAMED_TO, RENAME_PAIR_TIMEOUT
+)
+
+import time
+from typing import Optional, List, Tuple, Dict, Set
+
+NetEvent = Tuple[int, str, Optional[str]]
+
+class _PathState:
+    __slots__ = ("order", "name", "action", "renamed_from")
+
+    def __init__(self, order: int, name: str) -> None:
+        self.order = order
+        self.name = name
+        # None means nothing observable happened to the content
+        self.action: Optional[int] = None
+        self.renamed_from: Optional[str] = None
+
+
+class BatchCoalescer:
+    # folds one get_changes() batch into a single net effect per path:
+    #   ADDED      created (including created then renamed)
+    #   MODIFIED   content changed (including deleted and created again)
+    #   REMOVED    deleted (including renamed then deleted, reported on the old name)
+    #   RENAMED_TO renamed, the old name travels with the event
+    #   nothing    created and deleted, or renamed back, inside the batch
+    # renames that go round in a circle (a swap through a temp name) come
+    # out as REMOVED + MODIFIED on every name in it. a RENAMED_FROM that
+    # ends a batch is held for the next one, its RENAMED_TO usually arrives
+    # in the following read. expire() gives it up after RENAME_PAIR_TIMEOUT.
+    __slots__ = ("_pending_from", "_pending_at", "raw_events", "net_events")
+
+    def __init__(self) -> None:
+        self._pending_from: Optional[_PathState] = None
+        self._pending_at = 0.0
+        self.raw_events = 0
+        self.net_events = 0
+
+    def coalesce(self, batch: List[Tuple[int, str]]) -> List[NetEvent]:
+        states: Dict[str, _PathState] = {}
+        order = 0
+        pending = carried = self._pending_from
+        self._pending_from = None
+        if pending is not None:
+            # carried over from the previous batch, it happened before anything here
+            pending.order = -1
+
+        def state_for(name: str) -> _PathState:
+            nonlocal order
+            st = states.get(name)
+            if st is None:
+                st = _PathState(order, name)
+                states[name] = st
+                order += 1
+            return st
+
+        def flush_pending() -> None:
+            # a rename source without its target was moved out of the watched tree
+            nonlocal pending
+            if pending is None:
+                return
+            self._apply_removed(pending)
+            self._settle_removed(pending, states)
+            pending = None
+
+        for action, name in batch:
+            self.raw_events += 1
+
+            if action == FILE_RENAMED_TO:
+                if pending is None:
+                    # moved in from outside the watched tree
+                    self._apply_added(state_for(name))
+                    continue
+                self._apply_rename(pending, name, states, order)
+                order += 1
+                pending = None
+                continue
+
+            flush_pending()
+
+            if action == FILE_RENAMED_FROM:
+                st = states.pop(name, None)
+                if st is None:
+                    st = _PathState(order, name)
+                    order += 1
+                pending = st
+            elif action == FILE_ACTION_ADDED:
+                self._apply_added(state_for(name))
+            elif action == FILE_ACTION_MODIFIED:
+                st = state_for(name)
+                if st.action is None or st.action == FILE_ACTION_REMOVED:
+                    st.action = FILE_ACTION_MODIFIED
+            elif action == FILE_ACTION_REMOVED:
+                st = state_for(name)
+                self._apply_removed(st)
+                if st.name != name:
+                    del states[name]
+                    self._settle_removed(st, states)
+                elif st.action is None:
+                    del states[name]
+            else:
+                state_for(name).action = action
+
+        if pending is not None and (pending.renamed_from or pending.name) in states:
+            # its original name is taken again in this batch, pairing it with
+            # a later RENAMED_TO would move the new content, a target that
+            # shows up later is treated as moved in from outside
+            flush_pending()
+
+        self._pending_from = pending
+        if pending is not None and pending is not carried:
+            self._pending_at = time.monotonic()
+
+        depth, cycled = self._rename_depths(states)
+        results: List[NetEvent] = []
+        for st in sorted(states.values(), key=lambda s: (depth[s.name], s.order)):
+            if st.name in cycled:
+                results.append((FILE_ACTION_REMOVED, st.name, None))
+                results.append((FILE_ACTION_MODIFIED, st.name, None))
+            elif st.renamed_from is not None:
+                results.append((FILE_RENAMED_TO, st.name, st.renamed_from))
+                if st.action == FILE_ACTION_MODIFIED:
+                    results.append((FILE_ACTION_MODIFIED, st.name, None))
+            elif st.action is not None:
+                results.append((st.action, st.name, None))
+
+        self.net_events += len(results)
+        return results
+
+    def deadline(self) -> Optional[float]:
+        # monotonic time at which the held RENAMED_FROM expires
+        if self._pending_from is None:
+            return None
+        return self._pending_at + RENAME_PAIR_TIMEOUT
+
+    def expire(self, now: float) -> List[NetEvent]:
+        # called by the reader between batches, a rename source whose target
+        # never showed up was moved out of the watched tree
+        pending = self._pending_from
+        if pending is None or now < self._pending_at + RENAME_PAIR_TIMEOUT:
+            return []
+        self._pending_from = None
+        self._apply_removed(pending)
+        if pending.action is None:
+            return []
+        self.net_events += 1
+        return [(pending.action, pending.name, None)]
+
+    def _rename_depths(self, states: Dict[str, _PathState]) -> Tuple[Dict[str, int], Set[str]]:
+        # downstream forgets whatever a rename target held, so a path another
+        # rename moved away from has to be reported after that rename. the
+        # depth is how many renames have to go first. renames that chase each
+        # other round a circle can not be put in order, they are returned as
+        # cycled and reported as plain content changes
+        by_origin = {st.renamed_from: st for st in states.values() if st.renamed_from is not None}
+        depth: Dict[str, int] = {}
+        cycled: Set[str] = set()
+        for st in states.values():
+            chain: List[_PathState] = []
+            cur: Optional[_PathState] = st
+            while cur is not None and cur.name not in depth:
+                if cur in chain:
+                    for member in chain[chain.index(cur):]:
+                        member.renamed_from = None
+                        member.action = FILE_ACTION_MODIFIED
+                        depth[member.name] = 0
+                        cycled.add(member.name)
+                    del chain[chain.index(cur):]
+                    break
+                chain.append(cur)
+                cur = by_origin.get(cur.name)
+
+            level = depth[cur.name] + 1 if cur is not None else 0
+            for member in reversed(chain):
+                depth[member.name] = level
+                level += 1
+        return depth, cycled
+
+    def _settle_removed(self, st: _PathState, states: Dict[str, _PathState]) -> None:
+        # st was renamed away and then deleted, _apply_removed moved it back
+        # to its original name. that name may have been taken again since,
+        # its state is what the path holds now and must not be overwritten
+        live = states.get(st.name)
+        if live is None:
+            if st.action is not None:
+                states[st.name] = st
+            return
+        if live.renamed_from is None:
+            if live.action == FILE_ACTION_ADDED:
+                # the old content is gone, the path lives on with new content
+                live.action = FILE_ACTION_MODIFIED
+            elif live.action is None:
+                live.action = st.action
+
+    def _apply_added(self, st: _PathState) -> None:
+        if st.action == FILE_ACTION_REMOVED:
+            # deleted and created again, the path survived with new content
+            st.action = FILE_ACTION_MODIFIED
+        elif st.action is None:
+            st.action = FILE_ACTION_ADDED
+
+    def _apply_removed(self, st: _PathState) -> None:
+        if st.renamed_from is not None:
+            # renamed then deleted, report it against the name downstream knows
+            st.name = st.renamed_from
+            st.renamed_from = None
+            st.action = FILE_ACTION_REMOVED
+        elif st.action == FILE_ACTION_ADDED:
+            st.action = None
+        else:
+            st.action = FILE_ACTION_REMOVED
+
+    def _apply_rename(self, source: _PathState, new_name: str, states: Dict[str, _PathState], order: int) -> None:
+        target = _PathState(order, new_name)
+        if source.action == FILE_ACTION_ADDED:
+            target.action = FILE_ACTION_ADDED
+        else:
+            origin = source.renamed_from or source.name
+            if origin != new_name:
+                target.renamed_from = origin
+            if source.action == FILE_ACTION_MODIFIED:
+                target.action = FILE_ACTION_MODIFIED
+
+        replaced = states.get(new_name)
+        if replaced is not None and replaced.action == FILE_ACTION_REMOVED:
+            # save by rename over the original, the path now holds new content
+            target.action = FILE_ACTION_MODIFIED
+        states[new_name] = target
@@ -0,0 +1,117 @@
+from pyile.lib.runtime.internal.thread_safe import SafeThread
+from pyile.lib.runtime.internal.timer_wheel import TimerWheel
+from pyile.lib.runtime.internal.constants import DEBOUNCE_TICK, DEBOUNCE_SLOTS, THREAD_TIMEOUT
+from pyile.lib.utils.logging import log_error
+
+import time
+import threading
+from typing import Optional, Callable, List, Dict, Tuple, Any
+
+class Debouncer:
+    # trailing edge debounce: push() (re)starts a quiet period for its key
+    # and only the payload of the last push is handed to emit() once no push
+    # came for `quiet` seconds. keys are ints (see PathIds), emit runs on the
+    # debouncer thread which only runs while something is pending.
+    __slots__ = (
+        "quiet", "_emit", "_name", "_wheel", "_payloads", "_cond", "_thread",
+        "_closed", "pushed", "emitted"
+    )
+
+    def __init__(
+            self,
+            quiet: float,
+            emit: Callable[[int, Any], None],
+            name: str = "debouncer",
+            tick: float = DEBOUNCE_TICK,
+            slots: int = DEBOUNCE_SLOTS,
+        ) -> None:
+        self.quiet = quiet
+        self._emit = emit
+        self._name = name
+        self._wheel = TimerWheel(tick, slots)
+        self._payloads: Dict[int, Any] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[SafeThread] = None
+        self._closed = False
+        self.pushed = 0
+        self.emitted = 0
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._wheel)
+
+    def __contains__(self, key: int) -> bool:
+        with self._cond:
+            return key in self._wheel
+
+    def push(self, key: int, payload: Any = None) -> bool:
+        with self._cond:
+            if self._closed:
+                return False
+            self.pushed += 1
+            self._payloads[key] = payload
+            if self._wheel.schedule(key, time.monotonic() + self.quiet):
+                if self._thread is None:
+                    self._thread = SafeThread.spawn(self._run, thread_name=self._name)
+                self._cond.notify()
+            return True
+
+    def extend(self, key: int) -> bool:
+        # restarts the quiet period of a pending key, keeps its payload
+        with self._cond:
+            if self._closed or key not in self._wheel:
+                return False
+            self._wheel.schedule(key, time.monotonic() + self.quiet)
+            return True
+
+    def cancel(self, key: int) -> bool:
+        with self._cond:
+            self._payloads.pop(key, None)
+            return self._wheel.cancel(key)
+
+    def _run(self) -> None:
+        tick = self._wheel.tick
+        while True:
+            with self._cond:
+                while not self._wheel and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                self._cond.wait(tick)
+                ready = self._take(self._wheel.advance(time.monotonic()))
+            self._fire(ready)
+
+    def _take(self, keys: List[int]) -> List[Tuple[int, Any]]:
+        return [(key, self._payloads.pop(key, None)) for key in keys]
+
+    def _fire(self, ready: List[Tuple[int, Any]]) -> None:
+        for key, payload in ready:
+            self.emitted += 1
+            try:
+                self._emit(key, payload)
+            except Exception as e:
+                log_error(f"Debounced emit failed for key {key}: {e}")
+
+    def close(self, flush: bool = False) -> None:
+        # flush emits what is still pending on the calling thread instead of dropping it
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            ready = self._take(self._wheel.drain())
+            self._cond.notify_all()
+            thread = self._thread
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=THREAD_TIMEOUT)
+        if flush:
+            self._fire(ready)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "pushed": self.pushed,
+                "emitted": self.emitted,
+                "pending": len(self._wheel),
+                "quiet_ms": self.quiet * 1000.0,
+            }
@@ -0,0 +1,294 @@
+from pyile.lib.utils.logging import log_error, log_debug, log_info
+from pyile.lib.runtime.internal.thread_safe import SafeThread
+from pyile.lib.runtime.internal.constants import (
+    HUB_OP_TIMEOUT, MAXIMUM_WAIT_OBJECTS, INFINITE, WAIT_OBJECT_0, WAIT_FAILED,
+    WAIT_TIMEOUT
+)
+
+import os
+import time
+import threading
+from typing import Optional, List, Tuple, Dict, Any
+
+class _SelectorWaiter:
+    # inotify fds plus a wake pipe in one epoll / kqueue / select set
+    __slots__ = ("_selector", "_wake_r", "_wake_w")
+
+    capacity: Optional[int] = None
+
+    def __init__(self) -> None:
+        import selectors
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+    def add(self, monitor: Any) -> None:
+        import selectors
+        self._selector.register(monitor.wait_handle(), selectors.EVENT_READ, monitor)
+
+    def remove(self, monitor: Any, handle: Any) -> None:
+        try:
+            self._selector.unregister(handle)
+        except (KeyError, ValueError):
+            pass
+
+    def wait(self, timeout: Optional[float] = None) -> List[Any]:
+        ready = []
+        for key, _ in self._selector.select(timeout):
+            if key.data is None:
+                try:
+                    os.read(self._wake_r, 64)
+                except OSError:
+                    pass
+                continue
+            ready.append(key.data)
+        return ready
+
+    def wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"\0")
+        except (BlockingIOError, OSError):
+            # a full pipe already guarantees a wake up
+            pass
+
+    def close(self) -> None:
+        self._selector.close()
+        for fd in (self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class _Win32Waiter:
+    # WaitForMultipleObjects on the overlapped read events. it only reports the
+    # lowest signalled index, every other handle is polled after a wake up so a
+    # busy root can not starve the ones registered after it.
+    __slots__ = ("_wake", "_monitors", "_handles")
+
+    capacity: Optional[int] = MAXIMUM_WAIT_OBJECTS - 1
+
+    def __init__(self) -> None:
+        from pyile.lib.runtime.internal.win32_api import CreateEventW
+        import ctypes
+        self._wake = CreateEventW(None, False, False, None)
+        if not self._wake:
+            raise ctypes.WinError(ctypes.get_last_error())
+        self._monitors: List[Any] = []
+        self._handles = None
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        from ctypes import wintypes
+        handles = [self._wake] + [m.wait_handle() for m in self._monitors]
+        self._handles = (wintypes.HANDLE * len(handles))(*handles)
+
+    def add(self, monitor: Any) -> None:
+        self._monitors.append(monitor)
+        self._rebuild()
+
+    def remove(self, monitor: Any, handle: Any) -> None:
+        try:
+            self._monitors.remove(monitor)
+        except ValueError:
+            return
+        self._rebuild()
+
+    def wait(self, timeout: Optional[float] = None) -> List[Any]:
+        from pyile.lib.runtime.internal.win32_api import WaitForMultipleObjects, WaitForSingleObject
+        import ctypes
+
+        millis = INFINITE if timeout is None else int(timeout * 1000)
+        rc = WaitForMultipleObjects(len(self._handles), self._handles, False, millis)
+        if rc == WAIT_FAILED:
+            raise ctypes.WinError(ctypes.get_last_error())
+        if rc == WAIT_TIMEOUT:
+            return []
+
+        return [
+            m for i, m in enumerate(self._monitors, start=1)
+            if rc == WAIT_OBJECT_0 + i or WaitForSingleObject(self._handles[i], 0) == WAIT_OBJECT_0
+        ]
+
+    def wake(self) -> None:
+        from pyile.lib.runtime.internal.win32_api import SetEvent
+        SetEvent(self._wake)
+
+    def close(self) -> None:
+        from pyile.lib.runtime.internal.win32_api import CloseHandle
+        if self._wake:
+            CloseHandle(self._wake)
+            self._wake = None
+
+
+class EventHub:
+    # one thread blocking on the event sources of many monitors. every source
+    # is armed up front, the wait returns only once the kernel signalled a
+    # completed read (or a registration changed) so idle roots cost nothing.
+    # a ready monitor collects its batch, enqueues it and re-arms in
+    # handle_ready(), the processing itself stays on the monitor's processor.
+    # registrations are applied by the hub thread between waits, on Windows a
+    # handle must never be closed while WaitForMultipleObjects holds it.
+    __slots__ = (
+        "name", "_lock", "_waiter", "_monitors", "_ops",
+        "_is_running", "_thread_ident", "_wakeups"
+    )
+
+    def __init__(self, name: str = "event_hub") -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._waiter = _Win32Waiter() if os.name == "nt" else _SelectorWaiter()
+        self._monitors: Dict[Any, Any] = {}
+        # (op, monitor, done, [result]) waiting for the hub thread
+        self._ops: List[Tuple[str, Any, threading.Event, List[bool]]] = []
+        self._is_running = False
+        self._thread_ident = None
+        self._wakeups = 0
+
+    def is_full(self) -> bool:
+        capacity = self._waiter.capacity
+        with self._lock:
+            return capacity is not None and len(self._monitors) + len(self._ops) >= capacity
+
+    def register(self, monitor: Any) -> bool:
+        # False when the hub can not take the monitor, it then reads on its own thread
+        if self.is_full():
+            return False
+        try:
+            if not monitor.arm():
+                return False
+        except Exception as e:
+            log_error(f"Failed to arm event source for {monitor.path}: {e}")
+            return False
+        return self._submit("add", monitor)
+
+    def unregister(self, monitor: Any) -> None:
+        self._submit("remove", monitor)
+
+    def _submit(self, op: str, monitor: Any) -> bool:
+        # the result of _apply, False when the hub thread did not get to it in time
+        done = threading.Event()
+        result = [False]
+        with self._lock:
+            inline = not self._is_running or self._thread_ident == threading.get_ident()
+            if not inline:
+                self._ops.append((op, monitor, done, result))
+
+        if inline:
+            with self._lock:
+                return self._apply(op, monitor)
+
+        self._waiter.wake()
+        if not done.wait(timeout=HUB_OP_TIMEOUT):
+            log_error(f"{self.name}: {op} for {monitor.path} timed out")
+            return False
+        return result[0]
+
+    def _apply(self, op: str, monitor: Any) -> bool:
+        # caller holds _lock. a failed add leaves the waiter as it was
+        if op == "add":
+            if monitor in self._monitors:
+                return True
+            handle = None
+            try:
+                handle = monitor.wait_handle()
+                self._waiter.add(monitor)
+                self._monitors[monitor] = handle
+                log_debug(f"{self.name}: watching {monitor.path}")
+                return True
+            except Exception as e:
+                log_error(f"{self.name}: failed to add {monitor.path}: {e}")
+                try:
+                    self._waiter.remove(monitor, handle)
+                except Exception:
+                    pass
+                return False
+
+        handle = self._monitors.pop(monitor, None)
+        if handle is not None:
+            self._waiter.remove(monitor, handle)
+        return True
+
+    def _apply_pending(self) -> None:
+        with self._lock:
+            ops, self._ops = self._ops, []
+            for op, monitor, _, result in ops:
+                result[0] = self._apply(op, monitor)
+        for _, _, done, _ in ops:
+            done.set()
+
+    def _drop(self, monitor: Any) -> None:
+        with self._lock:
+            self._apply("remove", monitor)
+        # stop() closes the source and finishes the monitor, it calls back into
+        # unregister which is a no-op by then
+        SafeThread.spawn(monitor.stop, thread_name=f"{self.name}_drop")
+
+    def _next_deadline(self) -> Optional[float]:
+        with self._lock:
+            monitors = list(self._monitors)
+        deadlines = [d for d in (m.pending_deadline() for m in monitors) if d is not None]
+        return min(deadlines) if deadlines else None
+
+    def _expire_pending(self, now: float) -> None:
+        with self._lock:
+            monitors = list(self._monitors)
+        for monitor in monitors:
+            try:
+                monitor.expire_pending(now)
+            except Exception as e:
+                log_error(f"{self.name}: failed to expire held events for {monitor.path}: {e}")
+
+    def run(self) -> None:
+        with self._lock:
+            self._is_running = True
+            self._thread_ident = threading.get_ident()
+        log_info(f"{self.name} started")
+
+        try:
+            while True:
+                self._apply_pending()
+                with self._lock:
+                    if not self._is_running:
+                        break
+
+                # only a held rename source puts a limit on the wait
+                deadline = self._next_deadline()
+                try:
+                    ready = self._waiter.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+                except Exception as e:
+                    log_error(f"{self.name} wait failed: {e}")
+                    break
+
+                ready_at = time.monotonic()
+                self._wakeups += 1
+                for monitor in ready:
+                    if not monitor.handle_ready(ready_at):
+                        self._drop(monitor)
+                if deadline is not None:
+                    self._expire_pending(time.monotonic())
+        finally:
+            with self._lock:
+                self._is_running = False
+                self._thread_ident = None
+            # anything submitted after the last wait is applied here, nobody waits forever
+            self._apply_pending()
+            with self._lock:
+                monitors = list(self._monitors)
+            log_info(f"{self.name} stopped with {len(monitors)} roots attached, {self._wakeups} wake ups")
+            self._waiter.close()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._is_running = False
+        self._waiter.wake()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "roots": len(self._monitors),
+                "running": self._is_running,
+                "wakeups": self._wakeups,
+            }
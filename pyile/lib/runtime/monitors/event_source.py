@@ -0,0 +1,60 @@
+import os
+from typing import Optional, List, Tuple, Any
+
+class EventSource:
+    # an event source owns the OS watch on a single root and hands back batches
+    # of (action, relative_name) tuples. actions are always the FILE_ACTION_* /
+    # FILE_RENAMED_* values so everything downstream of BaseMonitor stays the same
+    # regardless of which kernel API produced the batch.
+    __slots__ = ("path", "watch_subtree")
+
+    def __init__(self, path: str, watch_subtree: bool = True) -> None:
+        self.path = path
+        self.watch_subtree = watch_subtree
+
+    def open(self) -> bool:
+        raise NotImplementedError("open must be implemented by subclass")
+
+    def is_open(self) -> bool:
+        raise NotImplementedError("is_open must be implemented by subclass")
+
+    # a read is split in three steps so one thread can wait on many sources:
+    #   arm()         start the asynchronous read if the API needs one
+    #   wait_handle() what the kernel signals once the read completed, an
+    #                 fd (inotify) or an event HANDLE (overlapped win32 read)
+    #   collect()     hand back whatever completed, never blocks
+    # read_changes() runs the three steps back to back for a single root.
+
+    def arm(self) -> bool:
+        return self.is_open()
+
+    def wait_handle(self) -> Any:
+        raise NotImplementedError("wait_handle must be implemented by subclass")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        # True once wait_handle() is signalled, False on timeout or cancel()
+        raise NotImplementedError("wait must be implemented by subclass")
+
+    def collect(self) -> List[Tuple[int, str]]:
+        raise NotImplementedError("collect must be implemented by subclass")
+
+    def read_changes(self) -> List[Tuple[int, str]]:
+        if not self.arm() or not self.wait():
+            return []
+        return self.collect()
+
+    def cancel(self) -> bool:
+        # unblocks a pending wait() from another thread
+        return False
+
+    def close(self) -> None:
+        raise NotImplementedError("close must be implemented by subclass")
+
+
+def create_event_source(path: str, watch_subtree: bool = True) -> EventSource:
+    if os.name == "nt":
+        from pyile.lib.runtime.monitors.win32_source import Win32EventSource
+        return Win32EventSource(path, watch_subtree=watch_subtree)
+
+    from pyile.lib.runtime.monitors.inotify_source import InotifyEventSource
+    return InotifyEventSource(path, watch_subtree=watch_subtree)
@@ -1,31 +1,71 @@
 from pyile.lib.runtime.monitors.base_monitor import BaseMonitor
+from pyile.lib.runtime.monitors.event_source import EventSource
+from pyile.lib.runtime.monitors.event_hub import EventHub
 from pyile.lib.runtime.internal.constants import (
-    FILE_ACTION_ADDED, FILE_ACTION_REMOVED, DEBOUNCE_WINDOW,
+    FILE_ACTION_ADDED, FILE_ACTION_REMOVED, DEBOUNCE_QUIET_MS,
     FILE_ACTION_MODIFIED, FILE_RENAMED_FROM, FILE_RENAMED_TO,
-    SYSTEM_EXTENSIONS, TEMP_EXTENSIONS, CHUNK_SIZE
+    SYSTEM_EXTENSIONS, TEMP_EXTENSIONS, RESCAN_MIN_INTERVAL,
+    RESCAN_MAX_ENTRIES, RESCAN_BATCH_SIZE, EVENT_QUEUE_SIZE,
+    EVENT_QUEUE_POLICY, HASH_IO_MODE, HASH_IO_AUTO, HASH_IO_MMAP,
+    SCAN_MAX_INFLIGHT, SCAN_PROGRESS_EVERY, FAST_POLL_INTERVAL,
+    PRIORITY_LIVE, PRIORITY_RESCAN, PRIORITY_BULK, RETRY_MAX_ATTEMPTS,
+    HASH_CHUNKING, HASH_CHUNKING_CDC, CDC_MIN_FILE_BYTES, CDC_FULL_EVERY,
+    HASH_ENGINE, HASH_ENGINE_PROCESSES, HASH_WORKERS
 )
-from pyile.lib.ui.notifier import trigger_notfication
 from pyile.lib.utils.common import (
-    join_path, is_directory, get_norm_path, open_file_ro_retry,
-    read_text, close_fd, is_file, list_directory, file_exists
+    is_directory, get_norm_path, open_file_seq,
+    close_fd, is_file, file_exists
 )
-from pyile.lib.utils.hash_manager import HashManager
-from pyile.lib.runtime.cache_manager.cache import update_cache_entry, is_file_cached
-from pyile.lib.runtime.internal.thread_safe import TTLCache
-from pyile.lib.utils.logging import log_error, log_debug
+from pyile.lib.runtime.monitors.scanner import TreeScanner, ScanResult
+from pyile.lib.runtime.monitors.debouncer import Debouncer
+from pyile.lib.runtime.rules.engine import RuleEngine, Rule, DirContext, RULE_EXCLUDE, KIND_DIR, KIND_EXT
+from pyile.lib.runtime.hashing.streaming import hash_fd, sample_windows
+from pyile.lib.runtime.hashing.mapped import hash_fd_mmap
+from pyile.lib.runtime.hashing.chunking import chunk_fd, rechunk_fd
+from pyile.lib.runtime.hashing.buffers import io_stats
+from pyile.lib.runtime.cache_manager.cache import update_cache_entry, is_file_cached, load_file_catalog
+from pyile.lib.runtime.cache_manager.catalog import stat_matches
+from pyile.lib.runtime.internal.thread_safe import SafeThread, AtomicCounter
+from pyile.lib.runtime.internal.path_ids import PathIds
+from pyile.lib.runtime.internal.path_tree import PathTree
+from pyile.lib.utils.logging import log_error, log_debug, log_info
 from pyile.lib.runtime.internal.stats import GlobalStats
+from pyile.lib.runtime.internal.scheduler import HashScheduler
 from pyile.lib.runtime.internal.executor_pool import ExecutorPool
+from pyile.lib.runtime.internal.retry import RetryQueue
+from pyile.lib.runtime.internal.attribution import AttributionWorker
+from pyile.lib.runtime.dedupe.tiered import TieredDedupe
+from pyile.lib.runtime.dedupe.groups import DuplicateIndex
+from pyile.lib.runtime.dedupe.chunks import ChunkIndex, ChunkLayout
+from pyile.lib.runtime.dedupe.verify import DuplicateVerifier, VERIFY_CONFIRMED, VERIFY_REJECTED
 
 import threading
 import time
 import os
 import concurrent.futures
-from pathlib import Path
-from concurrent.futures import as_completed
-from typing import Optional, Tuple, Callable
+from typing import Optional, Tuple, Callable, List, Dict, Any
 
 DEFAULT_MAX_FILE_BYTES = 50 * 1024 * 1024
 
+_JOB_QUEUED = 0
+_JOB_RUNNING = 1
+
+class _HashJob:
+    # at most one per path is queued or running, see Monitor._submit_hash
+    __slots__ = ("path_id", "norm_path", "st", "priority", "size", "state", "superseded", "future")
+
+    def __init__(self, path_id: int, norm_path: str, st: Optional[os.stat_result], priority: int) -> None:
+        self.path_id = path_id
+        self.norm_path = norm_path
+        self.st = st
+        self.priority = priority
+        # scheduling order inside the class, unknown sizes go first
+        self.size = st.st_size if st is not None else 0
+        self.state = _JOB_QUEUED
+        self.superseded = False
+        self.future: Optional[concurrent.futures.Future] = None
+
+
 class Monitor(BaseMonitor):
     def __init__(
             self, 
@@ -37,15 +77,30 @@ class Monitor(BaseMonitor):
             exclude_temp_extensions: Optional[bool] = None,
             log_console: Optional[Callable[[str], None]] = None,
             max_hash_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+            source: Optional[EventSource] = None,
+            queue_size: int = EVENT_QUEUE_SIZE,
+            queue_policy: str = EVENT_QUEUE_POLICY,
+            hub: Optional[EventHub] = None,
+            trace_dir: Optional[str] = None,
+            hash_io: str = HASH_IO_MODE,
+            rules: Optional[List[Rule]] = None,
+            debounce_ms: int = DEBOUNCE_QUIET_MS,
+            chunking: str = HASH_CHUNKING,
+            hash_engine: str = HASH_ENGINE,
+            hash_workers: int = HASH_WORKERS,
         ) -> None:
         
         __slots__ = ( 
             "excluded_cache", "check_current_files", "notification_enabled", 
             "exclude_system_extensions", "exclude_temp_extensions", 
-            "log_console", "max_hash_file_bytes", "_system_extension_filter", 
-            "_temp_extension_filter", "_debounce_timer", "_mtime_cache", 
-            "_spider_files", "_stats", "_hasher", "_futures_lock", 
-            "_pending_futures"
+            "log_console", "max_hash_file_bytes", "_rules",
+            "_debouncer", "_path_ids", "_catalog", "_stats", "_hasher", "_futures_lock", 
+            "_pending_futures", "_rescan_lock", "_rescan_running", 
+            "_rescan_pending", "_last_rescan", "_started_at", "_attribution",
+            "hash_io", "_dedupe", "_groups", "_jobs_lock", "_jobs", "_jobs_reused",
+            "_jobs_superseded", "_jobs_requeued", "_retries", "_tree",
+            "_files_moved", "_files_dropped", "chunking", "_chunks", "_verifier",
+            "hash_engine", "hash_workers"
         )
                 
         if path is None:
@@ -53,7 +108,10 @@ class Monitor(BaseMonitor):
         if log_console is None:
             raise ValueError("log_console is required")
         
-        super().__init__(path)
+        super().__init__(
+            path, source=source, queue_size=queue_size, queue_policy=queue_policy,
+            hub=hub, trace_dir=trace_dir
+        )
         
         self.excluded_cache = excluded_cache
         self.check_current_files = check_current_files
@@ -62,24 +120,52 @@ class Monitor(BaseMonitor):
         self.exclude_temp_extensions = exclude_temp_extensions
         self.log_console = log_console
         self.max_hash_file_bytes = max_hash_file_bytes
+        self.hash_io = hash_io
+        self.chunking = chunking
+        self.hash_engine = hash_engine
+        self.hash_workers = hash_workers
         
-        self._system_extension_filter = SYSTEM_EXTENSIONS
-        self._temp_extension_filter = TEMP_EXTENSIONS
-        self._debounce_timer = TTLCache(maxsize=8192, ttl=DEBOUNCE_WINDOW)
-        self._mtime_cache = TTLCache(maxsize=16384, ttl=None)
+        self._rules = RuleEngine(self._filter_rules(rules))
+        self._path_ids = PathIds.get()
+        self._debouncer = Debouncer(
+            debounce_ms / 1000.0, self._emit_debounced, name=f"debounce_{path}"
+        )
+        self._catalog = load_file_catalog()
 
-        self._spider_files = set()
         self._stats = GlobalStats.get()
-        self._hasher = ExecutorPool.get().get_hash_executor()
+        self._hasher = HashScheduler.get()
+        self._retries = RetryQueue.get()
+        self._attribution = AttributionWorker.get()
+        self._dedupe = TieredDedupe.get()
+        self._groups = DuplicateIndex.get()
+        self._tree = PathTree.get()
+        self._chunks = ChunkIndex.get()
+        self._verifier = DuplicateVerifier.get()
+        self._files_moved = AtomicCounter(0)
+        self._files_dropped = AtomicCounter(0)
         
         self._futures_lock = threading.Lock()
         self._pending_futures = set()
 
+        # hash jobs by path id, a path never has two jobs reading it
+        self._jobs_lock = threading.Lock()
+        self._jobs: Dict[int, _HashJob] = {}
+        self._jobs_reused = 0
+        self._jobs_superseded = 0
+        self._jobs_requeued = 0
+
+        self._rescan_lock = threading.Lock()
+        self._rescan_running = False
+        self._rescan_pending = False
+        self._last_rescan = 0.0
+        self._started_at = time.time()
+
     def stop(self) -> None:
         log_debug(f"FileMonitor {self.path} stop() called")
 
         self.is_running = False
 
+        self._debouncer.close()
         self._cancel_pending_futures()
 
         super().stop()
@@ -107,36 +193,47 @@ class Monitor(BaseMonitor):
         if cancelled:
             log_debug(f"Cancelled {cancelled} pending hashing futures")
 
-    def _should_process_file(self, path_filename: str) -> bool:
-        if not path_filename:
-            return False
-            
-        if self.is_excluded(path_filename):
-            return False
-            
-        _, ext = os.path.splitext(path_filename.lower())
-        
-        if self.exclude_system_extensions and ext in self._system_extension_filter:
-            return False
-            
-        if self.exclude_temp_extensions and ext in self._temp_extension_filter:
-            return False
-            
-        return True
-
-    def _debounce_event(self, path_filename: str, action: int) -> bool:
-        key = f"{path_filename}:{action}"
-        now = time.monotonic()
-        
-        last_time = self._debounce_timer.get(key)
-        if last_time and (now - last_time) < DEBOUNCE_WINDOW:
-            if action == FILE_ACTION_MODIFIED and (now - last_time) > 0.1:
-                self._debounce_timer[key] = now
-                return True
-            return False 
-        
-        self._debounce_timer[key] = now
-        return True
+    def _filter_rules(self, rules: Optional[List[Rule]]) -> List[Rule]:
+        # excluded directories and the extension checkboxes are plain rules
+        # in front of the ones loaded from filter_rules.cfg
+        built = [
+            Rule(RULE_EXCLUDE, KIND_DIR, (tuple(parts),), f"exclude dir {os.path.join(*parts)}")
+            for parts in self.excluded_cache or () if parts
+        ]
+        if self.exclude_system_extensions:
+            built.append(Rule(RULE_EXCLUDE, KIND_EXT, tuple(sorted(SYSTEM_EXTENSIONS)), "system extensions"))
+        if self.exclude_temp_extensions:
+            built.append(Rule(RULE_EXCLUDE, KIND_EXT, tuple(sorted(TEMP_EXTENSIONS)), "temp extensions"))
+        # copies so every root counts its own hits
+        return built + [Rule(r.action, r.kind, r.values, r.source) for r in rules or ()]
+
+    def _should_process_file(self, norm_path: str) -> bool:
+        return self._rules.accepts_path(norm_path)
+
+    def _debounce_event(
+            self,
+            norm_path: str,
+            path_filename: str,
+            action: int,
+            username: Optional[str] = None,
+            old_path: Optional[str] = None
+    ) -> None:
+        # a burst of events on one path and action is handled once, after it
+        # went quiet, so the hash sees what the writer left behind
+        path_id = self._path_ids.intern(norm_path)
+        if action == FILE_ACTION_MODIFIED:
+            # a file still being written after its creation is hashed once it is done
+            self._debouncer.extend((path_id << 3) | FILE_ACTION_ADDED)
+        self._debouncer.push((path_id << 3) | action, (path_filename, username, old_path))
+
+    def _emit_debounced(self, key: int, payload: Any) -> None:
+        if not self.is_running:
+            return
+        path_filename, username, old_path = payload
+        self._process_file_event(path_filename, key & 0x7, username=username, old_path=old_path)
+        self._release_id(get_norm_path(path_filename))
+        if old_path:
+            self._release_id(get_norm_path(old_path))
 
     def return_value(self) -> Tuple[Optional[str], int, int]:
         last_file = self._stats.get_last_file()
@@ -144,21 +241,36 @@ class Monitor(BaseMonitor):
         match = int(self._stats.match_count)
         return last_file, count, match
 
-    def monitor_handle(self, path_filename: str, action: int, username: Optional[str] = None) -> None:
-        if not self._should_process_file(path_filename):
+    def monitor_handle(
+            self, 
+            path_filename: str, 
+            action: int, 
+            username: Optional[str] = None, 
+            old_path: Optional[str] = None
+    ) -> None:
+        if not path_filename:
             return
-            
-        if not self._debounce_event(path_filename, action):
+
+        norm_path = get_norm_path(path_filename)
+        # indexes follow deletes and renames right away, only the console
+        # line and the notification wait for the debounce
+        if action == FILE_ACTION_REMOVED:
+            self._forget(norm_path)
+        elif action == FILE_RENAMED_TO and old_path:
+            self._relocate(get_norm_path(old_path), norm_path)
+
+        if not self._should_process_file(norm_path):
             return
             
-        self._process_file_event(path_filename, action, username=username)
+        self._debounce_event(norm_path, path_filename, action, username=username, old_path=old_path)
 
     def _process_file_event(
             self, 
             path_filename: str, 
             action: int, 
             filename: Optional[str] = None, 
-            username: Optional[str] = None
+            username: Optional[str] = None,
+            old_path: Optional[str] = None
     ) -> bool:
         if not path_filename:
             return False
@@ -173,31 +285,32 @@ class Monitor(BaseMonitor):
         
         try:
             if action == FILE_ACTION_ADDED:
-                self.log_console(f"User: {username} Created: {path_filename}")
+                self._log_event(path_filename, f"Created: {path_filename}", username)
                 if self.notification_enabled:
                     self._trigger_notification(path_filename, action)
                 self._check_file_async(norm_path)
                 return True
                 
             elif action == FILE_ACTION_REMOVED:
-                self.log_console(f"User: {username} Deleted: {path_filename}")
+                self._log_event(path_filename, f"Deleted: {path_filename}", username)
                 if self.notification_enabled:
                     self._trigger_notification(path_filename, action)
                 return True
                 
             elif action == FILE_ACTION_MODIFIED:
-                self.log_console(f"User: {username} Modified: {path_filename}")
+                self._log_event(path_filename, f"Modified: {path_filename}", username)
                 if self.notification_enabled:
                     self._trigger_notification(path_filename, action)
                 self._check_file_async(norm_path)
                 return True
                 
             elif action == FILE_RENAMED_FROM:
-                self.old_name = filename
+                # BatchCoalescer pairs renames, RENAMED_TO carries the old path
                 return True
                 
             elif action == FILE_RENAMED_TO:
-                self.log_console(f"User: {username} renamed: [{self.old_name}] to: [{filename}]\nPath: {path_filename}")
+                old_name = os.path.basename(old_path) if old_path else None
+                self._log_event(path_filename, f"renamed: [{old_name}] to: [{filename}]\nPath: {path_filename}", username)
                 return True
                 
             else:
@@ -207,6 +320,18 @@ class Monitor(BaseMonitor):
             log_error(f"Error processing file event ({path_filename}): {e}")
             return False
 
+    def _log_event(self, path_filename: str, message: str, username: Optional[str]) -> None:
+        # the line goes out in event order right away, a slow owner lookup
+        # only delays the owner line that follows it
+        if username is not None:
+            self.log_console(f"User: {username} {message}")
+            return
+
+        self.log_console(message)
+        self._attribution.submit(
+            path_filename, lambda user: self.log_console(f"User: {user} for {path_filename}")
+        )
+
     def _check_file_async(self, path_filename: str) -> None:
         if path_filename is None or is_directory(path_filename):
             return
@@ -217,22 +342,145 @@ class Monitor(BaseMonitor):
                 return
 
             try:
-                stat_mtime = os.path.getmtime(path_filename)
+                st = os.stat(path_filename)
             except Exception:
-                stat_mtime = None
+                st = None
 
-            if stat_mtime is not None:
-                cached_mtime = self._mtime_cache.get(path_filename)
-                if cached_mtime is not None and cached_mtime == stat_mtime:
-                    log_debug(f"Skipping hash (mtime unchanged): {path_filename}")
-                    return
+            if st is not None and self._catalog.lookup_unchanged(path_filename, st) is not None:
+                log_debug(f"Skipping hash (size and mtime unchanged): {path_filename}")
+                return
 
-            fut = self._hasher.submit(self._process_file_hash, path_filename) # type: ignore
-            self._track_future(fut)
+            self._submit_hash(path_filename, st)
 
         except Exception as e:
             log_error(f"Failed to submit hash job for {path_filename}: {e}")
 
+    def _submit_hash(
+            self,
+            norm_path: str,
+            st: Optional[os.stat_result] = None,
+            priority: int = PRIORITY_LIVE
+        ) -> Optional[concurrent.futures.Future]:
+        # None when the path already has a job: a queued one just picks up
+        # the newer stat (and the more urgent class), a running one is told
+        # to abort at its next chunk and run once more when it returns.
+        # raises RuntimeError once the executor is shut down.
+        promote = None
+        with self._jobs_lock:
+            # interned under the lock, so _release_id sees the job or the id is new
+            path_id = self._path_ids.intern(norm_path)
+            job = self._jobs.get(path_id)
+            if job is None:
+                job = _HashJob(path_id, norm_path, st, priority)
+                self._jobs[path_id] = job
+            else:
+                if job.state == _JOB_QUEUED:
+                    job.st = st
+                    self._jobs_reused += 1
+                else:
+                    job.superseded = True
+                    self._jobs_superseded += 1
+                if priority < job.priority:
+                    job.priority = priority
+                    promote = job.future
+                job = None
+
+        if job is not None:
+            return self._queue_job(job)
+        if promote is not None:
+            self._hasher.promote(promote, priority)
+        return None
+
+    def _queue_job(self, job: _HashJob) -> concurrent.futures.Future:
+        try:
+            fut = self._hasher.submit(self._run_hash_job, job, priority=job.priority, size=job.size)
+        except RuntimeError:
+            with self._jobs_lock:
+                self._jobs.pop(job.path_id, None)
+            raise
+        job.future = fut
+        self._track_future(fut)
+        return fut
+
+    def _run_hash_job(self, job: _HashJob) -> bool:
+        with self._jobs_lock:
+            job.state = _JOB_RUNNING
+            st = job.st
+
+        try:
+            return self._process_file_hash(job.norm_path, st, job)
+        finally:
+            with self._jobs_lock:
+                requeue = job.superseded and self.is_running
+                if requeue:
+                    # one more pass covers every event that came in meanwhile,
+                    # it stats the file again when it starts
+                    job.state = _JOB_QUEUED
+                    job.superseded = False
+                    job.st = None
+                    self._jobs_requeued += 1
+                else:
+                    self._jobs.pop(job.path_id, None)
+
+            if requeue:
+                try:
+                    self._queue_job(job)
+                except RuntimeError:
+                    pass
+            else:
+                self._release_id(job.norm_path)
+
+    def _is_superseded(self, norm_path: str) -> bool:
+        path_id = self._path_ids.lookup(norm_path)
+        job = self._jobs.get(path_id) if path_id is not None else None
+        return job is not None and job.superseded
+
+    def _submit_bounded(
+            self,
+            norm_path: str,
+            st: os.stat_result,
+            window: threading.Semaphore,
+            on_done: Optional[Callable[[concurrent.futures.Future], None]] = None,
+            priority: int = PRIORITY_BULK,
+        ) -> bool:
+        # walker threads block here while the window is full, which keeps a
+        # walk over millions of files from queueing millions of jobs
+        while not window.acquire(timeout=FAST_POLL_INTERVAL):
+            if not self.is_running:
+                return False
+
+        try:
+            fut = self._submit_hash(norm_path, st, priority)
+        except RuntimeError:
+            # executor already shut down
+            window.release()
+            return False
+
+        if fut is None:
+            # an event for the same path got there first
+            window.release()
+            return True
+
+        fut.add_done_callback(lambda _f: window.release())
+        if on_done is not None:
+            fut.add_done_callback(on_done)
+        self._track_future(fut)
+        return True
+
+    def wait_for_hashes(self, timeout: Optional[float] = None) -> bool:
+        # blocks until every submitted hash job finished, False on timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._futures_lock:
+                futures = list(self._pending_futures)
+            if not futures:
+                return True
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            concurrent.futures.wait(futures, timeout=remaining)
+
     def _track_future(self, future: concurrent.futures.Future) -> None:
         with self._futures_lock:
             self._pending_futures.add(future)
@@ -249,223 +497,665 @@ class Monitor(BaseMonitor):
         except Exception:
             pass
 
-    def _process_file_hash(self, norm_path: str) -> bool:
+    def _process_file_hash(
+            self,
+            norm_path: str,
+            st: Optional[os.stat_result] = None,
+            job: Optional[_HashJob] = None
+        ) -> bool:
         if not self.is_running:
             return False
 
+        if st is None:
+            # scans pass the stat their directory walk already did
+            try:
+                st = os.stat(norm_path)
+            except FileNotFoundError:
+                # deleted or renamed away while queued, drop whatever a pass
+                # that raced the event recorded
+                log_debug(f"File disappeared before hashing: {norm_path}")
+                self._discard_indexes(norm_path)
+                return False
+            except Exception as e:
+                log_error(f"Failed to get size for hashing {norm_path} {e}")
+                return False
+
+        if not st.st_size:
+            log_error(f"No data read from file for hashing for file {norm_path}")
+            return False
+
+        if not self._rules.accepts_size(st.st_size):
+            return False
+
         try:
-            size = os.path.getsize(norm_path)
+            if not self._dedupe.placed(norm_path, st.st_size, st.st_mtime):
+                # the content changed, the group it was in may no longer
+                # hold a copy of it, observe() places it again
+                path_id = self._path_ids.lookup(norm_path)
+                if path_id is not None:
+                    self._leave_group(path_id)
+
+            busy: List[str] = []
+            # only files that still collide after the size and head tiers are read in full
+            results = self._dedupe.observe(
+                norm_path, st.st_size, st.st_mtime,
+                lambda p: self._full_key(p, busy),
+                on_busy=busy.append
+            )
+            # the file changed under this job, its next pass records it. keys
+            # of other files hashed on the way are still good
+            superseded = job is not None and job.superseded
+            stale = superseded or norm_path in busy
+            if superseded:
+                self._dedupe.discard(norm_path)
+            elif not stale:
+                self._catalog.record(norm_path, st, 0)
+                self._tree.add(norm_path)
+                if job is not None:
+                    self._retries.succeeded(job.path_id)
+                if self._chunked(st.st_size):
+                    self._chunk_async(norm_path)
+
+            priority = job.priority if job is not None else PRIORITY_RESCAN
+            for path_filename in busy:
+                self._retry_later(path_filename, priority)
+
+            for path_filename, file_key in results:
+                if stale and path_filename == norm_path:
+                    continue
+                self._catalog.set_content_key(path_filename, file_key)
+                if not is_file_cached(file_key):
+                    # self.log_console(f"[CACHE] {filename} not in cache (updating cache)")
+                    update_cache_entry(file_key)
+
+                self._check_hash_fast(path_filename, file_key)
+            return not stale
+
         except Exception as e:
-            log_error(f"Failed to get size for hashing {norm_path} {e}")
+            log_error(f"Error during hash checking: {norm_path} - {e}")
             return False
 
-        fd = open_file_ro_retry(norm_path)
-        if fd is None:
+    def _supersede(self, path_id: int) -> bool:
+        # the path is gone, a queued job stats it again and stops, a running
+        # one aborts at its next chunk. True when there was a job
+        with self._jobs_lock:
+            job = self._jobs.get(path_id)
+            if job is None:
+                return False
+            if job.state == _JOB_QUEUED:
+                job.st = None
+            else:
+                job.superseded = True
+            return True
+
+    def _drop(self, path_id: int, norm_path: str) -> None:
+        self._supersede(path_id)
+        self._retries.cancel(path_id)
+        self._discard_indexes(norm_path)
+        self._release_id(norm_path)
+
+    def _release_id(self, norm_path: str) -> None:
+        # a path nothing refers to any more gives its id back (see PathIds),
+        # so a folder of short lived temp files does not grow every id keyed
+        # index for good. a pending event or job releases it when it is done
+        path_id = self._path_ids.lookup(norm_path)
+        if path_id is None or norm_path in self._tree or path_id in self._retries:
+            return
+        base = path_id << 3
+        if any((base | action) in self._debouncer for action in range(8)):
+            return
+        if self._groups.key_of(path_id) or self._chunks.layout(path_id) is not None:
+            return
+        self._verifier.remove(path_id)
+        with self._jobs_lock:
+            if path_id not in self._jobs:
+                self._path_ids.release(path_id, norm_path)
+
+    def _discard_indexes(self, norm_path: str) -> None:
+        self._catalog.discard(norm_path)
+        self._dedupe.discard(norm_path)
+        self._tree.take(norm_path)
+        path_id = self._path_ids.lookup(norm_path)
+        if path_id is not None:
+            self._leave_group(path_id)
+            self._chunks.remove(path_id)
+
+    def _leave_group(self, path_id: int) -> None:
+        self._ungroup(path_id)
+        self._verifier.remove(path_id)
+
+    def _ungroup(self, path_id: int) -> None:
+        # a match was counted when the path joined a group that had members
+        key = self._groups.key_of(path_id)
+        if key:
+            shared = len(self._groups.members(key)) > 1
+            if self._groups.remove(path_id) is not None and shared:
+                self._stats.match_count -= 1
+
+    def _forget(self, norm_path: str) -> int:
+        # a deleted file, or every indexed file below a deleted folder
+        removed = self._tree.take(norm_path)
+        if not removed:
+            # not hashed yet, a job may still be on its way
+            path_id = self._path_ids.lookup(norm_path)
+            if path_id is not None:
+                self._drop(path_id, norm_path)
+            return 0
+
+        path = self._path_ids.path
+        for path_id in removed:
+            self._drop(path_id, path(path_id))
+        self._files_dropped += len(removed)
+        return len(removed)
+
+    def _relocate(self, old_norm: str, new_norm: str) -> int:
+        # a renamed file, or every indexed file below a renamed folder, takes
+        # its catalog record, dedupe keys and duplicate group along to the
+        # new path, nothing is read again
+        if old_norm == new_norm:
+            return 0
+        # whatever the rename replaced is gone
+        self._forget(new_norm)
+
+        moved = self._tree.take(old_norm)
+        if not moved:
+            # not hashed yet, or only known to the catalog from an earlier
+            # session. whatever is known still moves, the new path is checked
+            self._move_indexes(self._path_ids.lookup(old_norm), old_norm, new_norm, indexed=False)
+            return 0
+
+        path = self._path_ids.path
+        count = 0
+        for old_id in moved:
+            old_path = path(old_id)
+            new_path = new_norm + old_path[len(old_norm):]
+            if self._should_process_file(new_path):
+                self._move_indexes(old_id, old_path, new_path)
+                count += 1
+            else:
+                # moved somewhere the rules exclude
+                self._drop(old_id, old_path)
+                self._files_dropped += 1
+
+        self._files_moved += count
+        return count
+
+    def _move_indexes(self, old_id: Optional[int], old_path: str, new_path: str, indexed: bool = True) -> None:
+        interrupted = False
+        if old_id is not None:
+            interrupted = self._supersede(old_id)
+            self._retries.cancel(old_id)
+            new_id = self._path_ids.intern(new_path)
+            self._groups.move(old_id, new_id)
+            self._chunks.move(old_id, new_id)
+            self._verifier.move(old_id, new_id)
+        self._catalog.move(old_path, new_path)
+        self._dedupe.move(old_path, new_path)
+        if indexed:
+            self._tree.add(new_path)
+        if interrupted or not indexed:
+            # a hash that never finished runs again under the new name
+            self._check_file_async(new_path)
+        if old_id is not None:
+            self._release_id(old_path)
+
+    def _retry_later(self, norm_path: str, priority: int) -> None:
+        # another process holds the file open (a copy still running), the
+        # worker moves on and RetryQueue brings the file back after a backoff
+        self._dedupe.discard(norm_path)
+        try:
+            st = os.stat(norm_path)
+        except OSError:
+            return
+
+        path_id = self._path_ids.intern(norm_path)
+        if not self._retries.schedule(path_id, lambda: self._retry_hash(norm_path, st, priority)):
             log_error(
-                f"Failed to open file for hashing {norm_path}: \
-                Most likely another Windows file handle is open to this file"
+                f"Failed to open file for hashing {norm_path}: still held open by "
+                f"another process after {RETRY_MAX_ATTEMPTS} attempts"
             )
-            return False
-        
-        contents = bytearray()
+
+    def _retry_hash(self, norm_path: str, st: os.stat_result, priority: int) -> None:
+        if not self.is_running:
+            return
         try:
-            if size <= self.max_hash_file_bytes:
-                for chunk in read_text(fd, CHUNK_SIZE):
-                    if not self.is_running:
-                        return False
-                    contents.extend(chunk)
-            else:
-                chunk_size = DEFAULT_MAX_FILE_BYTES
-                positions = [0]
-
-                if size > 2 * chunk_size:
-                    positions.append(size // 2)
-                if size > chunk_size:
-                    positions.append(size - chunk_size)
-
-                for pos in positions:
-                    try:
-                        os.lseek(fd, pos, os.SEEK_SET)
-                    except Exception as e:
-                        log_error(f"Seek failed at position {pos} in {norm_path} {e}")
-                        continue
-
-                    bytes = min(chunk_size, size - pos)
-                    for chunk in read_text(fd, CHUNK_SIZE):
-                        if not self.is_running:
-                            return False
-                        if bytes <= 0:
-                            break
-                        if len(chunk) > bytes:
-                            contents.extend(chunk[:bytes])
-                            break
-                        else:
-                            contents.extend(chunk)
-                            bytes -= len(chunk)
-
-            if not contents:
-                log_error(f"No data read from file for hashing for file {norm_path}")
-                return False
+            now = os.stat(norm_path)
+        except OSError:
+            return
 
-            file_key = HashManager.hash_contents(contents)
+        if now.st_size != st.st_size or now.st_mtime_ns != st.st_mtime_ns:
+            # written to since, the event of its last write hashes it
+            return
+        if self._catalog.lookup_unchanged(norm_path, now) is not None:
+            return
 
-            try:
-                stat_mtime = os.path.getmtime(norm_path)
-                self._mtime_cache[norm_path] = stat_mtime
-            except Exception:
-                pass
+        try:
+            self._submit_hash(norm_path, now, priority)
+        except RuntimeError:
+            pass
 
-            if not is_file_cached(file_key):
-                # self.log_console(f"[CACHE] {filename} not in cache (updating cache)")
-                update_cache_entry(file_key)
+    def _full_key(self, norm_path: str, busy: Optional[List[str]] = None) -> Optional[int]:
+        if not self.is_running:
+            return None
 
-            self._check_hash_fast(norm_path, file_key)
-            return True
+        try:
+            size = os.path.getsize(norm_path)
+        except Exception as e:
+            log_error(f"Failed to get size for hashing {norm_path} {e}")
+            return None
+
+        # stops at the next chunk once the file changed again, see _submit_hash
+        should_continue = lambda: self.is_running and not self._is_superseded(norm_path)
+        windows = sample_windows(size, self.max_hash_file_bytes, DEFAULT_MAX_FILE_BYTES)
+        use_mmap = self.hash_io == HASH_IO_MMAP or (self.hash_io == HASH_IO_AUTO and size > self.max_hash_file_bytes)
+        if self.hash_engine == HASH_ENGINE_PROCESSES:
+            pool = ExecutorPool.get().get_hash_processes(self.hash_workers)
+            if pool is not None:
+                return self._process_key(pool, norm_path, windows, use_mmap, should_continue, busy)
+
+        fd = open_file_seq(norm_path)
+        if fd is None:
+            # most likely another Windows file handle is open to this file
+            log_debug(f"Failed to open file for hashing {norm_path}, retrying later")
+            if busy is not None:
+                busy.append(norm_path)
+            return None
+        
+        try:
+            hasher = hash_fd_mmap if use_mmap else hash_fd
+
+            result = hasher(fd, windows, should_continue=should_continue)
+            if result is None:
+                return None
+
+            file_key, hashed = result
+            if not hashed:
+                log_error(f"No data read from file for hashing for file {norm_path}")
+                return None
+            return file_key
 
         except Exception as e:
             log_error(f"Error during hash checking: {norm_path} - {e}")
-            return False
+            return None
         finally:
             try:
                 if fd is not None:
                     close_fd(fd)
             except Exception:
                 pass
-            try:
-                contents.clear()
-                del contents
-            except Exception:
-                pass
+
+    def _process_key(
+            self,
+            pool: Any,
+            norm_path: str,
+            windows: List[Tuple[int, int]],
+            use_mmap: bool,
+            should_continue: Callable[[], bool],
+            busy: Optional[List[str]] = None,
+        ) -> Optional[int]:
+        # the same key as the threaded path, read and hashed by a worker process
+        try:
+            result = pool.hash_path(self._path_ids.intern(norm_path), norm_path, windows, use_mmap, should_continue)
+        except OSError:
+            log_debug(f"Failed to open file for hashing {norm_path}, retrying later")
+            if busy is not None:
+                busy.append(norm_path)
+            return None
+        except Exception as e:
+            log_error(f"Error during hash checking: {norm_path} - {e}")
+            return None
+
+        if result is None:
+            return None
+        file_key = result[3]
+        if file_key is None:
+            log_error(f"No data read from file for hashing for file {norm_path}")
+        return file_key
+
+    def _chunked(self, size: int) -> bool:
+        return self.chunking == HASH_CHUNKING_CDC and size >= CDC_MIN_FILE_BYTES
+
+    def _chunk_async(self, norm_path: str) -> None:
+        # layouts only feed the overlap report, they are kept up to date on
+        # the verify pool behind every hash job. duplicate keys never come
+        # from them, a rechunk does not read all of the file
+        executor = ExecutorPool.get().get_verify_executor()
+        if executor is None:
+            return
+        try:
+            executor.submit(self._chunk_file, norm_path)
+        except RuntimeError:
+            # shut down in the meantime
+            pass
+
+    def _chunk_file(self, norm_path: str) -> None:
+        if not self.is_running:
+            return
+        fd = open_file_seq(norm_path)
+        if fd is None:
+            # locked or gone, its next change chunks it
+            log_debug(f"Failed to open file for chunking {norm_path}")
+            return
+
+        should_continue = lambda: self.is_running and not self._is_superseded(norm_path)
+        try:
+            self._update_layout(norm_path, fd, should_continue)
+        except Exception as e:
+            log_error(f"Error during chunking: {norm_path} - {e}")
+        finally:
+            close_fd(fd)
+
+    def _update_layout(self, norm_path: str, fd: int, should_continue: Callable[[], bool]) -> None:
+        # the whole file is read once, after that a change that moved the
+        # end of the file only reads the regions that moved or changed (see
+        # rechunk_fd). one that kept the size can be anywhere and is read in full
+        st = os.fstat(fd)
+        path_id = self._path_ids.intern(norm_path)
+        old = self._chunks.layout(path_id)
+        if old is not None and old.matches(st):
+            return
+
+        wasted = 0
+        rechunk = (
+            old is not None and old.same_file(st) and old.size != st.st_size
+            and old.changes + 1 < CDC_FULL_EVERY
+        )
+        if rechunk:
+            result = rechunk_fd(fd, old.lens, old.fps, st.st_size, should_continue) # type: ignore
+            if result is not None and not result[0]:
+                # most of the file moved, a full pass reads less from here
+                wasted = result[2]
+                rechunk = False
+                result = chunk_fd(fd, should_continue)
+        else:
+            result = chunk_fd(fd, should_continue)
+        if result is None:
+            return
+
+        lens, fps, read = result
+        if not lens:
+            log_error(f"No data read from file for chunking {norm_path}")
+            return
+        after = os.fstat(fd)
+        if after.st_size != st.st_size or after.st_mtime_ns != st.st_mtime_ns:
+            # written while it was read, its own event chunks it again
+            return
+
+        layout = ChunkLayout(lens, fps, st, old.changes + 1 if rechunk else 0) # type: ignore
+        overlap = self._chunks.put(path_id, layout, read + wasted, rechunked=rechunk)
+        if overlap:
+            other, share = overlap[0]
+            self._stats.partial_count += 1
+            self.log_console(
+                f"Partial duplicate: {norm_path} shares {share:.0%} of its content with {self._path_ids.path(other)}"
+            )
 
     def _check_hash_fast(self, path_filename: str, file_key: int) -> None:
         try:
-            existing_file = self._stats.file_hashes.get_or_set(str(file_key), path_filename)
-            
-            if existing_file != path_filename:
+            path_id = self._path_ids.intern(path_filename)
+            if self._verifier.was_rejected(path_id, file_key):
+                # only shares the key, it is grouped on its full digest
+                return
+            first = self._groups.add(path_id, file_key)
+            if first is not None:
                 self._stats.match_count += 1
-                self.log_console(f"Duplicate found: {path_filename} matches {existing_file}")
-                
+                self.log_console(f"Duplicate found: {path_filename} matches {self._path_ids.path(first)} (unverified)")
+                self._verify_async(path_id, first, file_key)
+
         except Exception as e:
             log_error(f"Error during hash checking: {e}")
 
-    def _trigger_notification(self, path_filename: str, action: int) -> None:
-        if not self.notification_enabled:
+    def _verify_async(self, path_id: int, first: int, file_key: int) -> None:
+        # the match above is only as good as the 64 bit key, both files are
+        # read in full on the verify pool, behind every hash job
+        executor = ExecutorPool.get().get_verify_executor()
+        if executor is None:
             return
-            
         try:
-            info = path_filename.split("\\")[3:]
-            info = "\\".join(info)
-            
-            if action == FILE_ACTION_ADDED: 
-                trigger_notfication("Click to open file", f"File added\n{info}", 2, on_click=lambda: self.notification(path_filename))
-            elif action == FILE_ACTION_REMOVED:
-                trigger_notfication("Click to close notification", f"File removed\n{info}", 2)
-            elif action == FILE_ACTION_MODIFIED:
-                trigger_notfication("Click to open file", f"File modified\n{info}", 2, on_click=lambda: self.notification(path_filename))
-        except Exception as e:
-            log_error(f"Error triggering notification: {e}")
+            executor.submit(self._verify_match, path_id, first, file_key)
+        except RuntimeError:
+            # shut down in the meantime
+            pass
 
-    def _os_spider_fast(self, path: str) -> None:
+    def _verify_match(self, path_id: int, first: int, file_key: int) -> None:
+        if not self.is_running:
+            return
+        # either file changed or went away while this was queued
+        if self._groups.key_of(path_id) != file_key or self._groups.key_of(first) != file_key:
+            return
+
+        path, other = self._path_ids.path(path_id), self._path_ids.path(first)
         try:
-            files = list_directory(path)
-            total_files = len(files)
+            status = self._verifier.verify(path_id, path, first, other, should_continue=lambda: self.is_running)
+        except Exception as e:
+            log_error(f"Error verifying duplicate {path}: {e}")
+            return
 
-            if total_files == 0:
-                self.log_console(f"No files found in {path}")
+        if status == VERIFY_CONFIRMED:
+            self.log_console(f"Duplicate confirmed: {path} matches {other} (full content)")
+        elif status == VERIFY_REJECTED:
+            self.log_console(f"Duplicate rejected: {path} only shares its 64 bit key with {other}")
+            self._split_rejected(path_id, path, file_key)
+        elif self.is_running:
+            log_debug(f"Duplicate left unverified: {path} or {other} could not be read in full")
+
+    def _split_rejected(self, path_id: int, path: str, file_key: int) -> None:
+        # the path leaves the group it only shares a key with for one keyed
+        # by its full digest, where it still meets real copies
+        digest_key = self._verifier.reject(path_id, file_key)
+        if digest_key is None or self._groups.key_of(path_id) != file_key:
+            # changed in the meantime, its next hash places it again
+            return
+        self._ungroup(path_id)
+        first = self._groups.add(path_id, digest_key)
+        if first is not None:
+            self._stats.match_count += 1
+            self.log_console(f"Duplicate confirmed: {path} matches {self._path_ids.path(first)} (full content)")
+
+    def on_overflow(self) -> None:
+        self._stats.overflow_count += 1
+        self.log_console(
+            f"[WARNING] Event buffer overflow on {self.path} "
+            f"({int(self._stats.overflow_count)} total), scheduling rescan"
+        )
+        self._schedule_rescan()
+
+    def _schedule_rescan(self) -> None:
+        # overflows tend to arrive in bursts, while a rescan is queued or running
+        # further requests only flag that one more pass is needed afterwards
+        with self._rescan_lock:
+            if self._rescan_running:
+                self._rescan_pending = True
                 return
+            self._rescan_running = True
 
-            self._spider_files.clear()
-            abspath_base = os.path.abspath(path)
+        SafeThread.spawn(self._rescan_worker, thread_name=f"rescan_{self.path}")
 
-            chunk_size = CHUNK_SIZE
-            processed = completed = cancelled = 0
-
-            for i in range(0, total_files, chunk_size):
+    def _rescan_worker(self) -> None:
+        try:
+            while self.is_running:
+                delay = RESCAN_MIN_INTERVAL - (time.monotonic() - self._last_rescan)
+                if delay > 0:
+                    time.sleep(delay)
                 if not self.is_running:
                     break
 
-                chunk = files[i:i + chunk_size]
-                futures, processed_delta = self._submit_chunk_tasks(abspath_base, chunk)
-                if not futures:
-                    continue
-
-                processed += processed_delta
-                chunk_completed, chunk_cancelled = self._wait_for_futures(futures)
-                completed += chunk_completed
-                cancelled += chunk_cancelled
+                with self._rescan_lock:
+                    self._rescan_pending = False
 
-                self._log_progress(i, chunk_size, total_files)
+                self._reconcile_tree(self.path)
+                self._last_rescan = time.monotonic()
 
-            self.log_console(f"File discovery completed: {completed} processed, {cancelled} cancelled")
+                with self._rescan_lock:
+                    if not self._rescan_pending:
+                        break
+        finally:
+            with self._rescan_lock:
+                self._rescan_running = False
+
+    def _needs_rehash(self, norm_path: str, st: os.stat_result) -> bool:
+        rec = self._catalog.lookup(norm_path)
+        if rec is not None:
+            return not stat_matches(rec, st)
+        # never hashed, only pick it up if it was written while we were watching
+        return st.st_mtime >= self._started_at
+
+    def _reconcile_tree(self, root: str) -> None:
+        root_norm = get_norm_path(os.path.abspath(root))
+        seen = set()
+        rehashed = AtomicCounter(0)
+        # a small window keeps the rescan from flooding the hasher while live events are flowing
+        window = threading.Semaphore(RESCAN_BATCH_SIZE)
+
+        def on_file(entry: os.DirEntry, ctx: DirContext) -> bool:
+            nonlocal rehashed
+            if not self._rules.accepts_entry(ctx, entry.name, entry.path):
+                return False
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                return False
+            if not self._rules.accepts_size(st.st_size):
+                return False
 
-        except Exception as e:
-            log_error(f"Error during file discovery: {e}")
+            norm_path = get_norm_path(entry.path)
+            seen.add(norm_path)
+            if self._needs_rehash(norm_path, st) and self._submit_bounded(
+                    norm_path, st, window, priority=PRIORITY_RESCAN
+            ):
+                rehashed += 1
+            return True
 
-    def _submit_chunk_tasks(self, base_path: str, chunk: list[str]) -> tuple[list, int]:
-        futures = []
-        processed_count = 0
+        result = self._scan_tree(root_norm, on_file, max_entries=RESCAN_MAX_ENTRIES)
+        truncated = result.truncated
 
-        valid_tasks = []
-        for file in chunk:
-            if not self.is_running:
-                break
+        removed = 0
+        if self.is_running and not truncated:
+            removed = self._drop_missing(root_norm, seen)
 
-            path_file = join_path(base_path, file)
-            if self.is_excluded(path_file):
-                continue
+        elapsed = result.elapsed
+        self._stats.rescan_count += 1
+        self._stats.rescan_durations.append(elapsed)
 
-            if not is_file(path_file) or not self._should_process_file(path_file):
-                continue
+        note = " (entry limit reached)" if truncated else ""
+        self.log_console(
+            f"[RESCAN] {root}: {result.files} files checked, {int(rehashed)} rehashed, "
+            f"{removed} removed in {elapsed:.2f}s{note}"
+        )
 
-            norm_path = get_norm_path(path_file)
-            key = (norm_path,)
-            if key in self._spider_files:
-                continue
+    def _drop_missing(self, root_norm: str, seen: set) -> int:
+        prefix = root_norm.rstrip(os.sep) + os.sep
+        missing = set(self._catalog.paths_under(prefix)) - seen
+        if not missing:
+            return 0
 
-            self._spider_files.add(key)
-            valid_tasks.append((norm_path, file))
+        for p in missing:
+            self._discard_indexes(p)
 
-        for norm_path, file in valid_tasks:
-            future = self._hasher.submit(self._process_file_hash, norm_path) # type: ignore
-            futures.append(future)
-            processed_count += 1
+        return len(missing)
 
-        return futures, processed_count
+    def _trigger_notification(self, path_filename: str, action: int) -> None:
+        if not self.notification_enabled:
+            return
+            
+        try:
+            # the notifier is built on win32gui, only pull it in when a banner is needed
+            from pyile.lib.ui.notifier import trigger_notfication
 
-    def _wait_for_futures(self, futures: list) -> tuple[int, int]:
-        completed = cancelled = 0
+            info = path_filename.split("\\")[3:]
+            info = "\\".join(info)
+            
+            if action == FILE_ACTION_ADDED: 
+                trigger_notfication("Click to open file", f"File added\n{info}", 2, on_click=lambda: self.notification(path_filename))
+            elif action == FILE_ACTION_REMOVED:
+                trigger_notfication("Click to close notification", f"File removed\n{info}", 2)
+            elif action == FILE_ACTION_MODIFIED:
+                trigger_notfication("Click to open file", f"File modified\n{info}", 2, on_click=lambda: self.notification(path_filename))
+        except Exception as e:
+            log_error(f"Error triggering notification: {e}")
 
+    def _os_spider_fast(self, path: str) -> None:
         try:
-            from pyile.lib.runtime.internal.constants import CHUNK_TIMEOUT, FUTURE_TIMEOUT
-            for future in as_completed(futures, timeout=CHUNK_TIMEOUT):
-                try:
-                    future.result(timeout=FUTURE_TIMEOUT)
-                    completed += 1
-                except concurrent.futures.TimeoutError:
-                    try:
-                        future.cancel()
-                    except Exception:
-                        pass 
-                    cancelled += 1
-                    self.log_console(f"[WARNING] File processing timeout - cancelled")
-                except Exception as e:
-                    log_error(f"File processing error: {e}")
-                    cancelled += 1
-        except concurrent.futures.TimeoutError:
-            for future in futures:
-                if not future.done():
-                    try:
-                        future.cancel()
-                    except Exception:
-                        pass
+            submitted = AtomicCounter(0)
+            unchanged = AtomicCounter(0)
+            completed = AtomicCounter(0)
+            cancelled = AtomicCounter(0)
+            window = threading.Semaphore(SCAN_MAX_INFLIGHT)
+
+            def on_done(fut: concurrent.futures.Future) -> None:
+                nonlocal completed, cancelled
+                if fut.cancelled() or fut.exception() is not None:
                     cancelled += 1
-            self.log_console(f"[WARNING] Chunk timeout - cancelled {cancelled} files")
+                else:
+                    completed += 1
+
+            def on_file(entry: os.DirEntry, ctx: DirContext) -> bool:
+                nonlocal submitted, unchanged
+                if not self._rules.accepts_entry(ctx, entry.name, entry.path):
+                    return False
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    return False
+                if not self._rules.accepts_size(st.st_size):
+                    return False
+
+                norm_path = get_norm_path(entry.path)
+                rec = self._catalog.lookup_unchanged(norm_path, st)
+                if rec is not None:
+                    # hashed in an earlier session and untouched since, nothing is read
+                    self._seed_from_catalog(norm_path, st, rec[3])
+                    unchanged += 1
+                    return True
+
+                if not self._submit_bounded(norm_path, st, window, on_done):
+                    return False
+
+                submitted += 1
+                if int(submitted) % SCAN_PROGRESS_EVERY == 0:
+                    self.log_console(f"[PROGRESS] Scanned {int(submitted)} files...")
+                return True
 
-        return completed, cancelled
+            result = self._scan_tree(get_norm_path(os.path.abspath(path)), on_file)
+            if not result.files:
+                self.log_console(f"No files found in {path}")
+                return
+
+            # the walk only waited for the window, let the tail of the jobs finish
+            self.wait_for_hashes()
+            self.log_console(
+                f"File discovery completed: {int(completed)} processed, {int(unchanged)} unchanged, "
+                f"{int(cancelled)} cancelled ({result.dirs} directories in {result.elapsed:.2f}s)"
+            )
 
-    def _log_progress(self, i: int, chunk_size: int, total: int) -> None:
-        if (i + chunk_size) % 100 == 0 or (i + chunk_size) >= total:
-            self.log_console(f"[PROGRESS] Scanned {min(i + chunk_size, total)}/{total} files...")
+        except Exception as e:
+            log_error(f"Error during file discovery: {e}")
+
+    def _seed_from_catalog(self, norm_path: str, st: os.stat_result, content_key: int) -> None:
+        self._dedupe.seed(norm_path, st.st_size, st.st_mtime, content_key or None)
+        self._tree.add(norm_path)
+        if content_key:
+            self._check_hash_fast(norm_path, content_key)
+
+    def _scan_tree(
+            self,
+            root: str,
+            on_file: Callable[[os.DirEntry, DirContext], bool],
+            max_entries: Optional[int] = None,
+        ) -> ScanResult:
+        # every directory carries its rule context, children cost one step each
+        root_ctx = self._rules.root_context(root)
+        if root_ctx is None:
+            return ScanResult()
+
+        scanner = TreeScanner(
+            root,
+            descend=self._rules.descend,
+            root_context=root_ctx,
+            max_entries=max_entries,
+            should_continue=lambda: self.is_running,
+        )
+        return scanner.scan(on_file)
 
     def _track_file(self, file: str, path_filename: str) -> None:
         if not is_file(path_filename):
@@ -524,21 +1214,6 @@ class Monitor(BaseMonitor):
         except Exception:
             return False
 
-    def is_excluded(self, path_filename: str) -> bool:
-        if not self.excluded_cache:
-            return False
-
-        norm_parts = Path(get_norm_path(path_filename).lower()).parts
-
-        for excluded_parts in self.excluded_cache:
-            if len(excluded_parts) > len(norm_parts):
-                continue
-
-            for i in range(len(norm_parts) - len(excluded_parts) + 1):
-                if norm_parts[i:i + len(excluded_parts)] == excluded_parts:
-                    return True
-        return False
-
     def main(self) -> None:
         try:
             if self.check_current_files:
@@ -551,6 +1226,102 @@ class Monitor(BaseMonitor):
             
         except Exception as e:
             log_error(f"Error in file monitor initialization: {e}")
-        finally:
-            self.log_console(f"Monitoring stopped for {self.path}")
+            self._finish()
+
+    def on_stopped(self) -> None:
+        # a source that ran dry (a replayed trace) still gets its last bursts handled
+        self._debouncer.close(flush=bool(self.is_running))
+        self._log_queue_stats()
+        log_info(f"Debounce stats for {self.path}: {self._debouncer.stats()}")
+        log_info(
+            f"Hash jobs for {self.path}: {self._jobs_reused} reused while queued, "
+            f"{self._jobs_superseded} superseded while running, {self._jobs_requeued} requeued"
+        )
+        log_info(f"Dedupe stats: {self._dedupe.stats()}")
+        log_info(f"Duplicate index stats: {self._groups.stats()}")
+        if self.chunking == HASH_CHUNKING_CDC:
+            self._log_chunk_stats()
+        self._log_verify_stats()
+        log_info(f"Hash I/O stats: {io_stats()}")
+        if self.hash_engine == HASH_ENGINE_PROCESSES:
+            from pyile.lib.runtime.hashing.process_pool import HashProcessPool
+            log_info(f"Hash process pool stats: {HashProcessPool.get().stats()}")
+        log_info(
+            f"Index maintenance for {self.path}: {int(self._files_moved)} files moved by renames, "
+            f"{int(self._files_dropped)} dropped by deletes, {len(self._tree)} indexed"
+        )
+        log_info(f"File catalog stats: {self._catalog.stats()}")
+        self._log_rule_stats()
+        self._log_scheduler_stats()
+        self.log_console(f"Monitoring stopped for {self.path}")
+
+    def _log_scheduler_stats(self) -> None:
+        stats = self._hasher.stats()
+        log_info(f"Hash scheduler stats: {stats}")
+        waits = ", ".join(
+            f"{name} {c['started']} jobs p99 {c['wait_p99_ms']:.1f}ms"
+            for name, c in stats.items() if c["started"]
+        )
+        if waits:
+            self.log_console(f"[SCHED] queued before hashing: {waits}")
+
+        retries = self._retries.stats()
+        log_info(f"Locked file retries: {retries}")
+        if retries["scheduled"]:
+            self.log_console(
+                f"[RETRY] {retries['scheduled']} retries of files held open by another process, "
+                f"{retries['pending']} pending, {retries['gave_up']} given up"
+            )
+
+    def _log_verify_stats(self) -> None:
+        stats = self._verifier.stats()
+        log_info(f"Duplicate verification stats: {stats}")
+        if stats["confirmed"] or stats["rejected"]:
+            self.log_console(
+                f"[VERIFY] {stats['confirmed']} duplicates confirmed, {stats['rejected']} rejected, "
+                f"{stats['skipped']} unverified, {stats['bytes_read'] / 2**20:.1f} MB read"
+            )
+
+    def _log_chunk_stats(self) -> None:
+        stats = self._chunks.stats()
+        log_info(f"Chunk index stats: {stats}")
+        if stats["full_reads"] or stats["rechunks"]:
+            self.log_console(
+                f"[CDC] {stats['files']} files in {stats['chunks']} chunks, {stats['full_reads']} read in full, "
+                f"{stats['rechunks']} rechunked, {stats['bytes_read'] / 2**20:.1f} MB read, "
+                f"{stats['bytes_skipped'] / 2**20:.1f} MB skipped"
+            )
+
+    def _log_rule_stats(self) -> None:
+        counts = self._rules.stats()
+        if not counts:
+            return
+        log_info(f"Filter rule hits for {self.path}: {counts}")
+        top = ", ".join(f"{source} {hits}" for source, hits in counts[:3] if hits)
+        if top:
+            self.log_console(f"[RULES] {self.path}: most filtered by {top}")
+
+    def _log_queue_stats(self) -> None:
+        try:
+            q = self.queue_stats()
+            log_info(f"Event queue stats for {self.path}: {q}")
+            if q["raw_events"]:
+                self.log_console(
+                    f"[QUEUE] {self.path}: {q['raw_events']} raw events coalesced into {q['net_events']}"
+                )
+            if q["dropped"] or q["coalesced"] or q["producer_blocked_secs"] > 0.0:
+                self.log_console(
+                    f"[QUEUE] {self.path}: {q['enqueued']} queued, max depth {q['max_depth']}/{q['capacity']}, "
+                    f"{q['dropped']} dropped, {q['coalesced']} coalesced, "
+                    f"reader blocked {q['producer_blocked_secs']:.2f}s, "
+                    f"wait avg {q['wait_avg_ms']:.1f}ms p99 {q['wait_p99_ms']:.1f}ms"
+                )
+            if q["latency_samples"]:
+                self.log_console(
+                    f"[LATENCY] {self.path}: event to handler p50 {q['latency_p50_ms']:.1f}ms "
+                    f"p99 {q['latency_p99_ms']:.1f}ms max {q['latency_max_ms']:.1f}ms, "
+                    f"queued within {q['enqueue_p99_ms']:.1f}ms (p99)"
+                )
+        except Exception as e:
+            log_error(f"Failed to report queue stats: {e}")
 
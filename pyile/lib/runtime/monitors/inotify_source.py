@@ -0,0 +1,276 @@
+from pyile.lib.runtime.monitors.event_source import EventSource
+from pyile.lib.utils.common import close_fd
+from pyile.lib.utils.logging import log_error, log_debug
+from pyile.lib.runtime.internal.constants import (
+    FILE_ACTION_ADDED, FILE_ACTION_REMOVED, FILE_ACTION_MODIFIED,
+    FILE_RENAMED_FROM, FILE_RENAMED_TO, FILE_ACTION_OVERFLOW, BUFFER_SIZE,
+    MAX_BUFFER_SIZE, INOTIFY_WATCH_FLAGS, INOTIFY_MOVE_COOKIES,
+    IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO,
+    IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_MOVE_SELF, IN_Q_OVERFLOW,
+    IN_IGNORED, IN_ISDIR, IN_NONBLOCK, IN_CLOEXEC
+)
+
+import os
+import errno
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+from typing import Optional, List, Tuple, Dict
+
+# struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; }
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+def _get_libc() -> ctypes.CDLL:
+    global _libc
+    if _libc is None:
+        lib = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        lib.inotify_init1.argtypes = [ctypes.c_int]
+        lib.inotify_init1.restype = ctypes.c_int
+        lib.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        lib.inotify_add_watch.restype = ctypes.c_int
+        lib.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        lib.inotify_rm_watch.restype = ctypes.c_int
+        _libc = lib
+    return _libc
+
+def _map_action(mask: int) -> Optional[int]:
+    if mask & IN_CREATE:
+        return FILE_ACTION_ADDED
+    if mask & IN_DELETE:
+        return FILE_ACTION_REMOVED
+    if mask & IN_MOVED_FROM:
+        return FILE_RENAMED_FROM
+    if mask & IN_MOVED_TO:
+        return FILE_RENAMED_TO
+    if mask & (IN_MODIFY | IN_CLOSE_WRITE | IN_ATTRIB):
+        return FILE_ACTION_MODIFIED
+    return None
+
+class InotifyEventSource(EventSource):
+    # inotify watches are not recursive, so every directory under the root gets
+    # its own watch descriptor. new directories are picked up as their
+    # IN_CREATE / IN_MOVED_TO events arrive and anything written into them before
+    # the watch existed is reported as ADDED from a one off listing. a folder
+    # renamed inside the root is paired on the event cookie and only gets its
+    # watches back, its files are not new.
+    __slots__ = (
+        "_fd", "_wake_r", "_wake_w", "_lock", "_wd_to_dir",
+        "_dir_to_wd", "_buffer_size", "_moved_dirs"
+    )
+
+    def __init__(self, path: str, watch_subtree: bool = True) -> None:
+        super().__init__(path, watch_subtree=watch_subtree)
+
+        self._fd = -1
+        self._wake_r = -1
+        self._wake_w = -1
+        self._lock = threading.Lock()
+        self._wd_to_dir: Dict[int, str] = {}
+        self._dir_to_wd: Dict[str, int] = {}
+        self._buffer_size = BUFFER_SIZE
+        # cookie -> folder of an IN_MOVED_FROM still waiting for its IN_MOVED_TO
+        self._moved_dirs: Dict[int, str] = {}
+
+    def is_open(self) -> bool:
+        return self._fd >= 0
+
+    def open(self) -> bool:
+        try:
+            fd = _get_libc().inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err))
+
+            self._fd = fd
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+
+            self._add_watch_tree("")
+            return bool(self._wd_to_dir)
+
+        except Exception as e:
+            log_error(f"Failed to create inotify watch for {self.path}: {e}")
+            self.close()
+            return False
+
+    def _add_watch(self, rel_dir: str) -> Optional[int]:
+        full = os.path.join(self.path, rel_dir) if rel_dir else self.path
+        wd = _get_libc().inotify_add_watch(self._fd, os.fsencode(full), INOTIFY_WATCH_FLAGS)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                log_error(f"inotify watch limit reached at {full} (fs.inotify.max_user_watches)")
+            elif err not in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                log_debug(f"inotify_add_watch failed for {full}: {os.strerror(err)}")
+            return None
+
+        with self._lock:
+            self._wd_to_dir[wd] = rel_dir
+            self._dir_to_wd[rel_dir] = wd
+        return wd
+
+    def _add_watch_tree(self, rel_dir: str, found: Optional[List[Tuple[int, str]]] = None) -> None:
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            if self._add_watch(current) is None:
+                continue
+
+            full = os.path.join(self.path, current) if current else self.path
+            try:
+                with os.scandir(full) as it:
+                    for entry in it:
+                        rel = os.path.join(current, entry.name) if current else entry.name
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            is_dir = False
+
+                        if found is not None:
+                            found.append((FILE_ACTION_ADDED, rel))
+                        if is_dir and self.watch_subtree:
+                            stack.append(rel)
+            except OSError:
+                continue
+
+    def _drop_watch_tree(self, rel_dir: str) -> None:
+        prefix = rel_dir + os.sep
+        with self._lock:
+            stale = [
+                d for d in self._dir_to_wd
+                if d == rel_dir or d.startswith(prefix)
+            ]
+            wds = [self._dir_to_wd.pop(d) for d in stale]
+            for wd in wds:
+                self._wd_to_dir.pop(wd, None)
+
+        for wd in wds:
+            try:
+                _get_libc().inotify_rm_watch(self._fd, wd)
+            except Exception:
+                pass
+
+    def wait_handle(self) -> int:
+        return self._fd
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._fd < 0:
+            return False
+
+        try:
+            ready, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        except (OSError, ValueError):
+            return False
+
+        if self._wake_r in ready:
+            try:
+                os.read(self._wake_r, 64)
+            except OSError:
+                pass
+            return False
+
+        return self._fd in ready
+
+    def collect(self) -> List[Tuple[int, str]]:
+        if self._fd < 0:
+            return []
+
+        try:
+            data = os.read(self._fd, self._buffer_size)
+        except BlockingIOError:
+            return []
+        except OSError as e:
+            if e.errno == errno.EINVAL and self._buffer_size < MAX_BUFFER_SIZE:
+                # buffer smaller than a single event with a long name
+                self._buffer_size = min(self._buffer_size * 2, MAX_BUFFER_SIZE)
+                return []
+            raise
+
+        return self._parse_results(data)
+
+    def _parse_results(self, data: bytes) -> List[Tuple[int, str]]:
+        results = []
+        offset = 0
+        total = len(data)
+        header_size = _EVENT_HEADER.size
+
+        while offset + header_size <= total:
+            wd, mask, cookie, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += header_size
+            raw_name = data[offset:offset + name_len].split(b"\0", 1)[0]
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                # drain more per read() from now on so the queue empties faster
+                if self._buffer_size < MAX_BUFFER_SIZE:
+                    self._buffer_size = min(self._buffer_size * 2, MAX_BUFFER_SIZE)
+                    log_debug(f"inotify read size for {self.path} grown to {self._buffer_size} bytes")
+                results.append((FILE_ACTION_OVERFLOW, ""))
+                continue
+
+            with self._lock:
+                rel_dir = self._wd_to_dir.get(wd)
+            if rel_dir is None:
+                continue
+
+            if mask & IN_IGNORED:
+                with self._lock:
+                    self._wd_to_dir.pop(wd, None)
+                    if self._dir_to_wd.get(rel_dir) == wd:
+                        self._dir_to_wd.pop(rel_dir, None)
+                continue
+
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # the parent reports the delete / move for anything below the root
+                continue
+
+            name = os.fsdecode(raw_name)
+            rel = os.path.join(rel_dir, name) if rel_dir else name
+
+            action = _map_action(mask)
+            if action is None:
+                continue
+            results.append((action, rel))
+
+            if mask & IN_ISDIR and self.watch_subtree:
+                if mask & IN_CREATE:
+                    self._add_watch_tree(rel, found=results)
+                elif mask & IN_MOVED_TO:
+                    # renamed inside the root, the rename moves what is below
+                    # it downstream. without a pair it came from outside
+                    renamed = self._moved_dirs.pop(cookie, None) is not None
+                    self._add_watch_tree(rel, found=None if renamed else results)
+                elif mask & IN_MOVED_FROM:
+                    self._drop_watch_tree(rel)
+                    self._moved_dirs[cookie] = rel
+                    if len(self._moved_dirs) > INOTIFY_MOVE_COOKIES:
+                        # moved out of the tree, their IN_MOVED_TO never comes
+                        del self._moved_dirs[next(iter(self._moved_dirs))]
+
+        return results
+
+    def cancel(self) -> bool:
+        if self._wake_w < 0:
+            return False
+        try:
+            os.write(self._wake_w, b"\0")
+            return True
+        except OSError as e:
+            log_debug(f"inotify wake write failed: {e}")
+            return False
+
+    def close(self) -> None:
+        with self._lock:
+            self._wd_to_dir.clear()
+            self._dir_to_wd.clear()
+        self._moved_dirs.clear()
+
+        for attr in ("_fd", "_wake_r", "_wake_w"):
+            fd = getattr(self, attr)
+            if fd >= 0:
+                close_fd(fd)
+                setattr(self, attr, -1)
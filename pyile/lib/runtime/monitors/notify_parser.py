@@ -0,0 +1,57 @@
+from pyile.lib.utils.logging import log_error
+
+import struct
+from codecs import utf_16_le_decode
+from typing import List, Tuple
+
+# FILE_NOTIFY_INFORMATION { DWORD NextEntryOffset; DWORD Action; DWORD FileNameLength; WCHAR FileName[]; }
+FILE_NOTIFY_HEADER = struct.Struct("<III")
+_HEADER_SIZE = FILE_NOTIFY_HEADER.size
+
+def parse_notify_buffer(view: memoryview, bytes_returned: int) -> List[Tuple[int, str]]:
+    # view must be a flat unsigned byte view ("B") over the ReadDirectoryChangesW
+    # buffer. records are unpacked and names decoded straight out of the view so
+    # nothing is copied besides the resulting str objects.
+    results = []
+    append = results.append
+    unpack_from = FILE_NOTIFY_HEADER.unpack_from
+    offset = 0
+
+    while offset < bytes_returned:
+        if offset + _HEADER_SIZE > bytes_returned:
+            log_error(f"Buffer too small for entry at offset {offset}, stopping")
+            break
+
+        next_offset, action, name_len = unpack_from(view, offset)
+
+        start = offset + _HEADER_SIZE
+        end = start + name_len
+        if name_len & 1 or end > bytes_returned:
+            log_error(f"Invalid name length {name_len} at offset {offset}, stopping")
+            break
+
+        append((action, utf_16_le_decode(view[start:end], "ignore")[0]))
+
+        if next_offset == 0:
+            break
+
+        offset += next_offset
+
+    return results
+
+def build_notify_buffer(records: List[Tuple[int, str]]) -> bytes:
+    # packs (action, name) pairs the same way the kernel does, DWORD aligned.
+    # used by the parser benchmark and for replaying synthetic bursts
+    out = bytearray()
+    last = len(records) - 1
+    for i, (action, name) in enumerate(records):
+        name_bytes = name.encode("utf-16le")
+        size = _HEADER_SIZE + len(name_bytes)
+        size += -size % 4
+        next_offset = 0 if i == last else size
+
+        entry = bytearray(size)
+        FILE_NOTIFY_HEADER.pack_into(entry, 0, next_offset, action, len(name_bytes))
+        entry[_HEADER_SIZE:_HEADER_SIZE + len(name_bytes)] = name_bytes
+        out += entry
+    return bytes(out)
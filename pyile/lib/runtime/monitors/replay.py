@@ -0,0 +1,154 @@
+from pyile.lib.runtime.monitors.event_source import EventSource
+from pyile.lib.runtime.monitors.trace import TraceReader, Batch
+
+import time
+import threading
+from typing import Optional, Tuple, Dict, Any
+
+class ReplayEventSource(EventSource):
+    # plays a recorded trace back as if the kernel produced it. names in the
+    # trace are relative so the root can be a copy of the recorded tree.
+    #   speed 1.0  original gaps between batches
+    #   speed 4.0  four times faster
+    #   speed 0    no waiting at all, as fast as the pipeline takes it
+    # the source closes itself once the trace is exhausted, which ends
+    # BaseMonitor.main() after the queue has drained.
+    __slots__ = (
+        "trace_path", "speed", "_reader", "_batches", "_staged", "_base",
+        "_cancel", "batches", "events", "decode_secs", "span_secs", "max_lag_secs"
+    )
+
+    def __init__(self, path: str, trace_path: str, speed: float = 1.0) -> None:
+        super().__init__(path, watch_subtree=True)
+        self.trace_path = trace_path
+        self.speed = speed
+
+        self._reader: Optional[TraceReader] = None
+        self._batches = None
+        self._staged: Optional[Tuple[float, Batch]] = None
+        self._base: Optional[float] = None
+        self._cancel = threading.Event()
+
+        self.batches = 0
+        self.events = 0
+        self.decode_secs = 0.0
+        self.span_secs = 0.0
+        self.max_lag_secs = 0.0
+
+    def open(self) -> bool:
+        self._reader = TraceReader(self.trace_path)
+        self._batches = iter(self._reader)
+        self._cancel.clear()
+        return True
+
+    def is_open(self) -> bool:
+        return self._reader is not None
+
+    def wait_handle(self) -> Any:
+        raise NotImplementedError("replay sources are read on their monitor's own thread")
+
+    def arm(self) -> bool:
+        if self._reader is None:
+            return False
+        if self._staged is not None:
+            return True
+
+        started = time.perf_counter()
+        item = next(self._batches, None)
+        self.decode_secs += time.perf_counter() - started
+
+        if item is None:
+            self.close()
+            return False
+
+        self._staged = item
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._staged is None:
+            return False
+
+        offset = self._staged[0]
+        if self.speed <= 0:
+            return not self._cancel.is_set()
+
+        now = time.monotonic()
+        if self._base is None:
+            # the first batch plays immediately, the rest keep their spacing
+            self._base = now - offset / self.speed
+
+        delay = self._base + offset / self.speed - now
+        if delay <= 0:
+            self.max_lag_secs = max(self.max_lag_secs, -delay)
+            return not self._cancel.is_set()
+
+        if timeout is not None and delay > timeout:
+            self._cancel.wait(timeout)
+            return False
+        return not self._cancel.wait(delay)
+
+    def collect(self) -> Batch:
+        if self._staged is None:
+            return []
+
+        offset, batch = self._staged
+        self._staged = None
+        self.batches += 1
+        self.events += len(batch)
+        self.span_secs = offset
+        return batch
+
+    def cancel(self) -> bool:
+        self._cancel.set()
+        return True
+
+    def close(self) -> None:
+        reader, self._reader = self._reader, None
+        if reader is not None:
+            reader.close()
+
+
+def replay_trace(monitor: Any, source: ReplayEventSource, hash_timeout: Optional[float] = None) -> Dict[str, Any]:
+    # monitor has to be built with source=source, it runs on the calling thread
+    # until the trace is exhausted. returns throughput per pipeline stage:
+    #   decode    trace batches read back          (raw events / s)
+    #   coalesce  BatchCoalescer                   (raw events / s)
+    #   handler   monitor_handle on the processor  (net events / s)
+    #   hashing   hash jobs still running once the queue drained
+    started = time.perf_counter()
+    monitor.main()
+    drained = time.perf_counter()
+
+    wait_for_hashes = getattr(monitor, "wait_for_hashes", None)
+    hashes_done = wait_for_hashes(hash_timeout) if wait_for_hashes is not None else True
+    finished = time.perf_counter()
+
+    q = monitor.queue_stats()
+    raw, net = q["raw_events"], q["net_events"]
+
+    def _rate(count: int, secs: float) -> float:
+        return count / secs if secs > 0 else 0.0
+
+    wall = finished - started
+    return {
+        "trace": source.trace_path,
+        "speed": source.speed,
+        "batches": source.batches,
+        "raw_events": raw,
+        "net_events": net,
+        "trace_secs": source.span_secs,
+        "wall_secs": wall,
+        "pipeline_secs": drained - started,
+        "hash_drain_secs": finished - drained,
+        "hashes_done": hashes_done,
+        "max_lag_ms": source.max_lag_secs * 1000.0,
+        "queue_wait_p99_ms": q["wait_p99_ms"],
+        "latency_p99_ms": q["latency_p99_ms"],
+        "dropped": q["dropped"],
+        "stages": {
+            "decode": {"secs": source.decode_secs, "per_sec": _rate(raw, source.decode_secs)},
+            "coalesce": {"secs": q["coalesce_secs"], "per_sec": _rate(raw, q["coalesce_secs"])},
+            "handler": {"secs": q["handler_secs"], "per_sec": _rate(net, q["handler_secs"])},
+            "end_to_end": {"secs": wall, "per_sec": _rate(raw, wall)},
+        },
+    }
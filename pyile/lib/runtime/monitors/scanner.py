@@ -0,0 +1,165 @@
+from pyile.lib.runtime.internal.thread_safe import SafeThread, AtomicCounter
+from pyile.lib.runtime.internal.constants import SCAN_WALKERS, FAST_POLL_INTERVAL
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Optional, Callable, List, Tuple, Any
+
+class ScanResult:
+    __slots__ = ("files", "dirs", "errors", "truncated", "elapsed")
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.dirs = 0
+        self.errors = 0
+        self.truncated = False
+        self.elapsed = 0.0
+
+
+class TreeScanner:
+    # walks a tree with os.scandir on a few walker threads. directories are
+    # handed out from a shared stack, the listing syscalls release the GIL so
+    # slow or remote volumes are read in parallel. every directory carries a
+    # context, descend(entry, context) returns the context of a subdirectory
+    # or None to skip it entirely. on_file(entry, context) gets every regular
+    # file with the context of its directory and returns whether it counted
+    # towards max_entries. symlinks are never followed. on_file runs on the
+    # walker threads, it has to be thread safe and may block to apply
+    # backpressure.
+    __slots__ = (
+        "root", "walkers", "max_entries", "_root_context", "_descend", "_should_continue",
+        "_cond", "_pending", "_active", "_stopped", "_files", "_dirs", "_errors",
+        "_truncated"
+    )
+
+    def __init__(
+            self,
+            root: str,
+            descend: Optional[Callable[[os.DirEntry, Any], Any]] = None,
+            root_context: Any = None,
+            walkers: int = SCAN_WALKERS,
+            max_entries: Optional[int] = None,
+            should_continue: Optional[Callable[[], bool]] = None,
+        ) -> None:
+        self.root = root
+        self.walkers = max(1, walkers)
+        self.max_entries = max_entries
+        self._root_context = root_context
+        self._descend = descend
+        self._should_continue = should_continue
+
+        self._cond = threading.Condition()
+        self._pending: deque = deque()
+        self._active = 0
+        self._stopped = False
+        self._files = AtomicCounter(0)
+        self._dirs = AtomicCounter(0)
+        self._errors = AtomicCounter(0)
+        self._truncated = False
+
+    def scan(self, on_file: Callable[[os.DirEntry, Any], bool]) -> ScanResult:
+        start = time.monotonic()
+        self._pending.append((self.root, self._root_context))
+
+        threads = [
+            SafeThread.spawn(self._walk, on_file, thread_name=f"scan_{i}")
+            for i in range(self.walkers - 1)
+        ]
+        # the calling thread is one of the walkers
+        self._walk(on_file)
+        for t in threads:
+            t.join()
+
+        result = ScanResult()
+        result.files = int(self._files)
+        result.dirs = int(self._dirs)
+        result.errors = int(self._errors)
+        result.truncated = self._truncated
+        result.elapsed = time.monotonic() - start
+        return result
+
+    def _halt(self, truncated: bool = False) -> None:
+        with self._cond:
+            self._stopped = True
+            self._truncated = self._truncated or truncated
+            self._cond.notify_all()
+
+    def _next_dir(self) -> Optional[Tuple[str, Any]]:
+        with self._cond:
+            while True:
+                if self._stopped:
+                    return None
+                if self._pending:
+                    self._active += 1
+                    # depth first keeps the stack small on wide trees
+                    return self._pending.pop()
+                if not self._active:
+                    # nothing queued and nobody listing, the walk is done
+                    self._cond.notify_all()
+                    return None
+                self._cond.wait(FAST_POLL_INTERVAL)
+                if self._should_continue is not None and not self._should_continue():
+                    self._stopped = True
+
+    def _walk(self, on_file: Callable[[os.DirEntry, Any], bool]) -> None:
+        while True:
+            current = self._next_dir()
+            if current is None:
+                return
+
+            subdirs: List[Tuple[str, Any]] = []
+            try:
+                self._list(current[0], current[1], on_file, subdirs)
+            finally:
+                with self._cond:
+                    self._pending.extend(subdirs)
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    def _list(
+            self,
+            current: str,
+            context: Any,
+            on_file: Callable[[os.DirEntry, Any], bool],
+            subdirs: List[Tuple[str, Any]],
+        ) -> None:
+        try:
+            it = os.scandir(current)
+        except OSError:
+            self._errors += 1
+            return
+
+        self._dirs += 1
+        with it:
+            for entry in it:
+                if self._stopped:
+                    return
+                if self._should_continue is not None and not self._should_continue():
+                    self._halt()
+                    return
+
+                try:
+                    # d_type / find data answers these without a stat call
+                    if entry.is_dir(follow_symlinks=False):
+                        if self._descend is None:
+                            subdirs.append((entry.path, None))
+                        else:
+                            child = self._descend(entry, context)
+                            if child is not None:
+                                subdirs.append((entry.path, child))
+                        continue
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                except OSError:
+                    self._errors += 1
+                    continue
+
+                if not on_file(entry, context):
+                    continue
+
+                self._files += 1
+                if self.max_entries is not None and int(self._files) >= self.max_entries:
+                    self._halt(truncated=True)
+                    return
@@ -0,0 +1,129 @@
+from pyile.lib.utils.common import join_path
+from pyile.lib.utils.logging import log_error, log_info
+
+import os
+import time
+import zlib
+import struct
+import threading
+from typing import Optional, List, Tuple, Iterator, BinaryIO
+
+# trace file layout, all little endian:
+#   header  magic, version, flags, wall clock start, root length, root (utf-8)
+#   batch   ns since the recorder started, event count
+#   event   action, name length, name (utf-8, relative to the root)
+# batches are written as get_changes() returned them, before coalescing,
+# overflow markers included.
+TRACE_MAGIC = b"PYTR"
+TRACE_VERSION = 1
+TRACE_SUFFIX = ".pytrace"
+
+_TRACE_HEADER = struct.Struct("<4sHHdI")
+_BATCH_HEADER = struct.Struct("<QI")
+_EVENT_HEADER = struct.Struct("<HI")
+
+Batch = List[Tuple[int, str]]
+
+def make_trace_path(trace_dir: str, root: str) -> str:
+    name = os.path.basename(os.path.normpath(root)) or "root"
+    name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+    tag = zlib.crc32(root.encode("utf-8", "surrogatepass")) & 0xFFFFFFFF
+    return join_path(trace_dir, f"{name}_{tag:08x}_{time.strftime('%Y%m%d_%H%M%S')}{TRACE_SUFFIX}")
+
+
+class TraceRecorder:
+    __slots__ = ("path", "root", "_fh", "_lock", "started", "batches", "events", "bytes_written")
+
+    def __init__(self, path: str, root: str) -> None:
+        self.path = path
+        self.root = root
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.batches = 0
+        self.events = 0
+
+        root_bytes = root.encode("utf-8", "surrogatepass")
+        self._fh: Optional[BinaryIO] = open(path, "wb", buffering=1 << 16)
+        self._fh.write(_TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, 0, time.time(), len(root_bytes)))
+        self._fh.write(root_bytes)
+        self.bytes_written = _TRACE_HEADER.size + len(root_bytes)
+
+    def record(self, batch: Batch, timestamp: Optional[float] = None) -> None:
+        # timestamp is time.monotonic() of the read, defaults to now
+        offset = (timestamp if timestamp is not None else time.monotonic()) - self.started
+        out = bytearray(_BATCH_HEADER.pack(max(0, int(offset * 1e9)), len(batch)))
+        for action, name in batch:
+            raw = name.encode("utf-8", "surrogatepass")
+            out += _EVENT_HEADER.pack(action, len(raw))
+            out += raw
+
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(out)
+            self.batches += 1
+            self.events += len(batch)
+            self.bytes_written += len(out)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is None:
+                return
+            try:
+                self._fh.close()
+            except OSError as e:
+                log_error(f"Failed to close trace {self.path}: {e}")
+            self._fh = None
+
+        log_info(f"Trace {self.path}: {self.batches} batches, {self.events} events, {self.bytes_written} bytes")
+
+
+class TraceReader:
+    __slots__ = ("path", "root", "started_at", "_fh")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fh: Optional[BinaryIO] = open(path, "rb", buffering=1 << 16)
+
+        head = self._fh.read(_TRACE_HEADER.size)
+        if len(head) != _TRACE_HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is too short to be a trace")
+
+        magic, version, _flags, started_at, root_len = _TRACE_HEADER.unpack(head)
+        if magic != TRACE_MAGIC or version != TRACE_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {TRACE_VERSION} trace")
+
+        self.started_at = started_at
+        self.root = self._fh.read(root_len).decode("utf-8", "surrogatepass")
+
+    def __iter__(self) -> Iterator[Tuple[float, Batch]]:
+        # (seconds since the recorder started, batch), a truncated tail ends the trace
+        fh = self._fh
+        if fh is None:
+            return
+
+        while True:
+            head = fh.read(_BATCH_HEADER.size)
+            if len(head) != _BATCH_HEADER.size:
+                return
+
+            offset_ns, count = _BATCH_HEADER.unpack(head)
+            batch: Batch = []
+            for _ in range(count):
+                ev = fh.read(_EVENT_HEADER.size)
+                if len(ev) != _EVENT_HEADER.size:
+                    return
+                action, name_len = _EVENT_HEADER.unpack(ev)
+                raw = fh.read(name_len)
+                if len(raw) != name_len:
+                    return
+                batch.append((action, raw.decode("utf-8", "surrogatepass")))
+
+            yield offset_ns / 1e9, batch
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
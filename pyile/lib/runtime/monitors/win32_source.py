@@ -0,0 +1,269 @@
+from pyile.lib.runtime.monitors.event_source import EventSource
+from pyile.lib.runtime.monitors.notify_parser import parse_notify_buffer
+from pyile.lib.utils.logging import log_debug, log_error
+from pyile.lib.runtime.internal.constants import (
+    FILE_LIST_DIRECTORY, FILE_SHARE_READ, FILE_SHARE_DELETE, FILE_SHARE_WRITE,
+    OPEN_EXISTING, FILE_FLAG_BACKUP_SEMANTICS, FILE_FLAG_OPEN_REPARSE_POINT,
+    FILE_FLAG_OVERLAPPED, FILE_NOTIFY_FLAGS, TRANSIENT_ERRORS, BUFFER_SIZE,
+    FILE_READ_ATTRIBUTES, SECURITY_DESCRIPTOR_REVISION, MAX_BUFFER_SIZE,
+    FILE_ACTION_OVERFLOW, ERROR_NOTIFY_ENUM_DIR, ERROR_IO_INCOMPLETE,
+    ERROR_OPERATION_ABORTED, INFINITE, WAIT_OBJECT_0, WAIT_FAILED
+)
+from pyile.lib.runtime.internal.dataclasses import SECURITY_ATTRIBUTES, OVERLAPPED
+from pyile.lib.runtime.internal.win32_api import (
+    CancelIoEx, InitializeSecurityDescriptor, SetSecurityDescriptorDacl,
+    CreateFileW, ReadDirectoryChangesW, GetOverlappedResult, CreateEventW,
+    SetEvent, CloseHandle, WaitForMultipleObjects
+)
+
+import win32file # type: ignore
+import threading
+import ctypes
+from ctypes import wintypes
+from typing import Optional, List, Tuple, Any
+
+def _cancel_pending_read(handle: Any) -> bool:
+    if not handle:
+        return False
+
+    try:
+        raw = int(getattr(handle, "handle", handle))
+    except Exception:
+        raw = handle
+
+    try:
+        res = CancelIoEx(wintypes.HANDLE(raw), None)
+        if res:
+            return True
+        else:
+            err = ctypes.get_last_error()
+            log_debug(f"kernel32.CancelIoEx returned 0. GetLastError={err}")
+    except Exception as e:
+        log_debug(f"kernel32.CancelIoEx: {e}")
+
+    try:
+        if win32file.CancelIo(handle):
+            return True
+    except Exception as e:
+        log_debug(f"CancelIo failed: {e}")
+        pass
+
+    log_debug(f"Both I/O cancellations failed")
+    return False
+
+class Win32EventSource(EventSource):
+    # reads are overlapped: arm() queues ReadDirectoryChangesW and returns, the
+    # kernel signals _overlapped.hEvent once the buffer holds a batch. a
+    # second event lets cancel() wake a thread blocked in wait().
+    __slots__ = (
+        "_handle", "_handle_lock", "_monitor_symlinks",
+        "_buffer_size", "_buf", "_view", "_bytes_returned",
+        "_overlapped", "_cancel_event", "_wait_handles", "_pending"
+    )
+
+    def __init__(self, path: str, watch_subtree: bool = True) -> None:
+        super().__init__(path, watch_subtree=watch_subtree)
+
+        self._handle = None
+        self._buffer_size = BUFFER_SIZE
+        self._buf = ctypes.create_string_buffer(self._buffer_size)
+        self._view = memoryview(self._buf).cast("B")
+        self._bytes_returned = wintypes.DWORD(0)
+
+        self._overlapped = OVERLAPPED()
+        self._cancel_event = None
+        self._wait_handles = None
+        self._pending = False
+
+        self._handle_lock = threading.Lock()
+        self._monitor_symlinks = False
+        # self._monitor_symlinks = is_windows_11 # not tested
+
+    def _get_handle_safe(self) -> Optional[Any]:
+        with self._handle_lock:
+            return self._handle
+
+    def is_open(self) -> bool:
+        return bool(self._get_handle_safe())
+
+    def open(self) -> bool:
+        handle = self.get_handle()
+        if not handle:
+            return False
+
+        # manual reset, both stay signalled until the next read / close
+        io_event = CreateEventW(None, True, False, None)
+        cancel_event = CreateEventW(None, True, False, None)
+        if not io_event or not cancel_event:
+            err = ctypes.get_last_error()
+            for ev in (io_event, cancel_event):
+                if ev:
+                    CloseHandle(ev)
+            win32file.CloseHandle(handle)
+            log_error(f"Failed to create wait events: {ctypes.WinError(err)}")
+            return False
+
+        self._overlapped = OVERLAPPED()
+        self._overlapped.hEvent = io_event
+        self._cancel_event = cancel_event
+        self._wait_handles = (wintypes.HANDLE * 2)(io_event, cancel_event)
+        self._pending = False
+
+        with self._handle_lock:
+            self._handle = handle
+        return True
+
+    def get_handle(self) -> Optional[Any]:
+        try:
+            desired_access = FILE_LIST_DIRECTORY | FILE_READ_ATTRIBUTES
+            share_mode = FILE_SHARE_READ | FILE_SHARE_WRITE | FILE_SHARE_DELETE
+
+            flags = FILE_FLAG_BACKUP_SEMANTICS | FILE_FLAG_OVERLAPPED
+            if self._monitor_symlinks:
+                flags |= FILE_FLAG_OPEN_REPARSE_POINT
+
+            sd = ctypes.create_string_buffer(20)
+            if not InitializeSecurityDescriptor(sd, SECURITY_DESCRIPTOR_REVISION):
+                raise ctypes.WinError(ctypes.get_last_error())
+
+            if not SetSecurityDescriptorDacl(sd, True, None, False):
+                raise ctypes.WinError(ctypes.get_last_error())
+
+            sa = SECURITY_ATTRIBUTES()
+            sa.nLength = ctypes.sizeof(SECURITY_ATTRIBUTES)
+            sa.lpSecurityDescriptor = ctypes.cast(sd, wintypes.LPVOID)
+            sa.bInheritHandle = False
+
+            handle = CreateFileW(
+                self.path,
+                desired_access,
+                share_mode,
+                ctypes.byref(sa),
+                OPEN_EXISTING,
+                flags,
+                None
+            )
+            return handle
+
+        except Exception as e:
+            log_error(f"Failed to create handle: {e}")
+            return None
+
+    def wait_handle(self) -> Any:
+        return self._overlapped.hEvent
+
+    def arm(self) -> bool:
+        handle = self._get_handle_safe()
+        if not handle:
+            return False
+        if self._pending:
+            return True
+
+        ok = ReadDirectoryChangesW(
+            handle,
+            ctypes.byref(self._buf),
+            self._buffer_size,
+            self.watch_subtree,
+            FILE_NOTIFY_FLAGS,
+            None,
+            ctypes.byref(self._overlapped),
+            None
+        )
+        if not ok:
+            raise ctypes.WinError(ctypes.get_last_error())
+
+        self._pending = True
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if not self._pending or self._wait_handles is None:
+            return False
+
+        millis = INFINITE if timeout is None else int(timeout * 1000)
+        rc = WaitForMultipleObjects(2, self._wait_handles, False, millis)
+        if rc == WAIT_FAILED:
+            raise ctypes.WinError(ctypes.get_last_error())
+        return rc == WAIT_OBJECT_0
+
+    def collect(self) -> List[Tuple[int, str]]:
+        handle = self._get_handle_safe()
+        if not handle or not self._pending:
+            return []
+
+        ok = GetOverlappedResult(handle, ctypes.byref(self._overlapped), ctypes.byref(self._bytes_returned), False)
+        if not ok:
+            err = ctypes.get_last_error()
+            if err == ERROR_IO_INCOMPLETE:
+                # woken without a completed read, the read stays queued
+                return []
+
+            self._pending = False
+            if err == ERROR_NOTIFY_ENUM_DIR:
+                return self._on_overflow()
+            if err == ERROR_OPERATION_ABORTED or err in TRANSIENT_ERRORS:
+                log_debug(f"Transient FS error code: {err}")
+                return []
+            raise ctypes.WinError(err)
+
+        self._pending = False
+        if self._bytes_returned.value == 0:
+            # the kernel dropped the batch because it did not fit into our buffer
+            return self._on_overflow()
+
+        return self._parse_results()
+
+    def _on_overflow(self) -> List[Tuple[int, str]]:
+        if self._buffer_size < MAX_BUFFER_SIZE:
+            # 64 KB is the ceiling ReadDirectoryChangesW accepts over the network
+            self._buffer_size = min(self._buffer_size * 2, MAX_BUFFER_SIZE)
+            self._buf = ctypes.create_string_buffer(self._buffer_size)
+            self._view = memoryview(self._buf).cast("B")
+            log_debug(f"Notify buffer for {self.path} grown to {self._buffer_size} bytes")
+        return [(FILE_ACTION_OVERFLOW, "")]
+
+    def _parse_results(self) -> List[Tuple[int, str]]:
+        return parse_notify_buffer(self._view, self._bytes_returned.value)
+
+    def cancel(self) -> bool:
+        if self._cancel_event:
+            SetEvent(self._cancel_event)
+
+        cancel_success = False
+
+        # handle = self._handle # no lock grabbing here
+        handle = self._get_handle_safe()
+        if handle and self._pending:
+            try:
+                cancel_success = _cancel_pending_read(handle)
+            except Exception as e:
+                log_debug(f"_cancel_pending_read threw: {e}")
+
+        return cancel_success
+
+    def close(self) -> None:
+        with self._handle_lock:
+            handle = self._handle
+            self._handle = None
+        if not handle:
+            return
+
+        try:
+            if self._pending:
+                # the kernel owns _buf until the cancelled read has completed
+                _cancel_pending_read(handle)
+                GetOverlappedResult(handle, ctypes.byref(self._overlapped), ctypes.byref(self._bytes_returned), True)
+                self._pending = False
+        except Exception as e:
+            log_debug(f"Waiting for the cancelled read failed: {e}")
+
+        try:
+            win32file.CloseHandle(handle)
+        except Exception:
+            pass
+
+        for ev in (self._overlapped.hEvent, self._cancel_event):
+            if ev:
+                CloseHandle(ev)
+        self._overlapped.hEvent = None
+        self._cancel_event = None
+        self._wait_handles = None
@@ -0,0 +1,99 @@
+import os
+from typing import Iterable, List, Dict, Tuple
+
+NO_RULE = -1
+ROOT_STATE = 0
+
+_SEPS = os.sep + (os.altsep or "")
+
+def split_parts(path: str) -> List[str]:
+    # same components as Path(path).parts for normalized paths, without
+    # building a Path object for every event
+    drive, rest = os.path.splitdrive(path)
+    parts = []
+    if rest[:1] and rest[0] in _SEPS:
+        parts.append(drive + os.sep)
+        rest = rest.lstrip(_SEPS)
+    elif drive:
+        parts.append(drive)
+    parts.extend(p for p in rest.split(os.sep) if p)
+    return parts
+
+
+class ComponentMatcher:
+    # Aho-Corasick over path components. every rule is a tuple of lowercased
+    # components and matches any path containing it as a contiguous run, so
+    # "node_modules" matches at any depth while ("c:\\", "windows") only
+    # matches from the drive root. the rules are compiled once, a path is
+    # then matched in one pass over its components whatever the number of
+    # rules. walkers keep the state of a directory and step() each child
+    # name from there, rule_at() tells which rule (by position) ends there.
+    __slots__ = ("_goto", "_fail", "_rule", "rules")
+
+    def __init__(self, rules: Iterable[Tuple[str, ...]] = ()) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [ROOT_STATE]
+        self._rule: List[int] = [NO_RULE]
+        self.rules = 0
+
+        for rule in rules:
+            if rule:
+                self._add(rule, self.rules)
+            self.rules += 1
+        self._link()
+
+    def _add(self, rule: Tuple[str, ...], rule_id: int) -> None:
+        state = ROOT_STATE
+        for part in rule:
+            nxt = self._goto[state].get(part)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][part] = nxt
+                self._goto.append({})
+                self._fail.append(ROOT_STATE)
+                self._rule.append(NO_RULE)
+            state = nxt
+        if self._rule[state] == NO_RULE:
+            self._rule[state] = rule_id
+
+    def _link(self) -> None:
+        # breadth first, a state's fail link is the longest proper suffix of
+        # its components that is also a rule prefix
+        queue = list(self._goto[ROOT_STATE].values())
+        for state in queue:
+            for part, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while part not in self._goto[f] and f != ROOT_STATE:
+                    f = self._fail[f]
+                target = self._goto[f].get(part, ROOT_STATE)
+                self._fail[nxt] = target if target != nxt else ROOT_STATE
+                # a rule that ends inside this one's suffix matches too
+                if self._rule[nxt] == NO_RULE:
+                    self._rule[nxt] = self._rule[self._fail[nxt]]
+
+    def __bool__(self) -> bool:
+        return self.rules > 0
+
+    def step(self, state: int, part: str) -> int:
+        goto = self._goto
+        fail = self._fail
+        while True:
+            nxt = goto[state].get(part)
+            if nxt is not None:
+                return nxt
+            if state == ROOT_STATE:
+                return ROOT_STATE
+            state = fail[state]
+
+    def rule_at(self, state: int) -> int:
+        return self._rule[state]
+
+    def first_rule(self, parts: Iterable[str]) -> int:
+        state = ROOT_STATE
+        for part in parts:
+            state = self.step(state, part)
+            rule = self._rule[state]
+            if rule != NO_RULE:
+                return rule
+        return NO_RULE
@@ -0,0 +1,281 @@
+from pyile.lib.runtime.rules.components import ComponentMatcher, split_parts, NO_RULE, ROOT_STATE
+from pyile.lib.runtime.internal.thread_safe import AtomicCounter
+from pyile.lib.utils.common import get_norm_path
+
+import os
+import re
+import fnmatch
+from typing import Optional, Iterable, List, Dict, Tuple, Any
+
+RULE_INCLUDE = "include"
+RULE_EXCLUDE = "exclude"
+RULE_MIN_SIZE = "min_size"
+RULE_MAX_SIZE = "max_size"
+
+KIND_EXT = "ext"
+KIND_GLOB = "glob"
+KIND_DIR = "dir"
+RULE_KINDS = (KIND_EXT, KIND_GLOB, KIND_DIR)
+
+_SIZE_UNITS = {"": 1, "b": 1, "kb": 1 << 10, "mb": 1 << 20, "gb": 1 << 30, "tb": 1 << 40}
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([a-z]*)\s*$")
+
+# (exclusion state, inclusion state, already inside an included directory)
+DirContext = Tuple[int, int, bool]
+_ROOT_CONTEXT: DirContext = (ROOT_STATE, ROOT_STATE, False)
+
+def parse_size(text: str) -> int:
+    m = _SIZE_RE.match(text.lower())
+    if m is None or m.group(2) not in _SIZE_UNITS:
+        raise ValueError(f"invalid size {text!r}, expected a number with an optional B, KB, MB, GB or TB")
+    return int(float(m.group(1)) * _SIZE_UNITS[m.group(2)])
+
+
+class Rule:
+    __slots__ = ("action", "kind", "values", "source", "hits")
+
+    def __init__(self, action: str, kind: Optional[str], values: Tuple[Any, ...], source: str) -> None:
+        self.action = action
+        self.kind = kind
+        self.values = values
+        self.source = source
+        self.hits = AtomicCounter(0)
+
+
+def _native_seps(value: str) -> str:
+    return value.replace("\\", os.sep).replace("/", os.sep)
+
+
+def parse_rule(text: str) -> Rule:
+    # one rule per config line:
+    #   include|exclude ext .log .tmp
+    #   include|exclude glob *.part      (patterns with a separator match the full path)
+    #   include|exclude dir AppData\Local\Temp  (at any depth, a rooted one from its root)
+    #   min_size 1KB / max_size 2GB
+    # \ and / both separate components in globs and dirs, whatever the platform
+    source = text.strip()
+    fields = source.split(None, 2)
+    if not fields:
+        raise ValueError("empty rule")
+
+    action = fields[0].lower()
+    if action in (RULE_MIN_SIZE, RULE_MAX_SIZE):
+        if len(fields) < 2:
+            raise ValueError(f"{action} needs a size")
+        return Rule(action, None, (parse_size(source.split(None, 1)[1]),), source)
+
+    if action not in (RULE_INCLUDE, RULE_EXCLUDE):
+        raise ValueError(f"unknown rule {action!r}, expected include, exclude, min_size or max_size")
+    if len(fields) < 3:
+        raise ValueError(f"{action} needs a kind ({', '.join(RULE_KINDS)}) and a value")
+
+    kind, value = fields[1].lower(), fields[2].strip()
+    if kind == KIND_EXT:
+        values = tuple(v if v.startswith(".") else f".{v}" for v in value.lower().split())
+    elif kind == KIND_GLOB:
+        values = (_native_seps(value.lower()),)
+    elif kind == KIND_DIR:
+        values = (tuple(split_parts(get_norm_path(_native_seps(value)).lower())),)
+    else:
+        raise ValueError(f"unknown rule kind {kind!r}, expected one of {', '.join(RULE_KINDS)}")
+    return Rule(action, kind, values, source)
+
+
+class _GlobSet:
+    # every pattern of one action in a single regex per target, the named
+    # group that matched tells which rule it was
+    __slots__ = ("_name_re", "_path_re", "_rules")
+
+    def __init__(self, rules: List[Rule]) -> None:
+        self._rules: Dict[str, Rule] = {}
+        name_patterns: List[str] = []
+        path_patterns: List[str] = []
+        for i, rule in enumerate(rules):
+            pattern = rule.values[0]
+            group = f"r{i}"
+            self._rules[group] = rule
+            target = path_patterns if os.sep in pattern else name_patterns
+            target.append(f"(?P<{group}>{fnmatch.translate(pattern)})")
+
+        self._name_re = re.compile("|".join(name_patterns)) if name_patterns else None
+        self._path_re = re.compile("|".join(path_patterns)) if path_patterns else None
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def match(self, name: str, path: str) -> Optional[Rule]:
+        # both lowercased already
+        if self._name_re is not None:
+            m = self._name_re.match(name)
+            if m is not None:
+                return self._rules[m.lastgroup] # type: ignore
+        if self._path_re is not None:
+            m = self._path_re.match(path)
+            if m is not None:
+                return self._rules[m.lastgroup] # type: ignore
+        return None
+
+
+class RuleEngine:
+    # every include/exclude filter compiled into one predicate. extensions
+    # are a dict lookup, globs one regex per action, directories one
+    # component automaton per action and size limits two comparisons. walks
+    # carry a DirContext per directory so a child entry costs one step, whole
+    # subtrees are skipped as soon as a directory is excluded. exclude rules
+    # win, once any include rule exists a file has to match one of them.
+    # every rule counts the entries it decided so the noisiest ones show up
+    # in stats().
+    __slots__ = (
+        "rules", "_exclude_ext", "_include_ext", "_exclude_globs", "_include_globs",
+        "_exclude_dirs", "_exclude_dir_rules", "_include_dirs", "_include_dir_rules",
+        "_min_size", "_min_rule", "_max_size", "_max_rule", "_has_includes", "unmatched"
+    )
+
+    def __init__(self, rules: Iterable[Rule] = ()) -> None:
+        self.rules = list(rules)
+        self._exclude_ext: Dict[str, Rule] = {}
+        self._include_ext: Dict[str, Rule] = {}
+        self._min_size = 0
+        self._min_rule: Optional[Rule] = None
+        self._max_size = 0
+        self._max_rule: Optional[Rule] = None
+        self.unmatched = AtomicCounter(0)
+
+        globs: Dict[str, List[Rule]] = {RULE_INCLUDE: [], RULE_EXCLUDE: []}
+        dirs: Dict[str, List[Rule]] = {RULE_INCLUDE: [], RULE_EXCLUDE: []}
+        for rule in self.rules:
+            if rule.action == RULE_MIN_SIZE:
+                if self._min_rule is None or rule.values[0] > self._min_size:
+                    self._min_size, self._min_rule = rule.values[0], rule
+            elif rule.action == RULE_MAX_SIZE:
+                if self._max_rule is None or rule.values[0] < self._max_size:
+                    self._max_size, self._max_rule = rule.values[0], rule
+            elif rule.kind == KIND_EXT:
+                exts = self._include_ext if rule.action == RULE_INCLUDE else self._exclude_ext
+                for ext in rule.values:
+                    # the first rule naming an extension owns it
+                    exts.setdefault(ext, rule)
+            elif rule.kind == KIND_GLOB:
+                globs[rule.action].append(rule)
+            elif rule.kind == KIND_DIR:
+                dirs[rule.action].append(rule)
+
+        self._exclude_globs = _GlobSet(globs[RULE_EXCLUDE])
+        self._include_globs = _GlobSet(globs[RULE_INCLUDE])
+        self._exclude_dir_rules = dirs[RULE_EXCLUDE]
+        self._exclude_dirs = ComponentMatcher(r.values[0] for r in self._exclude_dir_rules)
+        self._include_dir_rules = dirs[RULE_INCLUDE]
+        self._include_dirs = ComponentMatcher(r.values[0] for r in self._include_dir_rules)
+        self._has_includes = bool(self._include_ext or self._include_globs or self._include_dirs)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def _step_dir(self, ctx: DirContext, part: str) -> Optional[DirContext]:
+        ex, inc, included = ctx
+        if self._exclude_dirs:
+            ex = self._exclude_dirs.step(ex, part)
+            rule = self._exclude_dirs.rule_at(ex)
+            if rule != NO_RULE:
+                self._exclude_dir_rules[rule].hits += 1
+                return None
+
+        if self._include_dirs and not included:
+            inc = self._include_dirs.step(inc, part)
+            rule = self._include_dirs.rule_at(inc)
+            if rule != NO_RULE:
+                self._include_dir_rules[rule].hits += 1
+                included = True
+        return ex, inc, included
+
+    def root_context(self, dir_path: str) -> Optional[DirContext]:
+        # context of a normalized directory path, None when it is excluded itself
+        ctx: Optional[DirContext] = _ROOT_CONTEXT
+        if not self.rules:
+            return ctx
+        for part in split_parts(dir_path.lower()):
+            ctx = self._step_dir(ctx, part)
+            if ctx is None:
+                break
+        return ctx
+
+    def descend(self, entry: os.DirEntry, ctx: DirContext) -> Optional[DirContext]:
+        if not self.rules:
+            return ctx
+        return self._step_dir(ctx, entry.name.lower())
+
+    def accepts_entry(self, ctx: DirContext, name: str, path: str) -> bool:
+        # name and path checks for a file inside the directory of ctx, the
+        # size limits are checked separately once a stat is at hand
+        if not self.rules:
+            return True
+        return self._accepts(ctx, name.lower(), path.lower())
+
+    def _accepts(self, ctx: DirContext, name: str, path: str) -> bool:
+        ext = os.path.splitext(name)[1]
+        rule = self._exclude_ext.get(ext)
+        if rule is None and self._exclude_globs:
+            rule = self._exclude_globs.match(name, path)
+        if rule is not None:
+            rule.hits += 1
+            return False
+
+        ex, inc, included = ctx
+        if self._exclude_dirs:
+            # a file name can match a directory rule as well
+            dir_rule = self._exclude_dirs.rule_at(self._exclude_dirs.step(ex, name))
+            if dir_rule != NO_RULE:
+                self._exclude_dir_rules[dir_rule].hits += 1
+                return False
+
+        if not self._has_includes or included:
+            return True
+
+        if self._include_dirs:
+            dir_rule = self._include_dirs.rule_at(self._include_dirs.step(inc, name))
+            if dir_rule != NO_RULE:
+                self._include_dir_rules[dir_rule].hits += 1
+                return True
+
+        rule = self._include_ext.get(ext)
+        if rule is None and self._include_globs:
+            rule = self._include_globs.match(name, path)
+        if rule is not None:
+            rule.hits += 1
+            return True
+
+        self.unmatched += 1
+        return False
+
+    def accepts_path(self, path: str) -> bool:
+        # single pass over a normalized path from an event
+        if not self.rules:
+            return True
+
+        path = path.lower()
+        parts = split_parts(path)
+        if not parts:
+            return False
+
+        ctx: Optional[DirContext] = _ROOT_CONTEXT
+        for part in parts[:-1]:
+            ctx = self._step_dir(ctx, part) # type: ignore
+            if ctx is None:
+                return False
+        return self._accepts(ctx, parts[-1], path) # type: ignore
+
+    def accepts_size(self, size: int) -> bool:
+        if self._min_rule is not None and size < self._min_size:
+            self._min_rule.hits += 1
+            return False
+        if self._max_rule is not None and size > self._max_size:
+            self._max_rule.hits += 1
+            return False
+        return True
+
+    def stats(self) -> List[Tuple[str, int]]:
+        # (rule, entries it decided), busiest first
+        counts = [(rule.source, int(rule.hits)) for rule in self.rules]
+        if self._has_includes:
+            counts.append(("no include rule matched", int(self.unmatched)))
+        return sorted(counts, key=lambda c: c[1], reverse=True)
@@ -252,6 +252,8 @@ class GUIHandlers:
         excluded_cache = [
             tuple(Path(get_norm_path(p).lower()).parts) for p in (self.gui.EXCLUDE or [])
         ]
+        monitor_settings = self.gui.get_config.monitor_settings()
+        filter_rules = self.gui.get_config.return_filter_rules()
 
         from pyile.lib.runtime.internal.executor_pool import ExecutorPool
         ExecutorPool.get().restart()
@@ -269,6 +271,11 @@ class GUIHandlers:
         self.gui.update_status_indicator(True)
         self.gui.progress_label.configure(text="Status: Monitoring", text_color=STARTING_COLOR)
         
+        # one thread waits on every root, a monitor whose hub is full reads on its own thread
+        from pyile.lib.runtime.monitors.event_hub import EventHub
+        self.gui.event_hub = EventHub()
+        start_thread_if_needed("event_hub", self.gui.event_hub.run)
+
         for i, path in enumerate(self.gui.PATHS):
             monitor_key = f"file_monitor_{i}"
             updater_key = f"updater_{i}"
@@ -281,6 +288,9 @@ class GUIHandlers:
                 exclude_system_extensions=self.gui.exclude_system_extensions,
                 exclude_temp_extensions=self.gui.exclude_temp_extensions,
                 log_console=self.gui.log_to_console,
+                hub=self.gui.event_hub,
+                rules=filter_rules,
+                **monitor_settings,
             )
             
             with self.gui.monitor_lock:
@@ -362,6 +372,10 @@ class GUIHandlers:
                 for t in stop_threads:
                     t.join(timeout=5)
 
+                if self.gui.event_hub is not None:
+                    self.gui.event_hub.stop()
+                    self.gui.event_hub = None
+
                 kill_threads = []
                 thread_keys = []
                 
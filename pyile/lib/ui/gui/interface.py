@@ -46,6 +46,7 @@ class Interface(customtkinter.CTk):
         
         self.monitor_states = {}  
         self.monitor_lock = threading.Lock()    
+        self.event_hub = None
         self.monitoring_active = False
         self.checkbox_states = {
             1: False,
@@ -259,6 +260,7 @@ class Interface(customtkinter.CTk):
         self.custom_backup_path = common_config.get("backup_folder_path")
         self.get_config.load_directories_config()
         self.get_config.load_excluded_directories_config()
+        self.get_config.load_filter_rules_config()
 
         from pyile.lib.runtime.cache_manager.cache import get_cache_stats
         stats = get_cache_stats()
@@ -6,48 +6,15 @@ from pyile.lib.runtime.internal.constants import (
 
 import os
 import mmap
-import time
 import ctypes
 from typing import Optional, List, Union
 from pathlib import Path
-import win32security # type: ignore
-import time
 
 PathType = Union[str, Path]
 
 def get_username(path_filename: str) -> str:
-    try:
-        if not Path(path_filename).exists():
-            time.sleep(0.01) 
-            if not Path(path_filename).exists():
-                raise FileNotFoundError(f"File not found: {path_filename}")
-    
-        file = win32security.GetFileSecurity(
-            path_filename,
-            win32security.OWNER_SECURITY_INFORMATION | win32security.DACL_SECURITY_INFORMATION
-        )
-
-        sid = file.GetSecurityDescriptorOwner()
-        if sid:
-            try:
-                account, _, _ = win32security.LookupAccountSid("", sid)
-                return account
-            except Exception:
-                from pyile.lib.utils.logging import log_debug
-                log_debug("LookupAccountSid failed; falling back to current user SID.")
-                return win32security.ConvertSidToStringSid(sid)
-    except Exception as e:
-        from pyile.lib.utils.logging import log_error
-        log_error(f"get_username failed: {e}")
-
-    # if nothing works we fall back to the current user
-    # this will always happen when a file is deleted until
-    # i find a fix for it.
-    try:
-        import win32api # type: ignore
-        return win32api.GetUserName()
-    except Exception:
-        return "Unknown"
+    from pyile.lib.utils.owner_resolver import get_owner_resolver, get_current_user
+    return get_owner_resolver().resolve(path_filename) or get_current_user()
 
 def _cpu_count() -> int:
     try:
@@ -175,20 +142,13 @@ def open_file_ro(path: str) -> Optional[int]:
     except OSError:
         return None
 
-def open_file_ro_retry(path: str, retries=5, delay=1) -> Optional[int]:
-    # handles file locks on Windows by retrying. Callers should handle 
-    # none return to detect permanent failures. this usually happens when a user 
-    # copies a file and the handle remains open while copying contents.
-    
-    # Note: this function can still return None if the copied file is large and locked for an extended time
-    # there is currently nothing in place to prevent this.
-
-    for _ in range(retries):
-        fd = open_file_ro(path)
-        if fd is not None:
-            return fd
-        time.sleep(delay)
-    return None
+def open_file_seq(path: str) -> Optional[int]:
+    # read only, for files read start to end. on Windows this opens with
+    # FILE_FLAG_SEQUENTIAL_SCAN, elsewhere the reader calls posix_fadvise
+    try:
+        return os.open(path, os.O_RDONLY | getattr(os, "O_SEQUENTIAL", 0) | getattr(os, "O_BINARY", 0))
+    except OSError:
+        return None
 
 def open_file_rw(path: str, mode: int = FILE_MODE_DEFAULT, extra_flags: int = 0) -> Optional[int]:
     try:
@@ -1,6 +1,6 @@
 from pyile.lib.runtime.internal.thread_safe import ThreadSafeList, SafeThread
 from pyile.lib.utils.logging import log_error, log_info
-from pyile.lib.runtime.internal.constants import CONFIG_VERSION
+from pyile.lib.runtime.internal.constants import CONFIG_VERSION, QUEUE_POLICIES, HASH_IO_MODES, HASH_CHUNKING_MODES, HASH_ENGINES
 from pyile.lib.utils.common import (
     join_path, is_absolute, is_directory, get_norm_path, get_project_root, 
     open_file_rw, open_file_ro, open_file_rwa, write_text, read_text, 
@@ -10,11 +10,12 @@ from pyile.lib.utils.lazy import LazyInit
 
 import os
 from queue import Queue, Empty
-from typing import Optional, Dict, List, Callable
+from typing import Optional, Dict, List, Callable, Any
 COMMON_HEADER = f"version = {CONFIG_VERSION}\n\n[Common Settings Config]\n"
 SAVED_DIRS_HEADER = f"version = {CONFIG_VERSION}\n\n[Saved Directories Config]\n"
 EXCLUDE_DIRS_HEADER = f"version = {CONFIG_VERSION}\n\n[Excluded Directories Config]\n"
 CHECKBOXES_HEADER = f"version = {CONFIG_VERSION}\n\n[Checkbox States Config]\n"
+FILTER_RULES_HEADER = f"version = {CONFIG_VERSION}\n\n[Filter Rules Config]\n"
 
 # these are now just templates at this point
 # keeping it for legacy sake
@@ -41,16 +42,36 @@ DEFAULT_EXCLUDED_PATHS: List[str] = [
     # add hard coded directories here all will be loaded in on start up
 ] 
 
+# optional monitor tuning keys read from common.cfg, parsed by monitor_settings()
+# and passed to every Monitor as keyword arguments
+_INT_SETTINGS = {
+    "event_queue_size": "queue_size",
+    "event_debounce_ms": "debounce_ms",
+    "hash_workers": "hash_workers",
+}
+_CHOICE_SETTINGS = {
+    "event_queue_policy": ("queue_policy", QUEUE_POLICIES),
+    "hash_io_mode": ("hash_io", HASH_IO_MODES),
+    "hash_chunking": ("chunking", HASH_CHUNKING_MODES),
+    "hash_engine": ("hash_engine", HASH_ENGINES),
+}
+_DIR_SETTINGS = {
+    "event_trace_dir": "trace_dir",
+}
+MONITOR_SETTING_KEYS = tuple(_INT_SETTINGS) + tuple(_CHOICE_SETTINGS) + tuple(_DIR_SETTINGS)
+
 COMMON_CFG = "common.cfg"
 CHECKBOX_CFG = "checkbox_states.cfg"
 SAVED_DIRS_CFG = "saved_directories.cfg"
 EXCLUDED_DIRS_CFG = "excluded_directories.cfg"
+FILTER_RULES_CFG = "filter_rules.cfg"
 
 _CONFIG_CREATORS = {
     COMMON_CFG: lambda self: self.make_common_config(),
     CHECKBOX_CFG: lambda self: self.make_checkbox_config(),
     SAVED_DIRS_CFG: lambda self: self.make_saved_directories_config(),
     EXCLUDED_DIRS_CFG: lambda self: self.make_excluded_directories_config(),
+    FILTER_RULES_CFG: lambda self: self.make_filter_rules_config(),
 }
 
 _c_q = Queue()
@@ -86,6 +107,7 @@ class UserConfig(LazyInit):
         
         self.PATHS = []
         self.EXCLUDE = []
+        self.RULES = []
         self._written_paths = set()
         self.is_running = False
 
@@ -110,6 +132,9 @@ class UserConfig(LazyInit):
     def return_excluded_paths(self) -> List[str]:
         return list(self.EXCLUDE)
 
+    def return_filter_rules(self) -> list:
+        return list(self.RULES)
+
     def add_path(self, path: Optional[str]) -> Optional[str]:
         if path is None:
             return None
@@ -213,12 +238,36 @@ class UserConfig(LazyInit):
 # -C:/Users/dev/AppData"""
         self._make_config_file(EXCLUDED_DIRS_CFG, header, comments)
 
+    def make_filter_rules_config(self) -> None:
+        header = FILTER_RULES_HEADER
+        comments = """
+# Manually add filter rules as shown below, exclude rules win over include rules
+# once any include rule exists only files matching one of them are processed
+# -exclude ext .iso .vhdx
+# -exclude glob ~$*
+# -exclude glob *\\node_modules\\*
+# -exclude dir AppData\\Local\\Temp
+# -include dir Documents
+# -min_size 1KB
+# -max_size 4GB"""
+        self._make_config_file(FILTER_RULES_CFG, header, comments)
+
     def make_common_config(self) -> None:
         header = COMMON_HEADER
         comments = """
 # Manually add directories as shown below
 # log_folder_path = <path>
-# backup_folder_path = <path>"""
+# backup_folder_path = <path>
+
+# Optional monitor tuning
+# event_queue_size = 4096
+# event_queue_policy = block | drop_oldest | coalesce
+# event_debounce_ms = 500
+# event_trace_dir = <path>
+# hash_io_mode = auto | read | mmap
+# hash_chunking = off | cdc
+# hash_engine = threads | processes
+# hash_workers = 8"""
         self._make_config_file(COMMON_CFG, header, comments)
 
     def make_checkbox_config(self) -> None:
@@ -265,6 +314,7 @@ class UserConfig(LazyInit):
         self.log_console("Saving common settings...")
         self._ensure_config_exists(COMMON_CFG)
         cfg = self._config_location(COMMON_CFG)
+        settings = {k: self.config[k] for k in MONITOR_SETTING_KEYS if self.config.get(k)}
 
         def _task() -> None:
             try:
@@ -275,6 +325,8 @@ class UserConfig(LazyInit):
                 content = COMMON_HEADER
                 content += f"log_folder_path = {log_folder_path or ""}\n"
                 content += f"backup_folder_path = {backup_folder_path or ""}\n"
+                for key, value in settings.items():
+                    content += f"{key} = {value}\n"
                 write_text(fd, content)
                 close_fd(fd)
 
@@ -335,6 +387,22 @@ class UserConfig(LazyInit):
             self._written_paths.add(norm_path)
             self.add_excluded_path(norm_path)
 
+    def load_filter_rules_config(self) -> None:
+        from pyile.lib.runtime.rules.engine import parse_rule
+
+        self.log_console("Loading filter rules...")
+        self.RULES = []
+        lines = self._load_config_lines(FILTER_RULES_CFG)
+        for line in lines:
+            if not line.startswith("-"):
+                continue
+
+            text = line.strip()[1:]
+            try:
+                self.RULES.append(parse_rule(text))
+            except ValueError as e:
+                self.log_console(f"[WARNING] Ignoring filter rule {text}: {e}")
+
     def load_common_config(self) -> Dict[str, str]:
         self.log_console("Loading common settings...")
         lines = self._load_config_lines(COMMON_CFG)
@@ -348,9 +416,45 @@ class UserConfig(LazyInit):
                 self.config[key] = value
             elif key == "backup_folder_path":
                 self.config[key] = value
+            elif key in MONITOR_SETTING_KEYS:
+                self.config[key] = value
 
         return self.config
 
+    def monitor_settings(self) -> Dict[str, Any]:
+        settings: Dict[str, Any] = {}
+        for key, kwarg in _INT_SETTINGS.items():
+            value = self.config.get(key)
+            if not value:
+                continue
+            try:
+                number = int(value)
+                if number <= 0:
+                    raise ValueError
+                settings[kwarg] = number
+            except ValueError:
+                self.log_console(f"[WARNING] Ignoring {key} = {value}, expected a positive integer")
+
+        for key, (kwarg, choices) in _CHOICE_SETTINGS.items():
+            value = self.config.get(key)
+            if not value:
+                continue
+            if value not in choices:
+                self.log_console(f"[WARNING] Ignoring {key} = {value}, expected one of {', '.join(choices)}")
+                continue
+            settings[kwarg] = value
+
+        for key, kwarg in _DIR_SETTINGS.items():
+            value = self.config.get(key)
+            if not value:
+                continue
+            if not is_directory(value):
+                self.log_console(f"[WARNING] Ignoring {key} = {value}, directory does not exist")
+                continue
+            settings[kwarg] = value
+
+        return settings
+
     def load_checkbox_config(self) -> Dict[str, str]:
         self.log_console("Loading checkbox states...")
         lines = self._load_config_lines(CHECKBOX_CFG)
@@ -22,6 +22,8 @@ def get_windows_ver() -> WindowsVersion:
     return WindowsVersion(sys_ver.major, sys_ver.minor, sys_ver.build)
 
 def is_windows_11() -> bool:
+    if sys.platform != "win32":
+        return False
     v = get_windows_ver()
     return (v.major == 10 and v.build >= 22000) or v.major >= 11
 
@@ -0,0 +1,116 @@
+from pyile.lib.runtime.internal.thread_safe import LRUCache
+from pyile.lib.runtime.internal.constants import OWNER_CACHE_SIZE, OWNER_CACHE_TTL
+
+import os
+from typing import Optional
+
+try:
+    import win32security # type: ignore
+except ImportError:
+    win32security = None
+
+class OwnerResolver:
+    # maps a path to the account that owns it. resolve() returns None when the
+    # owner can not be read (file already gone, access denied) and the caller
+    # decides on a fallback. tests can swap in any object with this interface.
+    __slots__ = ()
+
+    def resolve(self, path_filename: str) -> Optional[str]:
+        raise NotImplementedError("resolve must be implemented by subclass")
+
+
+class Win32OwnerResolver(OwnerResolver):
+    # GetFileSecurity is still one call per file, the account lookup behind the
+    # SID is the expensive part (it can hit a domain controller) and a handful
+    # of SIDs own almost everything, so that is what gets cached
+    __slots__ = ("_accounts",)
+
+    def __init__(self, maxsize: int = OWNER_CACHE_SIZE, ttl: Optional[float] = OWNER_CACHE_TTL) -> None:
+        self._accounts = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def resolve(self, path_filename: str) -> Optional[str]:
+        try:
+            sd = win32security.GetFileSecurity(path_filename, win32security.OWNER_SECURITY_INFORMATION)
+            sid = sd.GetSecurityDescriptorOwner()
+        except Exception:
+            return None
+
+        if not sid:
+            return None
+
+        try:
+            sid_key = win32security.ConvertSidToStringSid(sid)
+        except Exception:
+            return None
+
+        account = self._accounts.get(sid_key)
+        if account is not None:
+            return account
+
+        try:
+            account, _, _ = win32security.LookupAccountSid("", sid)
+        except Exception:
+            from pyile.lib.utils.logging import log_debug
+            log_debug(f"LookupAccountSid failed for {sid_key}; using the SID string.")
+            account = sid_key
+
+        self._accounts.put(sid_key, account)
+        return account
+
+
+class PosixOwnerResolver(OwnerResolver):
+    __slots__ = ("_accounts",)
+
+    def __init__(self, maxsize: int = OWNER_CACHE_SIZE, ttl: Optional[float] = OWNER_CACHE_TTL) -> None:
+        self._accounts = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def resolve(self, path_filename: str) -> Optional[str]:
+        try:
+            uid = os.stat(path_filename, follow_symlinks=False).st_uid
+        except OSError:
+            return None
+
+        account = self._accounts.get(uid)
+        if account is not None:
+            return account
+
+        import pwd
+        try:
+            account = pwd.getpwuid(uid).pw_name
+        except KeyError:
+            account = str(uid)
+
+        self._accounts.put(uid, account)
+        return account
+
+
+_default_resolver: Optional[OwnerResolver] = None
+_current_user: Optional[str] = None
+
+def get_owner_resolver() -> OwnerResolver:
+    global _default_resolver
+    if _default_resolver is None:
+        _default_resolver = Win32OwnerResolver() if win32security is not None else PosixOwnerResolver()
+    return _default_resolver
+
+def set_owner_resolver(resolver: Optional[OwnerResolver]) -> None:
+    # None restores the platform default on next use
+    global _default_resolver
+    _default_resolver = resolver
+
+def get_current_user() -> str:
+    # if nothing works we fall back to the current user
+    # this will always happen when a file is deleted until
+    # i find a fix for it.
+    global _current_user
+    if _current_user is None:
+        try:
+            if win32security is not None:
+                import win32api # type: ignore
+                _current_user = win32api.GetUserName()
+            else:
+                import getpass
+                _current_user = getpass.getuser()
+        except Exception:
+            _current_user = "Unknown"
+    return _current_user
@@ -9,13 +9,19 @@ else:
 if root not in sys.path:
     sys.path.insert(0, root)
 
-from pyile.bootstrap.build import bootstrap
-if not bootstrap():
-    print("Bootstrap failed. Pyile can not start.")
-    print("Check log file at `pyile/bootstrap/bootstrap.log`")
-    sys.exit(1)
+# hash worker processes (hash_engine = processes) import this file again,
+# only the main process starts the app
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
 
-from pyile.lib.ui.gui.interface import Interface
-interface = Interface()
-interface.mainloop()
+    from pyile.bootstrap.build import bootstrap
+    if not bootstrap():
+        print("Bootstrap failed. Pyile can not start.")
+        print("Check log file at `pyile/bootstrap/bootstrap.log`")
+        sys.exit(1)
+
+    from pyile.lib.ui.gui.interface import Interface
+    interface = Interface()
+    interface.mainloop()
 